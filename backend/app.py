@@ -5,7 +5,7 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
 from flask import jsonify
-from config import UPLOAD_DIR
+from config import UPLOAD_DIR, MAX_CONTENT_LENGTH
 import os
 # Инициализация Flask-приложения
 app = Flask(__name__, static_folder="static")
@@ -16,6 +16,14 @@ app.json.ensure_ascii = False
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///db.sqlite3')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['JWT_SECRET_KEY'] = os.environ.get('JWT_SECRET_KEY', 'dev-secret-change-me')
+# ключ перестановки кодов лобби (services/lobby_codes.py); после запуска не менять
+app.config['LOBBY_CODE_KEY'] = os.environ.get('LOBBY_CODE_KEY', app.config['JWT_SECRET_KEY'])
+# тело запроса не больше 5 MB; большие картинки грузятся кусками через /maps/uploads
+app.config['MAX_CONTENT_LENGTH'] = MAX_CONTENT_LENGTH
+# кэш ответов: memory:// (в процессе), redis://host:6379/0 (общий для воркеров), local:// (тесты)
+app.config['CACHE_URL'] = os.environ.get('CACHE_URL', 'memory://')
+# отдавать файлы через X-Sendfile фронтового сервера (nginx/apache)
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE') == '1'
 
 # Настройки Swagger
 app.config['SWAGGER'] = {
@@ -54,6 +62,9 @@ db = SQLAlchemy(app)
 jwt = JWTManager(app)
 migrate = Migrate(app, db)
 
+from services.cache import init_cache
+init_cache(app.config['CACHE_URL'])
+
 # Регистрация Blueprints
 from routes.auth import auth_bp
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -79,8 +90,15 @@ app.register_blueprint(admin_bp, url_prefix="/api")
 from routes.announcement import announcement_bp
 app.register_blueprint(announcement_bp, url_prefix="/api")
 
+# картинки карт: перекрывает стандартный /static для static/maps
+from routes.static_maps import static_maps_bp
+app.register_blueprint(static_maps_bp)
+
 # Импорт моделей для миграций
-from models import User, Lobby, Game, Team, Player, Result, DropzoneTemplate, DropzoneAssignment, Announcement
+from models import User, Lobby, Game, Team, Player, Result, DropzoneTemplate, DropzoneAssignment, DropzonePreference, Announcement, LobbyStanding, MapImage, MapUpload
+
+# CLI-команды обслуживания (flask rebuild-standings и т.п.)
+import commands
 
 # Пример простой проверки
 @app.route('/api/hello', methods=['GET'])
@@ -93,7 +111,9 @@ if __name__ == "__main__":
 CORS(app, resources={r"/*": {"origins": "*"}},
      supports_credentials=True,
      methods=["GET","POST","DELETE","PATCH","OPTIONS"],
-     allow_headers=["Content-Type","Authorization"])
+     allow_headers=["Content-Type","Authorization"],
+     # заголовки пагинации должны быть видны JS на другом origin
+     expose_headers=["X-Next-Cursor", "Link"])
 
 # на всякий случай: создадим папку при старте
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
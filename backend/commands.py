@@ -0,0 +1,61 @@
+# commands.py
+# CLI-команды обслуживания: запускаются как `flask <команда>` (FLASK_APP=app)
+import click
+
+from app import app, db
+
+
+@app.cli.command("rebuild-standings")
+@click.option("--lobby-id", type=int, default=None, help="Only rebuild this lobby")
+def rebuild_standings_command(lobby_id):
+    """Rebuild lobby standings from the result table (backfill / repair)."""
+    from services.standings import rebuild_standings
+
+    rebuild_standings(lobby_id)
+    db.session.commit()
+    click.echo(f"Standings rebuilt for {'lobby ' + str(lobby_id) if lobby_id else 'all lobbies'}")
+
+
+@app.cli.command("map-images")
+@click.option("--missing-only", is_flag=True, help="Skip maps whose variants already exist")
+def map_images_command(missing_only):
+    """Backfill image dimensions and WebP variants for existing maps."""
+    from models import Map
+    from services.images import image_size, build_variants, variant_filename, VARIANTS
+    from config import UPLOAD_DIR
+
+    done = 0
+    for m in Map.query.all():
+        size = image_size(m.image_filename)
+        if not size:
+            click.echo(f"Skipping {m.name}: {m.image_filename} is missing or not an image")
+            continue
+        m.image_width, m.image_height = size
+        if missing_only and all((UPLOAD_DIR / variant_filename(m.image_filename, v)).exists() for v in VARIANTS):
+            continue
+        build_variants(m.image_filename)
+        done += 1
+    db.session.commit()
+    click.echo(f"Variants built for {done} maps")
+
+
+@app.cli.command("maps-gc")
+@click.option("--dry-run", is_flag=True, help="Only report what would be removed")
+@click.option("--grace", type=int, default=None, help="Keep files younger than this many seconds")
+@click.option("-v", "--verbose", is_flag=True, help="List orphaned files")
+def maps_gc_command(dry_run, grace, verbose):
+    """Remove map images that no map references (uploads never attached, leftovers)."""
+    from config import MAP_GC_GRACE_SECONDS
+    from services.storage import sweep_orphans
+
+    report = sweep_orphans(MAP_GC_GRACE_SECONDS if grace is None else grace, dry_run=dry_run)
+    db.session.commit()
+    if verbose:
+        for name in report["files"]:
+            click.echo(name)
+    click.echo(
+        f"{'Would remove' if dry_run else 'Removed'} "
+        f"{report['orphans'] if dry_run else report['removed']} of {report['scanned']} files, "
+        f"{report['orphan_bytes'] if dry_run else report['bytes_reclaimed']} bytes "
+        f"({report['duration_ms']} ms)"
+    )
@@ -6,3 +6,18 @@ UPLOAD_DIR = Path("static/maps")
 # ограничения
 MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5 MB
 ALLOWED_EXT = {"png", "jpg", "jpeg", "webp"}
+
+# картинки карт неизменяемы (имя = sha256 содержимого) — кэшируем на год
+MAP_IMAGE_MAX_AGE = 365 * 24 * 60 * 60
+
+# очистка static/maps: файлы моложе этого не трогаем (загружены, но карта ещё не создана)
+MAP_GC_GRACE_SECONDS = 24 * 60 * 60
+
+# загрузка по кускам (POST /maps/uploads): предел всего файла и одного куска;
+# кусок должен помещаться в MAX_CONTENT_LENGTH, которым ограничено тело любого запроса
+MAP_UPLOAD_MAX_BYTES = 100 * 1024 * 1024  # 100 MB
+MAP_UPLOAD_CHUNK_BYTES = 4 * 1024 * 1024  # 4 MB
+
+# кэш ответов публичных GET (services/cache.py): срок жизни записи и размер LRU в процессе
+RESPONSE_CACHE_TTL = 30
+RESPONSE_CACHE_MAX_ENTRIES = 2048
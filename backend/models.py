@@ -25,6 +25,9 @@ class Lobby(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False)
     code = db.Column(db.String(8), unique=True, index=True, nullable=False) 
+    created_at = db.Column(db.DateTime, server_default=db.func.now(), index=True)
+    # растёт при любом изменении результатов лобби (ETag для /results/summary)
+    results_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     teams = db.relationship(
         "Team", backref="lobby", lazy=True,
@@ -34,6 +37,10 @@ class Lobby(db.Model):
         "Game", backref="lobby", lazy=True,
         cascade="all, delete-orphan", passive_deletes=True
     )
+    scoring = db.relationship(
+        "ScoringRules", backref="lobby", lazy=True, uselist=False,
+        cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<Lobby {self.name}>"
@@ -46,8 +53,13 @@ class Map(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(120), nullable=False, unique=True)
-    image_filename = db.Column(db.String(255), nullable=False)
+    image_filename = db.Column(db.String(255), nullable=False, index=True)  # «используется ли файл»
     image_url = db.Column(db.String(255), nullable=True)
+    # размеры оригинала в пикселях (заполняются при загрузке/смене картинки)
+    image_width = db.Column(db.Integer)
+    image_height = db.Column(db.Integer)
+    # растёт при изменении шаблонов дропзон карты
+    dropzones_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     dropzones = db.relationship(
         "DropzoneTemplate", backref="map", lazy=True,
@@ -57,6 +69,38 @@ class Map(db.Model):
     def __repr__(self):
         return f"<Map {self.name}>"
 
+# ========================
+# Файлы картинок карт (контентно-адресуемые, со счётчиком ссылок)
+# ========================
+class MapImage(db.Model):
+    __tablename__ = "map_image"
+
+    filename = db.Column(db.String(255), primary_key=True)  # <sha256>.<ext>
+    sha256 = db.Column(db.String(64), unique=True)  # NULL у файлов, залитых до content-addressing
+    size_bytes = db.Column(db.Integer, nullable=False, default=0)
+    ref_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # сколько карт используют
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __repr__(self):
+        return f"<MapImage {self.filename} refs={self.ref_count}>"
+
+# ========================
+# Незавершённые загрузки картинок по кускам (докачка после обрыва)
+# ========================
+class MapUpload(db.Model):
+    __tablename__ = "map_upload"
+
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, часть имени .partial-файла
+    ext = db.Column(db.String(8), nullable=False)
+    size_bytes = db.Column(db.Integer, nullable=False)  # объявленный размер файла
+    received_bytes = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    sha256 = db.Column(db.String(64))  # ожидаемый хеш всего файла, если клиент его прислал
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), index=True)
+    created_at = db.Column(db.DateTime, server_default=db.func.now())
+
+    def __repr__(self):
+        return f"<MapUpload {self.id} {self.received_bytes}/{self.size_bytes}>"
+
 # ========================
 # Игры
 # ========================
@@ -66,7 +110,9 @@ class Game(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     lobby_id = db.Column(db.Integer, db.ForeignKey("lobby.id", ondelete="CASCADE"), nullable=False)
     number = db.Column(db.Integer, nullable=False)
-    map_id = db.Column(db.Integer, db.ForeignKey("map.id", ondelete="CASCADE"), nullable=False)
+    map_id = db.Column(db.Integer, db.ForeignKey("map.id", ondelete="CASCADE"), nullable=False, index=True)
+    # растёт при любом изменении назначений дропзон игры (ETag для доски)
+    board_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     __table_args__ = (
         db.UniqueConstraint("lobby_id", "number", name="uq_game_lobby_number"),  # NEW
@@ -80,6 +126,10 @@ class Game(db.Model):
         "DropzoneAssignment", backref="game", lazy=True,
         cascade="all, delete-orphan", passive_deletes=True
     )
+    dropzone_preferences = db.relationship(
+        "DropzonePreference", backref="game", lazy=True,
+        cascade="all, delete-orphan", passive_deletes=True
+    )
 
     map = db.relationship("Map")
 
@@ -112,6 +162,14 @@ class Team(db.Model):
         "DropzoneAssignment", backref="team", lazy=True,
         cascade="all, delete-orphan", passive_deletes=True
     )
+    dropzone_preferences = db.relationship(
+        "DropzonePreference", backref="team", lazy=True,
+        cascade="all, delete-orphan", passive_deletes=True
+    )
+    standings = db.relationship(
+        "LobbyStanding", backref="team", lazy=True,
+        cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<Team {self.name}>"
@@ -123,9 +181,16 @@ class Player(db.Model):
     __tablename__ = "player"
 
     id = db.Column(db.Integer, primary_key=True)
-    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), nullable=False, index=True)
+    # аккаунт игрока; username остаётся для отображения состава (NULL — ник без аккаунта)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"))
     username = db.Column(db.String(120), nullable=False)
 
+    __table_args__ = (
+        # «в каких командах игрок» и «состоит ли игрок в этой команде» — одним индексом
+        db.Index("ix_player_user_id_team_id", "user_id", "team_id"),
+    )
+
     def __repr__(self):
         return f"<Player {self.username}>"
 
@@ -137,7 +202,7 @@ class Result(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey("game.id", ondelete="CASCADE"), nullable=False)
-    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), nullable=False)
+    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), nullable=False, index=True)
     place = db.Column(db.Integer)
     kills = db.Column(db.Integer)
     points = db.Column(db.Integer)
@@ -149,6 +214,41 @@ class Result(db.Model):
     def __repr__(self):
         return f"<Result Game {self.game_id} Team {self.team_id}>"
 
+# ========================
+# Правила подсчёта очков лобби
+# ========================
+class ScoringRules(db.Model):
+    __tablename__ = "scoring_rules"
+
+    id = db.Column(db.Integer, primary_key=True)
+    lobby_id = db.Column(db.Integer, db.ForeignKey("lobby.id", ondelete="CASCADE"), nullable=False, unique=True)
+    kind = db.Column(db.String(40), nullable=False, default="placement_kills")  # ключ в services.scoring.SCORERS
+    placement_points = db.Column(db.JSON, nullable=False)  # очки за 1-е, 2-е, ... место
+    kill_points = db.Column(db.Integer, nullable=False, default=1)  # очков за одно убийство
+    kill_cap = db.Column(db.Integer)  # максимум засчитываемых убийств за игру (None — без лимита)
+
+    def __repr__(self):
+        return f"<ScoringRules Lobby {self.lobby_id}>"
+
+# ========================
+# Итоговая таблица лобби (материализуется при записи результатов)
+# ========================
+class LobbyStanding(db.Model):
+    __tablename__ = "lobby_standing"
+
+    lobby_id = db.Column(db.Integer, db.ForeignKey("lobby.id", ondelete="CASCADE"), primary_key=True)
+    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), primary_key=True, index=True)
+    kills_total = db.Column(db.Integer, nullable=False, default=0)
+    points_total = db.Column(db.Integer, nullable=False, default=0)
+    games_played = db.Column(db.Integer, nullable=False, default=0)
+    best_place = db.Column(db.Integer)
+    # сумма и число проставленных мест — для среднего места без обхода результатов
+    place_total = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    placed_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+    def __repr__(self):
+        return f"<LobbyStanding Lobby {self.lobby_id} Team {self.team_id}>"
+
 # ========================
 # Шаблон дропзоны (привязан к карте)
 # ========================
@@ -156,7 +256,7 @@ class DropzoneTemplate(db.Model):
     __tablename__ = "dropzone_template"
 
     id = db.Column(db.Integer, primary_key=True)
-    map_id = db.Column(db.Integer, db.ForeignKey("map.id", ondelete="CASCADE"), nullable=False)
+    map_id = db.Column(db.Integer, db.ForeignKey("map.id", ondelete="CASCADE"), nullable=False, index=True)
     name = db.Column(db.String(120), nullable=False)
     x_percent = db.Column(db.Float, nullable=False)
     y_percent = db.Column(db.Float, nullable=False)
@@ -167,6 +267,10 @@ class DropzoneTemplate(db.Model):
         "DropzoneAssignment", backref="dropzone", lazy=True,
         cascade="all, delete-orphan", passive_deletes=True
     )
+    preferences = db.relationship(
+        "DropzonePreference", backref="dropzone", lazy=True,
+        cascade="all, delete-orphan", passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<DropzoneTemplate {self.name}>"
@@ -180,9 +284,9 @@ class DropzoneAssignment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     game_id = db.Column(db.Integer, db.ForeignKey("game.id", ondelete="CASCADE"), nullable=False)
     # ВАЖНО: nullable=True — чтобы можно было "освободить" слот (set NULL)
-    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), nullable=True)
-    dropzone_id = db.Column(db.Integer, db.ForeignKey("dropzone_template.id", ondelete="CASCADE"), nullable=False)
-    created_by = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"))
+    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), nullable=True, index=True)
+    dropzone_id = db.Column(db.Integer, db.ForeignKey("dropzone_template.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_by = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="SET NULL"), index=True)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
 
     __table_args__ = (
@@ -195,6 +299,24 @@ class DropzoneAssignment(db.Model):
     def __repr__(self):
         return f"<DropzoneAssignment Game {self.game_id} Team {self.team_id} Zone {self.dropzone_id}>"
 
+# ========================
+# Пожелания команды по дропзонам на игру (для автоматической раздачи)
+# ========================
+class DropzonePreference(db.Model):
+    __tablename__ = "dropzone_preference"
+
+    game_id = db.Column(db.Integer, db.ForeignKey("game.id", ondelete="CASCADE"), primary_key=True)
+    team_id = db.Column(db.Integer, db.ForeignKey("team.id", ondelete="CASCADE"), primary_key=True, index=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 1 — самая желанная зона
+    dropzone_id = db.Column(db.Integer, db.ForeignKey("dropzone_template.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("game_id", "team_id", "dropzone_id", name="uq_preference_game_team_dropzone"),
+    )
+
+    def __repr__(self):
+        return f"<DropzonePreference Game {self.game_id} Team {self.team_id} #{self.rank} Zone {self.dropzone_id}>"
+
 # ========================
 # Анонсы
 # ========================
@@ -1,108 +1,163 @@
+from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import selectinload
 from app import db
-from models import User, Lobby, Team, Game, Map, DropzoneTemplate, Player
+from models import User, Lobby, Team, Game, Map, DropzoneTemplate
+from services.identity import admin_required, current_identity, invalidate_identity
+from services.versioning import bump_lobby_results
+from services.standings import rebuild_standings
+from services.results import save_results, serialize_result, result_error_response
+from services.pagination import keyset_page, column_fields
+from services.templates import invalidate_map_templates
+from services.teams import invalidate_lobby_teams
+from services.lobby_codes import add_lobby
+from services.cache import invalidate_on_commit
+from services.storage import release_image, sweep_orphans
+from config import MAP_GC_GRACE_SECONDS
 
 admin_bp = Blueprint('admin', __name__)
 
-def require_admin():
-    """Проверка прав администратора"""
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return None
-    return user
+LOBBIES_PER_PAGE = 50
+LOBBIES_MAX_PER_PAGE = 200
+
+ADMIN_USER_FIELDS = column_fields(User, "id", "username", "is_admin", "email", "discord")
 
 @admin_bp.route('/admin/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_users():
     """
-    Получить список всех пользователей (только для админов)
+    Получить список пользователей (только для админов, keyset-пагинация)
     ---
     tags:
       - Admin
     security:
       - BearerAuth: []
+    parameters:
+      - {name: limit, in: query, type: integer, description: "Размер страницы (по умолчанию 100, максимум 500)"}
+      - {name: cursor, in: query, type: string, description: "Значение X-Next-Cursor с предыдущей страницы"}
+      - {name: since, in: query, type: integer, description: "id последней полученной строки (вместо cursor); страница короче limit — последняя"}
+      - {name: fields, in: query, type: string, description: "Список полей через запятую (id отдаётся всегда)"}
     responses:
       200:
         description: Список пользователей
+      400:
+        description: Неверные limit, cursor или fields
       403:
         description: Доступ запрещен
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
-    users = User.query.all()
-    return jsonify([{
-        "id": user.id,
-        "username": user.username,
-        "is_admin": user.is_admin,
-        "email": user.email,
-        "discord": user.discord
-    } for user in users]), 200
+    return keyset_page(User, ADMIN_USER_FIELDS)
 
 @admin_bp.route('/admin/lobbies', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_lobbies():
     """
-    Получить список всех лобби с дополнительной информацией (только для админов)
+    Получить список лобби с командами и играми (только для админов)
+    Постранично; общее количество — в заголовке X-Total-Count.
     ---
     tags:
       - Admin
     security:
       - BearerAuth: []
+    parameters:
+      - name: name
+        in: query
+        type: string
+        required: false
+        description: Фильтр по части названия
+      - name: created_from
+        in: query
+        type: string
+        required: false
+        description: Создано не раньше (ISO дата/время)
+      - name: created_to
+        in: query
+        type: string
+        required: false
+        description: Создано не позже (ISO дата/время, дата — включительно)
+      - name: page
+        in: query
+        type: integer
+        required: false
+        default: 1
+      - name: per_page
+        in: query
+        type: integer
+        required: false
+        default: 50
     responses:
       200:
         description: Список лобби
+      400:
+        description: Неверные параметры
       403:
         description: Доступ запрещен
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', LOBBIES_PER_PAGE, type=int)
+    if page < 1 or not 1 <= per_page <= LOBBIES_MAX_PER_PAGE:
+        return jsonify({"error": f"page must be >= 1, per_page between 1 and {LOBBIES_MAX_PER_PAGE}"}), 400
+
+    query = Lobby.query
+    name = (request.args.get('name') or '').strip()
+    if name:
+        query = query.filter(Lobby.name.ilike(f"%{name}%"))
+    created_from = request.args.get('created_from')
+    created_to = request.args.get('created_to')
+    try:
+        if created_from:
+            query = query.filter(Lobby.created_at >= datetime.fromisoformat(created_from))
+        if created_to and len(created_to) == 10:
+            # голая дата — весь день включительно
+            query = query.filter(Lobby.created_at < datetime.fromisoformat(created_to) + timedelta(days=1))
+        elif created_to:
+            query = query.filter(Lobby.created_at <= datetime.fromisoformat(created_to))
+    except ValueError:
+        return jsonify({"error": "created_from / created_to must be ISO dates"}), 400
+
+    total = query.count()
+    # лобби, команды, игроки и игры с картами — фиксированное число запросов на страницу
+    lobbies = (
+        query
+        .options(
+            selectinload(Lobby.teams).selectinload(Team.players),
+            selectinload(Lobby.games).joinedload(Game.map),
+        )
+        .order_by(Lobby.id)
+        .offset((page - 1) * per_page)
+        .limit(per_page)
+        .all()
+    )
 
-    lobbies = Lobby.query.all()
     result = []
     for lobby in lobbies:
-        teams = Team.query.filter_by(lobby_id=lobby.id).all()
-        games_count = Game.query.filter_by(lobby_id=lobby.id).count()
-        
-        # Получаем информацию о командах и их игроках
-        teams_info = []
-        for team in teams:
-            players = Player.query.filter_by(team_id=team.id).all()
-            teams_info.append({
-                "id": team.id,
-                "name": team.name,
-                "players": [player.username for player in players]
-            })
-        
-        # Получаем информацию об играх
-        games = Game.query.filter_by(lobby_id=lobby.id).all()
-        games_info = []
-        for game in games:
-            map_obj = Map.query.get(game.map_id) if game.map_id else None
-            games_info.append({
-                "id": game.id,
-                "number": game.number,
-                "map_name": map_obj.name if map_obj else "Неизвестная карта"
-            })
-        
+        games = sorted(lobby.games, key=lambda g: g.number)
         result.append({
             "id": lobby.id,
             "name": lobby.name,
             "code": lobby.code,
-            "teams_count": len(teams),
-            "games_count": games_count,
-            "teams": teams_info,
-            "games": games_info
+            "created_at": lobby.created_at.isoformat() if lobby.created_at else None,
+            "teams_count": len(lobby.teams),
+            "games_count": len(games),
+            "teams": [{
+                "id": team.id,
+                "name": team.name,
+                "players": [player.username for player in team.players]
+            } for team in lobby.teams],
+            "games": [{
+                "id": game.id,
+                "number": game.number,
+                "map_name": game.map.name if game.map else "Неизвестная карта"
+            } for game in games]
         })
-    
-    return jsonify(result), 200
+
+    resp = jsonify(result)
+    resp.headers['X-Total-Count'] = str(total)
+    resp.headers['X-Page'] = str(page)
+    resp.headers['X-Per-Page'] = str(per_page)
+    return resp, 200
 
 @admin_bp.route('/admin/maps', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_maps():
     """
     Получить список всех карт с дополнительной информацией (только для админов)
@@ -117,10 +172,6 @@ def get_maps():
       403:
         description: Доступ запрещен
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     maps = Map.query.all()
     result = []
     for map_obj in maps:
@@ -135,8 +186,50 @@ def get_maps():
     
     return jsonify(result), 200
 
+@admin_bp.route('/admin/maps/gc', methods=['POST'])
+@admin_required
+def sweep_map_images():
+    """
+    Очистить static/maps от картинок, которые не использует ни одна карта (только для админов)
+    ---
+    tags:
+      - Admin
+    security:
+      - BearerAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            dry_run:
+              type: boolean
+              default: true
+              description: Только отчёт, без удаления
+            grace_seconds:
+              type: integer
+              description: Не трогать файлы моложе (по умолчанию MAP_GC_GRACE_SECONDS)
+    responses:
+      200:
+        description: Отчёт (scanned, orphans, orphan_bytes, removed, bytes_reclaimed, duration_ms, files)
+      400:
+        description: Неверный grace_seconds
+      403:
+        description: Доступ запрещен
+    """
+    data = request.get_json(silent=True) or {}
+    dry_run = data.get('dry_run', True) is not False
+    grace = data.get('grace_seconds', MAP_GC_GRACE_SECONDS)
+    if not isinstance(grace, int) or grace < 0:
+        return jsonify({"error": "grace_seconds must be a non-negative integer"}), 400
+
+    report = sweep_orphans(grace, dry_run=dry_run)
+    db.session.commit()
+    return jsonify(report), 200
+
 @admin_bp.route('/admin/lobbies', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_lobby():
     """
     Создать новое лобби (только для админов)
@@ -163,32 +256,16 @@ def create_lobby():
       403:
         description: Доступ запрещен
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     data = request.get_json() or {}
     name = data.get('name')
     
     if not name or not name.strip():
         return jsonify({"error": "Name is required"}), 400
 
-    # Генерируем уникальный код лобби
-    import random
-    import string
-    
-    def generate_code():
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-    
-    # Убеждаемся, что код уникален
-    code = generate_code()
-    while Lobby.query.filter_by(code=code).first():
-        code = generate_code()
-    
-    lobby = Lobby(name=name.strip(), code=code)
-    db.session.add(lobby)
+    # код выводится из id лобби — без поиска свободного
+    lobby = add_lobby(name.strip())
     db.session.commit()
-    
+
     return jsonify({
         "message": "Lobby created successfully",
         "lobby": {
@@ -199,7 +276,7 @@ def create_lobby():
     }), 201
 
 @admin_bp.route('/admin/lobbies/<int:lobby_id>/games', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_game_for_lobby(lobby_id):
     """
     Создать игру в лобби (только для админов)
@@ -235,10 +312,6 @@ def create_game_for_lobby(lobby_id):
       404:
         description: Лобби или карта не найдены
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     lobby = Lobby.query.get(lobby_id)
     if not lobby:
         return jsonify({"error": "Lobby not found"}), 404
@@ -261,6 +334,7 @@ def create_game_for_lobby(lobby_id):
 
     game = Game(lobby_id=lobby_id, number=number, map_id=map_id)
     db.session.add(game)
+    invalidate_on_commit(f"lobby:{lobby_id}")
     db.session.commit()
     
     return jsonify({
@@ -274,7 +348,7 @@ def create_game_for_lobby(lobby_id):
     }), 201
 
 @admin_bp.route('/admin/games/<int:game_id>/results/<int:team_id>', methods=['PATCH'])
-@jwt_required()
+@admin_required
 def update_game_result(game_id, team_id):
     """
     Обновить результат игры для команды (только для админов)
@@ -317,48 +391,25 @@ def update_game_result(game_id, team_id):
       404:
         description: Игра, команда или результат не найдены
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
 
-    team = Team.query.get(team_id)
-    if not team or team.lobby_id != game.lobby_id:
-        return jsonify({"error": "Team not found in this lobby"}), 404
-
-    # Находим существующий результат
-    from models import Result
-    result = Result.query.filter_by(game_id=game_id, team_id=team_id).first()
-    if not result:
-        return jsonify({"error": "Result not found"}), 404
-
     data = request.get_json() or {}
-    if "place" in data:
-        result.place = data["place"]
-    if "kills" in data:
-        result.kills = data["kills"]
-    if "points" in data:
-        result.points = data["points"]
-
+    row = {f: data[f] for f in ("place", "kills", "points") if f in data}
+    row["team_id"] = team_id
+    saved, errors = save_results(game, [row], insert=False)
+    if errors:
+        return result_error_response(errors[0])
     db.session.commit()
     
     return jsonify({
         "message": "Result updated successfully",
-        "result": {
-            "id": result.id,
-            "game_id": result.game_id,
-            "team_id": result.team_id,
-            "place": result.place,
-            "kills": result.kills,
-            "points": result.points
-        }
+        "result": serialize_result(saved[0])
     }), 200
 
 @admin_bp.route('/admin/games/<int:game_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_game(game_id):
     """
     Удалить игру (только для админов)
@@ -380,10 +431,6 @@ def delete_game(game_id):
       404:
         description: Игра не найдена
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
@@ -392,12 +439,15 @@ def delete_game(game_id):
     game_number = game.number
 
     db.session.delete(game)
+    rebuild_standings(game.lobby_id)
+    bump_lobby_results(game.lobby_id)
+    invalidate_on_commit(f"game:{game_id}")
     db.session.commit()
 
     return jsonify({"message": f"Game {game_number} deleted"}), 200
 
 @admin_bp.route('/admin/users/<int:user_id>/toggle-admin', methods=['POST'])
-@jwt_required()
+@admin_required
 def toggle_user_admin(user_id):
     """
     Переключить статус администратора пользователя (только для админов)
@@ -419,20 +469,19 @@ def toggle_user_admin(user_id):
       404:
         description: Пользователь не найден
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     user = User.query.get(user_id)
     if not user:
         return jsonify({"error": "User not found"}), 404
 
     # Нельзя снять права админа у самого себя
-    if user.id == admin.id:
+    if user.id == current_identity().id:
         return jsonify({"error": "Cannot change your own admin status"}), 400
 
     user.is_admin = not user.is_admin
     db.session.commit()
+    # отзыв прав действует сразу в этом процессе, в остальных — не позже TTL кэша;
+    # выданные права вступают в силу после повторного входа (новый токен)
+    invalidate_identity(user.id)
 
     return jsonify({
         "message": f"User {user.username} admin status changed to {user.is_admin}",
@@ -440,7 +489,7 @@ def toggle_user_admin(user_id):
     }), 200
 
 @admin_bp.route('/admin/lobbies/<int:lobby_id>/delete', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_lobby(lobby_id):
     """
     Удалить лобби (только для админов)
@@ -462,10 +511,6 @@ def delete_lobby(lobby_id):
       404:
         description: Лобби не найдено
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     lobby = Lobby.query.get(lobby_id)
     if not lobby:
         return jsonify({"error": "Lobby not found"}), 404
@@ -474,12 +519,14 @@ def delete_lobby(lobby_id):
     lobby_name = lobby.name
 
     db.session.delete(lobby)
+    invalidate_on_commit(f"lobby:{lobby_id}")
     db.session.commit()
+    invalidate_lobby_teams(lobby_id)
 
     return jsonify({"message": f"Lobby {lobby_name} deleted"}), 200
 
 @admin_bp.route('/admin/maps/<int:map_id>/delete', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_map(map_id):
     """
     Удалить карту (только для админов)
@@ -501,10 +548,6 @@ def delete_map(map_id):
       404:
         description: Карта не найдена
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     map_obj = Map.query.get(map_id)
     if not map_obj:
         return jsonify({"error": "Map not found"}), 404
@@ -513,12 +556,16 @@ def delete_map(map_id):
     map_name = map_obj.name
 
     db.session.delete(map_obj)
+    # файл, как и раньше, остаётся на диске — снимаем только ссылку карты на него
+    release_image(map_obj.image_filename)
+    invalidate_on_commit(f"map:{map_id}", "maps")
     db.session.commit()
+    invalidate_map_templates(map_id)
 
     return jsonify({"message": f"Map {map_name} deleted"}), 200
 
 @admin_bp.route('/admin/games/<int:game_id>/results', methods=['POST'])
-@jwt_required()
+@admin_required
 def add_game_result(game_id):
     """
     Добавить результат игры для команды (только для админов)
@@ -560,10 +607,6 @@ def add_game_result(game_id):
       404:
         description: Игра или команда не найдены
     """
-    admin = require_admin()
-    if not admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
@@ -577,34 +620,15 @@ def add_game_result(game_id):
     if not team_id or place is None or kills is None or points is None:
         return jsonify({"error": "team_id, place, kills, and points are required"}), 400
 
-    team = Team.query.get(team_id)
-    if not team or team.lobby_id != game.lobby_id:
-        return jsonify({"error": "Team not found in this lobby"}), 404
-
-    # Проверяем, не существует ли уже результат для этой команды в этой игре
-    from models import Result
-    existing_result = Result.query.filter_by(game_id=game_id, team_id=team_id).first()
-    if existing_result:
-        return jsonify({"error": "Result for this team already exists in this game"}), 400
-
-    result = Result(
-        game_id=game_id,
-        team_id=team_id,
-        place=place,
-        kills=kills,
-        points=points
-    )
-    db.session.add(result)
+    row = {"team_id": team_id, "place": place, "kills": kills, "points": points}
+    saved, errors = save_results(game, [row], update=False, required=("place", "kills", "points"))
+    if errors:
+        return result_error_response(
+            errors[0], conflict=(400, "Result for this team already exists in this game")
+        )
     db.session.commit()
     
     return jsonify({
         "message": "Result added successfully",
-        "result": {
-            "id": result.id,
-            "game_id": result.game_id,
-            "team_id": result.team_id,
-            "place": result.place,
-            "kills": result.kills,
-            "points": result.points
-        }
+        "result": serialize_result(saved[0])
     }), 201
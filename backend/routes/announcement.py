@@ -1,21 +1,38 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from models import Announcement, User
+from models import Announcement
+from services.identity import admin_required
+from services.pagination import keyset_page, column_fields
+from services.cache import cached, invalidate_on_commit
 
 announcement_bp = Blueprint('announcement', __name__)
 
+# time/prize исторически могли лежать в description/date
+ANNOUNCEMENT_LIST_FIELDS = {
+    **column_fields(Announcement, "id", "title"),
+    "time": ((Announcement.time, Announcement.description),
+             lambda a: a.time or a.description or "Не указано"),
+    "prize": ((Announcement.prize, Announcement.date),
+              lambda a: a.prize or a.date or "Не указано"),
+}
+
 # ==============================
 # Announcements
 # ==============================
 
 @announcement_bp.route('/announcements', methods=['GET'])
+@cached(lambda: ["announcements"])
 def get_announcements():
     """
-    Get all announcements (public)
+    Get announcements (public, keyset-paginated)
     ---
     tags:
       - Announcements
+    parameters:
+      - {name: limit, in: query, type: integer, description: "Page size (default 100, max 500)"}
+      - {name: cursor, in: query, type: string, description: "Value of X-Next-Cursor from the previous page"}
+      - {name: since, in: query, type: integer, description: "Id of the last row already received (instead of cursor); a page shorter than limit is the last one"}
+      - {name: fields, in: query, type: string, description: "Comma-separated subset of fields (id is always included)"}
     responses:
       200:
         description: List of announcements
@@ -32,18 +49,14 @@ def get_announcements():
                 type: string
               prize:
                 type: string
+      400:
+        description: Invalid limit, cursor or fields
     """
-    announcements = Announcement.query.all()
-    return jsonify([{
-        "id": a.id,
-        "title": a.title,
-        "time": a.time or a.description or "Не указано",
-        "prize": a.prize or a.date or "Не указано"
-    } for a in announcements]), 200
+    return keyset_page(Announcement, ANNOUNCEMENT_LIST_FIELDS)
 
 
 @announcement_bp.route('/announcements', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_announcement():
     """
     Create a new announcement (Admin only)
@@ -76,11 +89,6 @@ def create_announcement():
       403:
         description: Admin access required
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     data = request.get_json() or {}
     title = data.get('title')
     time = data.get('time')
@@ -97,6 +105,7 @@ def create_announcement():
         date=prize  # Дублируем для совместимости
     )
     db.session.add(announcement)
+    invalidate_on_commit("announcements")
     db.session.commit()
 
     return jsonify({
@@ -111,7 +120,7 @@ def create_announcement():
 
 
 @announcement_bp.route('/announcements/<int:announcement_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_announcement(announcement_id):
     """
     Update an announcement (Admin only)
@@ -149,11 +158,6 @@ def update_announcement(announcement_id):
       404:
         description: Announcement not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     announcement = Announcement.query.get(announcement_id)
     if not announcement:
         return jsonify({"error": "Announcement not found"}), 404
@@ -168,6 +172,7 @@ def update_announcement(announcement_id):
         announcement.prize = data['prize']
         announcement.date = data['prize']  # Дублируем для совместимости
 
+    invalidate_on_commit("announcements")
     db.session.commit()
 
     return jsonify({
@@ -182,7 +187,7 @@ def update_announcement(announcement_id):
 
 
 @announcement_bp.route('/announcements/<int:announcement_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_announcement(announcement_id):
     """
     Delete an announcement (Admin only)
@@ -205,16 +210,12 @@ def delete_announcement(announcement_id):
       404:
         description: Announcement not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     announcement = Announcement.query.get(announcement_id)
     if not announcement:
         return jsonify({"error": "Announcement not found"}), 404
 
     db.session.delete(announcement)
+    invalidate_on_commit("announcements")
     db.session.commit()
 
     return jsonify({"message": "Announcement deleted successfully"}), 200
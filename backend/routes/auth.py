@@ -1,11 +1,16 @@
 from flask import Blueprint, request, jsonify
 from app import db
 from models import User
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_jwt_identity
 from werkzeug.security import generate_password_hash, check_password_hash
+from services.identity import admin_required, create_token, current_identity, invalidate_identity
+from services.standings import user_stats
+from services.pagination import keyset_page, column_fields
 
 auth_bp = Blueprint('auth', __name__)
 
+USER_LIST_FIELDS = column_fields(User, "id", "username", "email", "discord", "is_admin")
+
 @auth_bp.route('/register', methods=['POST'])
 def register():
     """
@@ -103,8 +108,8 @@ def login():
     if not user or not check_password_hash(user.password_hash, password):
         return jsonify({"error": "Invalid username or password"}), 401
 
-    # ✅ identity как int (не строка)
-    access_token = create_access_token(identity=str(user.id))
+    # ✅ identity как строка; роль и имя — в claims (см. services/identity.py)
+    access_token = create_token(user)
 
     return jsonify({
         "access_token": access_token,
@@ -160,15 +165,20 @@ def account():
 
 
 @auth_bp.route('/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_users():
     """
-    Get all users (Admin only)
+    Get users (Admin only, keyset-paginated)
     ---
     tags:
       - Auth
     security:
       - BearerAuth: []
+    parameters:
+      - {name: limit, in: query, type: integer, description: "Page size (default 100, max 500)"}
+      - {name: cursor, in: query, type: string, description: "Value of X-Next-Cursor from the previous page"}
+      - {name: since, in: query, type: integer, description: "Id of the last row already received (instead of cursor); a page shorter than limit is the last one"}
+      - {name: fields, in: query, type: string, description: "Comma-separated subset of fields (id is always included)"}
     responses:
       200:
         description: List of users
@@ -187,25 +197,12 @@ def get_users():
                 type: string
               is_admin:
                 type: boolean
+      400:
+        description: Invalid limit, cursor or fields
       403:
         description: Admin access required
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
-    users = User.query.all()
-    result = []
-    for u in users:
-        result.append({
-            "id": u.id,
-            "username": u.username,
-            "email": u.email,
-            "discord": u.discord,
-            "is_admin": u.is_admin
-        })
-    return jsonify(result), 200
+    return keyset_page(User, USER_LIST_FIELDS)
 
 
 @auth_bp.route('/account', methods=['PATCH'])
@@ -386,65 +383,32 @@ def get_user_stats():
               type: integer
             best_placement:
               type: integer
+            average_placement:
+              type: number
+            lobbies:
+              type: array
+              description: Per-lobby breakdown (lobbies with at least one result)
+              items:
+                type: object
+                properties:
+                  lobby_id: {type: integer}
+                  lobby_name: {type: string}
+                  team_id: {type: integer}
+                  team_name: {type: string}
+                  games: {type: integer}
+                  kills: {type: integer}
+                  points: {type: integer}
+                  best_placement: {type: integer}
+                  average_placement: {type: number}
       404:
         description: User not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user:
+    identity = current_identity()
+    if not identity:
         return jsonify({"error": "User not found"}), 404
 
-    # Импортируем модели здесь, чтобы избежать циклических импортов
-    from models import Team, Player, Lobby, Game, Result
-
-    # Находим все команды, в которых участвует пользователь
-    user_players = Player.query.filter_by(username=user.username).all()
-    team_ids = [p.team_id for p in user_players]
-    
-    teams = []
-    total_kills = 0
-    total_points = 0
-    placements = []
-    total_games = 0
-
-    for team_id in team_ids:
-        team = Team.query.get(team_id)
-        if team:
-            lobby = Lobby.query.get(team.lobby_id)
-            
-            teams.append({
-                "id": team.id,
-                "name": team.name,
-                "lobby_id": team.lobby_id,
-                "lobby_name": lobby.name if lobby else "Unknown Lobby"
-            })
-
-            # Получаем результаты команды во всех играх этого лобби
-            if lobby:
-                games = Game.query.filter_by(lobby_id=lobby.id).all()
-                game_ids = [g.id for g in games]
-                
-                if game_ids:
-                    results = Result.query.filter(
-                        Result.team_id == team.id,
-                        Result.game_id.in_(game_ids)
-                    ).all()
-                    
-                    for result in results:
-                        total_games += 1
-                        total_kills += result.kills or 0
-                        total_points += result.points or 0
-                        if result.place:
-                            placements.append(result.place)
-
-    best_placement = min(placements) if placements else None
-
-    return jsonify({
-        "teams": teams,
-        "total_games": total_games,
-        "best_placement": best_placement
-    }), 200
+    # суммы материализованы в lobby_standing и обновляются при записи результатов
+    return jsonify(user_stats(identity.id)), 200
 
 
 @auth_bp.route('/account', methods=['DELETE'])
@@ -471,5 +435,6 @@ def delete_account():
 
     db.session.delete(user)
     db.session.commit()
+    invalidate_identity(user_id)
 
     return jsonify({"message": "Your account has been deleted."}), 200
@@ -1,17 +1,34 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import jwt_required
+from sqlalchemy.exc import IntegrityError
 from app import db
-from models import Game, Map, DropzoneTemplate, DropzoneAssignment, Team, Player, User, Lobby
+from models import Game, Map, DropzoneTemplate, DropzoneAssignment, DropzonePreference, Team, Lobby
+from services.identity import admin_required, current_identity
+from services.teams import teams_of_user_in_lobby, is_team_member
+from services import board_events
+from services.board import build_game_board, list_game_assignments
+from services.dropzones import claim_dropzone, carry_over_assignments
+from services.allocation import allocate_dropzones, STRATEGIES
+from services.versioning import bump_game_board, board_state, board_etag, conditional_json
 
 dropzone_bp = Blueprint('dropzone', __name__)
 
 
+def _assignment_event(assignment, team=None):
+    return {
+        "assignment_id": assignment.id,
+        "dropzone_id": assignment.dropzone_id,
+        "team_id": assignment.team_id,
+        "team_name": team.name if team else None,
+    }
+
+
 # ========================
 # GAME DROPZONES (Assignments)
 # ========================
 
 @dropzone_bp.route('/games/<int:game_id>/dropzones', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_dropzones_for_game(game_id):
     """
     Create dropzones for a game based on its map templates (Admin only)
@@ -35,10 +52,6 @@ def create_dropzones_for_game(game_id):
       404:
         description: Game not found
     """
-    user = User.query.get(int(get_jwt_identity()))
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
@@ -62,7 +75,11 @@ def create_dropzones_for_game(game_id):
         db.session.add(assignment)
         created += 1
 
+    if created:
+        bump_game_board(game.id)
     db.session.commit()
+    if created:
+        board_events.publish(game.id, "snapshot", build_game_board(game))
     return jsonify({"message": "Dropzones created for game", "created": created}), 201
 
 
@@ -82,21 +99,7 @@ def get_dropzones_for_game(game_id):
       200:
         description: List of dropzones with assignment info
     """
-    assignments = DropzoneAssignment.query.filter_by(game_id=game_id).all()
-    result = []
-    for a in assignments:
-        template = DropzoneTemplate.query.get(a.dropzone_id)
-        result.append({
-            "assignment_id": a.id,
-            "dropzone_id": template.id,
-            "name": template.name,
-            "x_percent": template.x_percent,
-            "y_percent": template.y_percent,
-            "radius": template.radius,
-            "capacity": template.capacity,
-            "team_id": a.team_id
-        })
-    return jsonify(result), 200
+    return jsonify(list_game_assignments(game_id)), 200
 
 
 # ========================
@@ -143,7 +146,7 @@ def assign_team(game_id, assignment_id):
       409:
         description: Team already assigned elsewhere
     """
-    user = User.query.get(int(get_jwt_identity()))
+    user = current_identity()
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
@@ -167,8 +170,7 @@ def assign_team(game_id, assignment_id):
 
     # permissions: admin or player of this team
     if not user.is_admin:
-        player = Player.query.filter_by(username=user.username, team_id=team.id).first()
-        if not player:
+        if not is_team_member(user.id, team):
             return jsonify({"error": "You cannot assign for this team"}), 403
 
     # team must not be assigned to any other assignment in this game
@@ -177,8 +179,9 @@ def assign_team(game_id, assignment_id):
         return jsonify({"error": "Team already assigned"}), 409
 
     assignment.team_id = team.id
-    
+    bump_game_board(game_id)
     db.session.commit()
+    board_events.publish(game_id, "assign", _assignment_event(assignment, team))
 
     return jsonify({"message": "Team assigned"}), 200
 
@@ -225,7 +228,7 @@ def assign_team_by_template(game_id, template_id):
       409:
         description: Team already assigned elsewhere
     """
-    user = User.query.get(int(get_jwt_identity()))
+    user = current_identity()
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
@@ -252,8 +255,7 @@ def assign_team_by_template(game_id, template_id):
 
     # permissions: admin or player of this team
     if not user.is_admin:
-        player = Player.query.filter_by(username=user.username, team_id=team.id).first()
-        if not player:
+        if not is_team_member(user.id, team):
             return jsonify({"error": "You cannot assign for this team"}), 403
 
     # team must not be assigned to any other assignment in this game
@@ -270,23 +272,19 @@ def assign_team_by_template(game_id, template_id):
     if existing_assignment:
         return jsonify({"error": "Team already assigned to this dropzone"}), 409
 
-    # check capacity
-    current_assignments = DropzoneAssignment.query.filter_by(
-        game_id=game_id, 
-        dropzone_id=template_id
-    ).count()
-    
-    if current_assignments >= template.capacity:
+    # вместимость проверяется в самой вставке — параллельные заявки не переполнят зону
+    try:
+        assignment = claim_dropzone(game_id, template_id, team.id, created_by=user.id)
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Team already assigned"}), 409
+    if assignment is None:
+        db.session.rollback()
         return jsonify({"error": f"Dropzone is at full capacity ({template.capacity} teams)"}), 409
 
-    # create new assignment for this team
-    assignment = DropzoneAssignment(
-        game_id=game_id, 
-        dropzone_id=template_id, 
-        team_id=team.id
-    )
-    db.session.add(assignment)
+    bump_game_board(game_id)
     db.session.commit()
+    board_events.publish(game_id, "assign", _assignment_event(assignment, team))
 
     return jsonify({"message": "Team assigned to dropzone", "assignment_id": assignment.id}), 201
 
@@ -320,7 +318,7 @@ def remove_team(game_id, assignment_id):
       404:
         description: Not found
     """
-    user = User.query.get(int(get_jwt_identity()))
+    user = current_identity()
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
@@ -336,16 +334,15 @@ def remove_team(game_id, assignment_id):
             return jsonify({"error": "No team assigned to this dropzone"}), 404
             
         # Проверяем, является ли пользователь игроком команды, назначенной на это assignment
-        player = Player.query.filter_by(
-            username=user.username, 
-            team_id=assignment.team_id
-        ).first()
-        if not player:
+        if assignment.team_id not in teams_of_user_in_lobby(user.id, assignment.game.lobby_id):
             return jsonify({"error": "You cannot remove this team"}), 403
 
     # Удаляем назначение полностью
+    event = _assignment_event(assignment)
     db.session.delete(assignment)
+    bump_game_board(game_id)
     db.session.commit()
+    board_events.publish(game_id, "remove", event)
 
     return jsonify({"message": "Team removed"}), 200
 
@@ -379,7 +376,7 @@ def remove_team_by_template(game_id, template_id):
       404:
         description: Not found
     """
-    user = User.query.get(int(get_jwt_identity()))
+    user = current_identity()
     if not user:
         return jsonify({"error": "Unauthorized"}), 401
 
@@ -393,14 +390,15 @@ def remove_team_by_template(game_id, template_id):
 
     # find user's team assignment to this dropzone
     if not user.is_admin:
-        player = Player.query.filter_by(username=user.username).first()
-        if not player:
+        # команда пользователя именно в лобби этой игры, а не первая попавшаяся
+        own_teams = teams_of_user_in_lobby(user.id, game.lobby_id)
+        if not own_teams:
             return jsonify({"error": "You are not a player"}), 403
-        
-        assignment = DropzoneAssignment.query.filter_by(
-            game_id=game_id, 
-            dropzone_id=template_id, 
-            team_id=player.team_id
+
+        assignment = DropzoneAssignment.query.filter(
+            DropzoneAssignment.game_id == game_id,
+            DropzoneAssignment.dropzone_id == template_id,
+            DropzoneAssignment.team_id.in_(own_teams)
         ).first()
         
         if not assignment:
@@ -421,12 +419,303 @@ def remove_team_by_template(game_id, template_id):
         if not assignment:
             return jsonify({"error": "Team not assigned to this dropzone"}), 404
 
+    event = _assignment_event(assignment)
     db.session.delete(assignment)
+    bump_game_board(game_id)
     db.session.commit()
+    board_events.publish(game_id, "remove", event)
 
     return jsonify({"message": "Team removed from dropzone"}), 200
 
 
+# ========================
+# DRAFT (preferences + allocation)
+# ========================
+
+@dropzone_bp.route('/games/<int:game_id>/dropzones/preferences', methods=['PUT'])
+@jwt_required()
+def set_dropzone_preferences(game_id):
+    """
+    Save a team's ranked dropzone preferences for a game (replaces the previous list)
+    ---
+    tags:
+      - Drop Zones (Draft)
+    security:
+      - BearerAuth: []
+    parameters:
+      - name: game_id
+        in: path
+        type: integer
+        required: true
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            team_id: {type: integer}
+            dropzones:
+              type: array
+              description: Template ids, most wanted first
+              items: {type: integer}
+    responses:
+      200:
+        description: Preferences saved
+      400:
+        description: Invalid dropzone list
+      401:
+        description: Unauthorized
+      403:
+        description: Forbidden
+      404:
+        description: Game or team not found
+    """
+    user = current_identity()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    game = Game.query.get(game_id)
+    if not game:
+        return jsonify({"error": "Game not found"}), 404
+
+    data = request.get_json() or {}
+    team_id = data.get('team_id')
+    dropzone_ids = data.get('dropzones')
+    if not team_id:
+        return jsonify({"error": "Missing team_id"}), 400
+    if not isinstance(dropzone_ids, list) or not all(isinstance(z, int) for z in dropzone_ids):
+        return jsonify({"error": "dropzones must be a list of template ids"}), 400
+    if len(set(dropzone_ids)) != len(dropzone_ids):
+        return jsonify({"error": "dropzones must not contain duplicates"}), 400
+
+    team = Team.query.get(team_id)
+    if not team or team.lobby_id != game.lobby_id:
+        return jsonify({"error": "Team not found in this lobby"}), 404
+
+    if not user.is_admin:
+        if not is_team_member(user.id, team):
+            return jsonify({"error": "You cannot set preferences for this team"}), 403
+
+    if dropzone_ids:
+        known = set(db.session.execute(
+            db.select(DropzoneTemplate.id)
+            .where(DropzoneTemplate.map_id == game.map_id, DropzoneTemplate.id.in_(dropzone_ids))
+        ).scalars())
+        unknown = [z for z in dropzone_ids if z not in known]
+        if unknown:
+            return jsonify({"error": f"Dropzone templates not found for this game: {unknown}"}), 400
+
+    DropzonePreference.query.filter_by(game_id=game.id, team_id=team.id).delete()
+    if dropzone_ids:
+        db.session.execute(db.insert(DropzonePreference), [
+            {"game_id": game.id, "team_id": team.id, "rank": rank, "dropzone_id": zone}
+            for rank, zone in enumerate(dropzone_ids, start=1)
+        ])
+    db.session.commit()
+
+    return jsonify({"team_id": team.id, "dropzones": dropzone_ids}), 200
+
+
+@dropzone_bp.route('/games/<int:game_id>/dropzones/preferences', methods=['GET'])
+@jwt_required()
+def get_dropzone_preferences(game_id):
+    """
+    Ranked dropzone preferences for a game (admin sees all teams, players their own team)
+    ---
+    tags:
+      - Drop Zones (Draft)
+    security:
+      - BearerAuth: []
+    parameters:
+      - name: game_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: List of {team_id, team_name, dropzones}
+      401:
+        description: Unauthorized
+      404:
+        description: Game not found
+    """
+    user = current_identity()
+    if not user:
+        return jsonify({"error": "Unauthorized"}), 401
+
+    game = Game.query.get(game_id)
+    if not game:
+        return jsonify({"error": "Game not found"}), 404
+
+    query = (
+        db.session.query(DropzonePreference.team_id, Team.name, DropzonePreference.dropzone_id)
+        .join(Team, Team.id == DropzonePreference.team_id)
+        .filter(DropzonePreference.game_id == game.id)
+        .order_by(DropzonePreference.team_id, DropzonePreference.rank)
+    )
+    if not user.is_admin:
+        own_teams = teams_of_user_in_lobby(user.id, game.lobby_id)
+        query = query.filter(DropzonePreference.team_id.in_(own_teams))
+
+    teams = {}
+    for team_id, team_name, zone in query.all():
+        teams.setdefault(team_id, {"team_id": team_id, "team_name": team_name, "dropzones": []})
+        teams[team_id]["dropzones"].append(zone)
+    return jsonify(list(teams.values())), 200
+
+
+@dropzone_bp.route('/games/<int:game_id>/dropzones/allocate', methods=['POST'])
+@admin_required
+def allocate_game_dropzones(game_id):
+    """
+    Allocate dropzones to all unassigned teams of the game in one go (Admin only)
+    `optimal` minimises the total preference rank over all teams (min-cost matching),
+    `rotation` lets teams pick in turn, worst place in the previous game first.
+    Teams without preferences get any free slot; capacity is always respected.
+    ---
+    tags:
+      - Drop Zones (Draft)
+    security:
+      - BearerAuth: []
+    parameters:
+      - name: game_id
+        in: path
+        type: integer
+        required: true
+      - in: body
+        name: body
+        required: false
+        schema:
+          type: object
+          properties:
+            strategy: {type: string, enum: [optimal, rotation], default: optimal}
+            replace: {type: boolean, default: false, description: "Drop existing team assignments first"}
+    responses:
+      200:
+        description: Allocation written
+        schema:
+          type: object
+          properties:
+            assigned:
+              type: array
+              items:
+                type: object
+                properties:
+                  team_id: {type: integer}
+                  dropzone_id: {type: integer}
+                  rank: {type: integer}
+            unassigned:
+              type: array
+              items: {type: integer}
+      400:
+        description: Unknown strategy
+      403:
+        description: Admin access required
+      404:
+        description: Game not found
+      409:
+        description: A team was assigned concurrently; nothing written
+    """
+    game = Game.query.get(game_id)
+    if not game:
+        return jsonify({"error": "Game not found"}), 404
+
+    data = request.get_json(silent=True) or {}
+    strategy = data.get('strategy', 'optimal')
+    if strategy not in STRATEGIES:
+        return jsonify({"error": f"strategy must be one of: {', '.join(STRATEGIES)}"}), 400
+
+    # параллельное занятие зоны той же командой — конфликт по uq_assignment_game_team
+    try:
+        assigned, unassigned = allocate_dropzones(
+            game, strategy=strategy, replace=bool(data.get('replace')), created_by=current_identity().id
+        )
+        bump_game_board(game.id)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Assignments changed during allocation, try again"}), 409
+    # много изменений сразу — подписчикам проще получить доску целиком
+    board_events.publish(game.id, "snapshot", build_game_board(game))
+
+    return jsonify({"assigned": assigned, "unassigned": unassigned}), 200
+
+
+@dropzone_bp.route('/games/<int:game_id>/dropzones/carry-over', methods=['POST'])
+@admin_required
+def carry_over_dropzones(game_id):
+    """
+    Copy team dropzone assignments from another game of the same lobby and map (Admin only)
+    Teams no longer in the lobby, teams already assigned in this game and teams
+    whose zone is full are skipped and reported.
+    ---
+    tags:
+      - Drop Zones (Draft)
+    security:
+      - BearerAuth: []
+    parameters:
+      - name: game_id
+        in: path
+        type: integer
+        required: true
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            from_game_id: {type: integer}
+    responses:
+      200:
+        description: Assignments copied
+        schema:
+          type: object
+          properties:
+            copied: {type: integer}
+            skipped:
+              type: array
+              items:
+                type: object
+                properties:
+                  team_id: {type: integer}
+                  dropzone_id: {type: integer}
+                  reason: {type: string, enum: [team_not_in_lobby, already_assigned, zone_full]}
+      400:
+        description: Missing from_game_id / games from different lobbies or maps
+      403:
+        description: Admin access required
+      404:
+        description: Game not found
+    """
+    game = Game.query.get(game_id)
+    if not game:
+        return jsonify({"error": "Game not found"}), 404
+
+    data = request.get_json() or {}
+    from_game_id = data.get('from_game_id')
+    if not from_game_id:
+        return jsonify({"error": "Missing from_game_id"}), 400
+    if from_game_id == game.id:
+        return jsonify({"error": "from_game_id must differ from the target game"}), 400
+
+    source = Game.query.get(from_game_id)
+    if not source:
+        return jsonify({"error": "Source game not found"}), 404
+    if source.lobby_id != game.lobby_id:
+        return jsonify({"error": "Games belong to different lobbies"}), 400
+    if source.map_id != game.map_id:
+        return jsonify({"error": "Games are played on different maps"}), 400
+
+    copied, skipped = carry_over_assignments(game, source, created_by=current_identity().id)
+    if copied:
+        bump_game_board(game.id)
+    db.session.commit()
+    if copied:
+        board_events.publish(game.id, "snapshot", build_game_board(game))
+
+    return jsonify({"copied": copied, "skipped": skipped}), 200
+
+
 @dropzone_bp.route('/dropzones/for-game/<int:game_id>', methods=['GET'])
 def get_dropzones_for_game_full(game_id):
     """
@@ -440,46 +729,58 @@ def get_dropzones_for_game_full(game_id):
         in: path
         type: integer
         required: true
+      - name: If-None-Match
+        in: header
+        type: string
+        required: false
     responses:
       200:
-        description: Dropzones with assignment and team info
+        description: Dropzones with assignment and team info (with ETag)
+      304:
+        description: Board unchanged since the given ETag
+    """
+    # одна лёгкая выборка версий; доска собирается только если она изменилась
+    state = board_state(game_id)
+    if not state:
+      return jsonify({"error": "Game not found"}), 404
+
+    return conditional_json(board_etag(state), lambda: build_game_board(state))
+
+
+@dropzone_bp.route('/dropzones/for-game/<int:game_id>/stream', methods=['GET'])
+def stream_dropzones_for_game(game_id):
+    """
+    Live dropzone board for a game (Server-Sent Events)
+    Sends a `snapshot` event with the same payload as /dropzones/for-game/<id>,
+    then `assign` / `remove` deltas as teams claim and leave zones
+    (a fresh `snapshot` follows bulk changes such as /dropzones/allocate or /carry-over).
+    The polling endpoint remains available as a fallback.
+    ---
+    tags:
+      - Drop Zones (Assignments)
+    produces:
+      - text/event-stream
+    parameters:
+      - name: game_id
+        in: path
+        type: integer
+        required: true
+    responses:
+      200:
+        description: Event stream (snapshot, assign, remove)
+      404:
+        description: Game not found
     """
     game = Game.query.get(game_id)
     if not game:
-      return jsonify({"error": "Game not found"}), 404
+        return jsonify({"error": "Game not found"}), 404
 
-    # все зоны карты (шаблоны)
-    templates = DropzoneTemplate.query.filter_by(map_id=game.map_id).all()
+    # подписываемся до снапшота, чтобы не потерять дельты между ними
+    sub = board_events.subscribe(game.id)
+    snapshot = build_game_board(game)
 
-    # все назначения для этой игры
-    assns = DropzoneAssignment.query.filter_by(game_id=game.id).all()
-    by_zone = {}
-    for a in assns:
-        if a.dropzone_id not in by_zone:
-            by_zone[a.dropzone_id] = []
-        team = Team.query.get(a.team_id) if a.team_id else None
-        by_zone[a.dropzone_id].append({
-            "assignment_id": a.id,
-            "team_id": a.team_id,
-            "team_name": team.name if team else None,
-        })
-
-    out = []
-    for t in templates:
-        assignments = by_zone.get(t.id, [])
-        out.append({
-            "id": t.id,               # id шаблона зоны (для ключа/отображения)
-            "name": t.name,
-            "x_percent": t.x_percent,
-            "y_percent": t.y_percent,
-            "radius": t.radius,
-            "capacity": t.capacity,
-            "current_teams": len(assignments),
-            "teams": assignments,     # список всех команд в этой зоне
-            # для обратной совместимости
-            "assignment_id": assignments[0]["assignment_id"] if assignments else None,
-            "team_id": assignments[0]["team_id"] if assignments else None,
-            "team_name": assignments[0]["team_name"] if assignments else None,
-        })
-    return jsonify(out), 200
-  
\ No newline at end of file
+    return Response(
+        board_events.stream(sub, snapshot),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,10 +1,17 @@
-from flask import Blueprint, request, jsonify, url_for
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify
+from sqlalchemy.exc import IntegrityError
 from app import db
 from models import (
-    Lobby, Game, User, Map,
-    Result, Team,
+    Lobby, Game, Map,
+    Result, Team, ScoringRules,
 )
+from services.identity import admin_required
+from services.versioning import bump_lobby_results, results_state, results_etag, conditional_json
+from services.standings import apply_result_change, rebuild_standings, lobby_standings, result_values
+from services.results import save_results, serialize_result, result_error_response
+from services.scoring import make_scorer, rescore_lobby, serialize_rules, validate_rules
+from services.images import map_image_url, variant_urls
+from services.cache import cached, tag_response, invalidate_on_commit
 
 game_bp = Blueprint("game", __name__)
 
@@ -16,7 +23,10 @@ def _serialize_game(g: Game):
         "map": {
             "id": g.map.id,
             "name": g.map.name,
-            "image_url": url_for("static", filename=f"maps/{g.map.image_filename}", _external=True)
+            "image_url": map_image_url(g.map.image_filename),
+            "image_variants": variant_urls(g.map.image_filename),
+            "width": g.map.image_width,
+            "height": g.map.image_height
         } if g.map else None
     }
 
@@ -24,7 +34,7 @@ def _serialize_game(g: Game):
 # Games
 # ==============================
 @game_bp.route("/lobbies/<int:lobby_id>/games", methods=["POST"])
-@jwt_required()
+@admin_required
 def create_game(lobby_id):
     """
     Create a new game in a lobby (Admin only)
@@ -77,6 +87,13 @@ def create_game(lobby_id):
                       type: string
                     image_url:
                       type: string
+                    image_variants:
+                      type: object
+                      description: WebP thumb/medium/full URLs
+                    width:
+                      type: integer
+                    height:
+                      type: integer
       400:
         description: Missing required fields
       403:
@@ -84,11 +101,6 @@ def create_game(lobby_id):
       404:
         description: Lobby or map not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     lobby = Lobby.query.get(lobby_id)
     if not lobby:
         return jsonify({"error": "Lobby not found"}), 404
@@ -106,12 +118,14 @@ def create_game(lobby_id):
 
     new_game = Game(lobby_id=lobby.id, number=number, map_id=m.id)
     db.session.add(new_game)
+    invalidate_on_commit(f"lobby:{lobby.id}")
     db.session.commit()
 
     return jsonify({"message": "Game created", "game": _serialize_game(new_game)}), 201
 
 
 @game_bp.route("/lobbies/<int:lobby_id>/games", methods=["GET"])
+@cached(lambda lobby_id: [f"lobby:{lobby_id}", "maps"])
 def get_games_for_lobby(lobby_id):
     """
     List games for a lobby (with embedded map)
@@ -147,6 +161,13 @@ def get_games_for_lobby(lobby_id):
                     type: string
                   image_url:
                     type: string
+                  image_variants:
+                    type: object
+                    description: WebP thumb/medium/full URLs
+                  width:
+                    type: integer
+                  height:
+                    type: integer
       404:
         description: Lobby not found
     """
@@ -164,7 +185,7 @@ def get_games_for_lobby(lobby_id):
 
 
 @game_bp.route("/lobbies/<int:lobby_id>/games/<int:game_id>", methods=["DELETE"])
-@jwt_required()
+@admin_required
 def delete_game(lobby_id, game_id):
     """
     Delete a game (Admin only)
@@ -197,11 +218,6 @@ def delete_game(lobby_id, game_id):
       404:
         description: Lobby or game not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     lobby = Lobby.query.get(lobby_id)
     if not lobby:
         return jsonify({"error": "Lobby not found"}), 404
@@ -211,6 +227,9 @@ def delete_game(lobby_id, game_id):
         return jsonify({"error": "Game not found in this lobby"}), 404
 
     db.session.delete(game)
+    rebuild_standings(lobby.id)
+    bump_lobby_results(lobby.id)
+    invalidate_on_commit(f"game:{game.id}")
     db.session.commit()
     return jsonify({"message": "Game deleted successfully"}), 200
 
@@ -219,7 +238,7 @@ def delete_game(lobby_id, game_id):
 # Results
 # ==============================
 @game_bp.route("/games/<int:game_id>/results", methods=["POST"])
-@jwt_required()
+@admin_required
 def add_result(game_id):
     """
     Add a result for a team in a game (Admin only)
@@ -284,56 +303,107 @@ def add_result(game_id):
       409:
         description: Result for this team already exists
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
 
     data = request.get_json() or {}
-    team_id = data.get("team_id")
-    place = data.get("place")
-    kills = data.get("kills")
-    points = data.get("points")
-
-    if not team_id:
-        return jsonify({"error": "team_id is required"}), 400
-
-    team = Team.query.get(team_id)
-    if not team or team.lobby_id != game.lobby_id:
-        return jsonify({"error": "Team not found in this lobby"}), 404
-
-    existing = Result.query.filter_by(game_id=game.id, team_id=team.id).first()
-    if existing:
-        return jsonify({"error": "Result for this team already exists"}), 409
-
-    result = Result(
-        game_id=game.id,
-        team_id=team.id,
-        place=place,
-        kills=kills,
-        points=points
-    )
-    db.session.add(result)
+    row = {f: data.get(f) for f in ("team_id", "place", "kills", "points")}
+    saved, errors = save_results(game, [row], update=False)
+    if errors:
+        return result_error_response(errors[0])
     db.session.commit()
 
     return jsonify({
         "message": "Result saved successfully",
-        "result": {
-            "id": result.id,
-            "game_id": result.game_id,
-            "team_id": result.team_id,
-            "place": result.place,
-            "kills": result.kills,
-            "points": result.points
-        }
+        "result": serialize_result(saved[0])
     }), 201
 
 
+@game_bp.route("/games/<int:game_id>/results/bulk", methods=["POST"])
+@admin_required
+def save_results_bulk(game_id):
+    """
+    Save results for many teams of a game at once (Admin only)
+    Rows are validated together; if any row fails, nothing is written and
+    every failing row is reported. Existing results are updated (upsert).
+    ---
+    tags:
+      - Results
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: game_id
+        type: integer
+        required: true
+        description: ID of the game
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            results:
+              type: array
+              items:
+                type: object
+                properties:
+                  team_id:
+                    type: integer
+                  place:
+                    type: integer
+                  kills:
+                    type: integer
+                  points:
+                    type: integer
+    responses:
+      200:
+        description: All results saved
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+            results:
+              type: array
+              items:
+                type: object
+      400:
+        description: Invalid payload or per-row errors (index, team_id, code, error)
+      403:
+        description: Admin access required
+      404:
+        description: Game not found
+    """
+    game = Game.query.get(game_id)
+    if not game:
+        return jsonify({"error": "Game not found"}), 404
+
+    data = request.get_json() or {}
+    rows = data.get("results")
+    if not isinstance(rows, list) or not rows:
+        return jsonify({"error": "results must be a non-empty list"}), 400
+
+    saved, errors = save_results(game, rows)
+    if errors:
+        db.session.rollback()
+        return jsonify({"error": "Some results are invalid", "errors": errors}), 400
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # параллельная запись результата той же команды
+        db.session.rollback()
+        return jsonify({"error": "Results were modified concurrently, retry"}), 409
+
+    return jsonify({
+        "message": f"{len(saved)} results saved",
+        "results": [serialize_result(r) for r in saved]
+    }), 200
+
+
 @game_bp.route("/games/<int:game_id>/results", methods=["GET"])
+@cached(lambda game_id: [f"game:{game_id}"])
 def get_results_for_game(game_id):
     """
     Get results for a game
@@ -372,6 +442,8 @@ def get_results_for_game(game_id):
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
+    # результаты меняются вместе с results_version лобби (bump_lobby_results)
+    tag_response(f"lobby:{game.lobby_id}")
 
     results = (
         Result.query
@@ -394,6 +466,7 @@ def get_results_for_game(game_id):
 
 
 @game_bp.route("/lobbies/<int:lobby_id>/results/summary", methods=["GET"])
+@cached(lambda lobby_id: [f"lobby:{lobby_id}"])
 def get_lobby_results_summary(lobby_id):
     """
     Aggregate results for a lobby (public)
@@ -406,6 +479,10 @@ def get_lobby_results_summary(lobby_id):
         type: integer
         required: true
         description: ID of the lobby
+      - in: header
+        name: If-None-Match
+        type: string
+        required: false
     responses:
       200:
         description: Summary of all results in the lobby
@@ -422,43 +499,24 @@ def get_lobby_results_summary(lobby_id):
                 type: integer
               points_total:
                 type: integer
+              games_played:
+                type: integer
+              best_place:
+                type: integer
+      304:
+        description: Summary unchanged since the given ETag
       404:
         description: Lobby not found
     """
-    lobby = Lobby.query.get(lobby_id)
-    if not lobby:
+    state = results_state(lobby_id)
+    if not state:
         return jsonify({"error": "Lobby not found"}), 404
 
-    games = Game.query.filter_by(lobby_id=lobby.id).all()
-    game_ids = [g.id for g in games]
-    if not game_ids:
-        return jsonify([]), 200
-
-    all_results = Result.query.filter(Result.game_id.in_(game_ids)).all()
-    summary = {}
-    for r in all_results:
-        if r.team_id not in summary:
-            summary[r.team_id] = {"kills": 0, "points": 0}
-        summary[r.team_id]["kills"] += r.kills or 0
-        summary[r.team_id]["points"] += r.points or 0
-
-    output = []
-    for team_id, stats in summary.items():
-        team = Team.query.get(team_id)
-        if team:
-            output.append({
-                "team_id": team.id,
-                "team_name": team.name,
-                "kills_total": stats["kills"],
-                "points_total": stats["points"]
-            })
-    # можно отсортировать итоговую таблицу
-    output.sort(key=lambda x: (x["points_total"], x["kills_total"]), reverse=True)
-    return jsonify(output), 200
+    return conditional_json(results_etag(state), lambda: lobby_standings(lobby_id))
 
 
 @game_bp.route("/games/<int:game_id>/results/<int:result_id>", methods=["PATCH"])
-@jwt_required()
+@admin_required
 def update_result(game_id, result_id):
     """
     Update an existing result (Admin only)
@@ -521,11 +579,6 @@ def update_result(game_id, result_id):
       404:
         description: Game or result not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
@@ -535,29 +588,20 @@ def update_result(game_id, result_id):
         return jsonify({"error": "Result not found in this game"}), 404
 
     data = request.get_json() or {}
-    if "place" in data:
-        result.place = data["place"]
-    if "kills" in data:
-        result.kills = data["kills"]
-    if "points" in data:
-        result.points = data["points"]
-
+    row = {f: data[f] for f in ("place", "kills", "points") if f in data}
+    row["team_id"] = result.team_id
+    saved, errors = save_results(game, [row], insert=False)
+    if errors:
+        return result_error_response(errors[0])
     db.session.commit()
     return jsonify({
         "message": "Result updated successfully",
-        "result": {
-            "id": result.id,
-            "game_id": result.game_id,
-            "team_id": result.team_id,
-            "place": result.place,
-            "kills": result.kills,
-            "points": result.points
-        }
+        "result": serialize_result(saved[0])
     }), 200
 
 
 @game_bp.route("/games/<int:game_id>/results/<int:result_id>", methods=["DELETE"])
-@jwt_required()
+@admin_required
 def delete_result(game_id, result_id):
     """
     Delete a result (Admin only)
@@ -590,11 +634,6 @@ def delete_result(game_id, result_id):
       404:
         description: Game or result not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     game = Game.query.get(game_id)
     if not game:
         return jsonify({"error": "Game not found"}), 404
@@ -603,6 +642,160 @@ def delete_result(game_id, result_id):
     if not result or result.game_id != game.id:
         return jsonify({"error": "Result not found in this game"}), 404
 
+    old = result_values(result)
     db.session.delete(result)
+    apply_result_change(game.lobby_id, result.team_id, old=old)
+    bump_lobby_results(game.lobby_id)
     db.session.commit()
     return jsonify({"message": "Result deleted successfully"}), 200
+
+
+# ==============================
+# Scoring rules
+# ==============================
+@game_bp.route("/lobbies/<int:lobby_id>/scoring", methods=["GET"])
+def get_scoring_rules(lobby_id):
+    """
+    Get scoring rules of a lobby (public)
+    ---
+    tags:
+      - Results
+    parameters:
+      - in: path
+        name: lobby_id
+        type: integer
+        required: true
+        description: ID of the lobby
+    responses:
+      200:
+        description: Scoring rules
+        schema:
+          type: object
+          properties:
+            lobby_id:
+              type: integer
+            kind:
+              type: string
+            placement_points:
+              type: array
+              items:
+                type: integer
+            kill_points:
+              type: integer
+            kill_cap:
+              type: integer
+      404:
+        description: Lobby not found / no scoring rules (points are entered manually)
+    """
+    lobby = Lobby.query.get(lobby_id)
+    if not lobby:
+        return jsonify({"error": "Lobby not found"}), 404
+    if not lobby.scoring:
+        return jsonify({"error": "Scoring rules not set"}), 404
+    return jsonify(serialize_rules(lobby.scoring)), 200
+
+
+@game_bp.route("/lobbies/<int:lobby_id>/scoring", methods=["PUT"])
+@admin_required
+def set_scoring_rules(lobby_id):
+    """
+    Set scoring rules of a lobby and recompute all its results (Admin only)
+    Points of every result in the lobby are recomputed from place and kills
+    in one pass; later result writes compute points server-side.
+    ---
+    tags:
+      - Results
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: lobby_id
+        type: integer
+        required: true
+        description: ID of the lobby
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          properties:
+            kind:
+              type: string
+              description: Scoring engine (placement_kills)
+            placement_points:
+              type: array
+              items:
+                type: integer
+              description: Points for 1st, 2nd, ... place
+            kill_points:
+              type: integer
+              description: Points per kill
+            kill_cap:
+              type: integer
+              description: Max kills counted per game (null = no cap)
+    responses:
+      200:
+        description: Rules saved, results recomputed
+      400:
+        description: Invalid rules
+      403:
+        description: Admin access required
+      404:
+        description: Lobby not found
+    """
+    lobby = Lobby.query.get(lobby_id)
+    if not lobby:
+        return jsonify({"error": "Lobby not found"}), 404
+
+    values, error = validate_rules(request.get_json() or {})
+    if error:
+        return jsonify({"error": error}), 400
+
+    rules = lobby.scoring or ScoringRules(lobby_id=lobby.id)
+    for key, value in values.items():
+        setattr(rules, key, value)
+    db.session.add(rules)
+
+    rescored = rescore_lobby(lobby.id, make_scorer(rules))
+    db.session.commit()
+    return jsonify({
+        "message": "Scoring rules saved",
+        "rules": serialize_rules(rules),
+        "rescored": rescored
+    }), 200
+
+
+@game_bp.route("/lobbies/<int:lobby_id>/scoring", methods=["DELETE"])
+@admin_required
+def delete_scoring_rules(lobby_id):
+    """
+    Remove scoring rules of a lobby (Admin only)
+    Existing points are kept; new results take points as entered.
+    ---
+    tags:
+      - Results
+    security:
+      - Bearer: []
+    parameters:
+      - in: path
+        name: lobby_id
+        type: integer
+        required: true
+        description: ID of the lobby
+    responses:
+      200:
+        description: Scoring rules removed
+      403:
+        description: Admin access required
+      404:
+        description: Lobby or rules not found
+    """
+    lobby = Lobby.query.get(lobby_id)
+    if not lobby:
+        return jsonify({"error": "Lobby not found"}), 404
+    if not lobby.scoring:
+        return jsonify({"error": "Scoring rules not set"}), 404
+
+    db.session.delete(lobby.scoring)
+    db.session.commit()
+    return jsonify({"message": "Scoring rules removed"}), 200
@@ -1,19 +1,20 @@
 # routes/lobby.py
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
-from models import Lobby, User
-import random, string
+from models import Lobby
+from services.identity import admin_required
+from services.pagination import keyset_page, column_fields
+from services.teams import invalidate_lobby_teams
+from services.lobby_codes import add_lobby
+from services.cache import cached, tag_response, invalidate_on_commit
 
 lobby_bp = Blueprint('lobby', __name__)
 
-def _gen_code(length=8):
-    alphabet = string.ascii_uppercase + string.digits
-    return ''.join(random.choice(alphabet) for _ in range(length))
+LOBBY_LIST_FIELDS = column_fields(Lobby, "id", "name")
 
 # ✅ Create lobby (admin)
 @lobby_bp.route('/create', methods=['POST'])
-@jwt_required()
+@admin_required
 def create_lobby():
     """
     Create a new lobby (Admin only)
@@ -50,24 +51,14 @@ def create_lobby():
       403:
         description: Admin access required
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     data = request.get_json() or {}
     name = data.get('name')
 
     if not name:
         return jsonify({"error": "Lobby name is required"}), 400
 
-    code = _gen_code()
-    while Lobby.query.filter_by(code=code).first():
-        code = _gen_code()
-
-    new_lobby = Lobby(name=name, code=code)
-    db.session.add(new_lobby)
+    # код выводится из id лобби — без поиска свободного
+    new_lobby = add_lobby(name)
     db.session.commit()
 
     return jsonify({
@@ -84,10 +75,15 @@ def create_lobby():
 @lobby_bp.route('/', methods=['GET'])
 def get_all_lobbies():
     """
-    Get a list of all lobbies (without code)
+    Get a list of all lobbies (without code), keyset-paginated
     ---
     tags:
       - Lobby
+    parameters:
+      - {name: limit, in: query, type: integer, description: "Page size (default 100, max 500)"}
+      - {name: cursor, in: query, type: string, description: "Value of X-Next-Cursor from the previous page"}
+      - {name: since, in: query, type: integer, description: "Id of the last row already received (instead of cursor); a page shorter than limit is the last one"}
+      - {name: fields, in: query, type: string, description: "Comma-separated subset of fields (id is always included)"}
     responses:
       200:
         description: A list of all lobbies
@@ -98,19 +94,14 @@ def get_all_lobbies():
             properties:
               id: {type: integer}
               name: {type: string}
+      400:
+        description: Invalid limit, cursor or fields
     """
-    lobbies = Lobby.query.all()
-    result = []
-    for lobby in lobbies:
-        result.append({
-            "id": lobby.id,
-            "name": lobby.name
-        })
-    return jsonify(result), 200
+    return keyset_page(Lobby, LOBBY_LIST_FIELDS)
 
 
 @lobby_bp.route('/<int:lobby_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_lobby(lobby_id):
     """
     Delete a lobby (Admin only)
@@ -133,24 +124,21 @@ def delete_lobby(lobby_id):
       404:
         description: Lobby not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     lobby = Lobby.query.get(lobby_id)
     if not lobby:
         return jsonify({"error": "Lobby not found"}), 404
 
     db.session.delete(lobby)
+    invalidate_on_commit(f"lobby:{lobby_id}")
     db.session.commit()
+    invalidate_lobby_teams(lobby_id)
 
     return jsonify({"message": "Lobby deleted successfully"}), 200
 
 
 # ✅ Get lobby by CODE (для Join) - возвращает только id и name
 @lobby_bp.route('/by-code/<string:code>', methods=['GET'])
+@cached()
 def get_lobby_by_code(code):
     """
     Get lobby by code
@@ -178,6 +166,7 @@ def get_lobby_by_code(code):
     lobby = Lobby.query.filter_by(code=code).first()
     if not lobby:
         return jsonify({"error": "Lobby not found"}), 404
+    tag_response(f"lobby:{lobby.id}")
     return jsonify({"id": lobby.id, "name": lobby.name}), 200
 
 
@@ -1,12 +1,19 @@
 # routes/maps.py
-from flask import Blueprint, request, jsonify, url_for
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
-from uuid import uuid4
-
+from flask import Blueprint, request, jsonify
 from app import db
-from models import Map, DropzoneTemplate, User
+from models import Map, DropzoneTemplate
 from config import UPLOAD_DIR, ALLOWED_EXT
+from services.identity import admin_required, current_identity
+from services.versioning import bump_map_dropzones
+from services.pagination import keyset_page, column_fields
+from services.spatial import map_index, serialize_overlap
+from services.templates import map_templates, invalidate_map_templates
+from services.cache import cached, invalidate_on_commit
+from services.images import image_size, schedule_variants, map_image_url, variant_urls
+from services.storage import store_upload, register_image, acquire_image, release_image, delete_image
+from services.uploads import (
+    UploadError, start_upload, get_upload, append_chunk, finish_upload, abort_upload, upload_state,
+)
 
 maps_bp = Blueprint("maps", __name__)
 
@@ -16,18 +23,46 @@ def _allowed(name: str) -> bool:
     return "." in name and name.rsplit(".", 1)[1].lower() in ALLOWED_EXT
 
 def _map_url(m: Map) -> str:
-    # абсолютная ссылка на файл из static/maps
-    return url_for("static", filename=f"maps/{m.image_filename}", _external=True)
+    # абсолютная ссылка на оригинал из static/maps
+    return map_image_url(m.image_filename)
+
+def _map_variants(m: Map) -> dict:
+    # WebP-варианты thumb/medium/full (пока не готовы — ссылка на оригинал)
+    return variant_urls(m.image_filename)
+
+def _image_payload(filename: str) -> dict:
+    width, height = image_size(filename) or (None, None)
+    return {
+        "filename": filename,
+        "url": map_image_url(filename),
+        "width": width,
+        "height": height,
+        "variants": variant_urls(filename)
+    }
+
+MAP_LIST_FIELDS = {
+    **column_fields(Map, "id", "name"),
+    "image_url": ((Map.image_filename,), _map_url),
+    "image_variants": ((Map.image_filename,), _map_variants),
+    "width": ((Map.image_width,), lambda m: m.image_width),
+    "height": ((Map.image_height,), lambda m: m.image_height),
+}
 
 # ========== MAP ROUTES ==========
 
 @maps_bp.route("/maps", methods=["GET"])
+@cached(lambda: ["maps"])
 def get_maps():
     """
-    Get maps list
+    Get maps list (keyset-paginated)
     ---
     tags:
       - Maps
+    parameters:
+      - {name: limit, in: query, type: integer, description: "Page size (default 100, max 500)"}
+      - {name: cursor, in: query, type: string, description: "Value of X-Next-Cursor from the previous page"}
+      - {name: since, in: query, type: integer, description: "Id of the last row already received (instead of cursor); a page shorter than limit is the last one"}
+      - {name: fields, in: query, type: string, description: "Comma-separated subset of fields (id is always included)"}
     responses:
       200:
         description: List of maps
@@ -39,20 +74,28 @@ def get_maps():
               id: {type: integer}
               name: {type: string}
               image_url: {type: string}
+              image_variants:
+                type: object
+                properties:
+                  thumb: {type: string}
+                  medium: {type: string}
+                  full: {type: string}
+              width: {type: integer}
+              height: {type: integer}
+      400:
+        description: Invalid limit, cursor or fields
     """
-    maps = Map.query.all()
-    return jsonify([{
-        "id": m.id,
-        "name": m.name,
-        "image_url": _map_url(m)
-    } for m in maps]), 200
+    return keyset_page(Map, MAP_LIST_FIELDS)
 
 
 @maps_bp.route("/maps/upload", methods=["POST"])
-@jwt_required()
+@admin_required
 def upload_map_image():
     """
     Upload map image (PNG/JPG/WEBP). Admin only.
+    Files are stored under the sha256 of their content, so re-uploading the same
+    image returns the same filename. WebP variants (thumb/medium/full) are generated
+    in the background; until a variant is ready its URL points to the original.
     ---
     tags:
       - Maps
@@ -65,7 +108,7 @@ def upload_map_image():
         name: file
         type: file
         required: true
-        description: Image file (png/jpg/jpeg/webp), up to 5MB
+        description: Image file (png/jpg/jpeg/webp), up to 5MB (larger files go through /maps/uploads)
     responses:
       201:
         description: Uploaded successfully
@@ -74,33 +117,289 @@ def upload_map_image():
           properties:
             filename: {type: string}
             url: {type: string}
+            width: {type: integer}
+            height: {type: integer}
+            variants:
+              type: object
+              properties:
+                thumb: {type: string}
+                medium: {type: string}
+                full: {type: string}
       400:
-        description: No file / invalid type
+        description: No file / invalid type / not an image
       403:
         description: Admin access required
     """
-    user = User.query.get(get_jwt_identity())
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     f = request.files.get("file")
     if not f or not f.filename:
         return jsonify({"error": "No file"}), 400
     if not _allowed(f.filename):
         return jsonify({"error": "Invalid file type"}), 400
 
-    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-    filename = f"{uuid4().hex}_{secure_filename(f.filename)}"
-    f.save(UPLOAD_DIR / filename)
+    # пишем потоком, считая sha256; одинаковые байты ложатся в один файл
+    stored = store_upload(f.stream, f.filename.rsplit(".", 1)[1].lower())
+    if not stored:
+        return jsonify({"error": "File is not a valid image"}), 400
+    filename, created = stored
+    register_image(filename)
+    db.session.commit()
+
+    if created:
+        schedule_variants(filename)
+    return jsonify(_image_payload(filename)), 201
 
-    return jsonify({
-        "filename": filename,
-        "url": url_for("static", filename=f"maps/{filename}", _external=True)
-    }), 201
+
+# ========== CHUNKED (RESUMABLE) UPLOADS ==========
+
+def _upload_error(e: UploadError):
+    return jsonify({"error": e.message, **e.extra}), e.status
+
+
+@maps_bp.route("/maps/uploads", methods=["POST"])
+@admin_required
+def start_map_upload():
+    """
+    Start a resumable chunked upload of a map image (Admin only).
+    Use it for files that don't fit into a single /maps/upload request: send the
+    file with PUT /maps/uploads/{upload_id}?offset=N in chunks of at most chunk_size
+    bytes, then call POST /maps/uploads/{upload_id}/finalize.
+    ---
+    tags:
+      - Maps
+    security:
+      - BearerAuth: []
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required: [filename, size]
+          properties:
+            filename: {type: string, description: "Original file name, used for the extension (png/jpg/jpeg/webp)"}
+            size: {type: integer, description: "Total file size in bytes"}
+            sha256: {type: string, description: "Optional hex sha256 of the whole file, verified on finalize"}
+    responses:
+      201:
+        description: Upload started
+        schema:
+          type: object
+          properties:
+            upload_id: {type: string}
+            size: {type: integer}
+            offset: {type: integer}
+            complete: {type: boolean}
+            chunk_size: {type: integer}
+      400:
+        description: Invalid type / size / checksum
+      403:
+        description: Admin access required
+      413:
+        description: File is too large
+    """
+    data = request.get_json() or {}
+    filename = data.get("filename") or ""
+    if not _allowed(filename):
+        return jsonify({"error": "Invalid file type"}), 400
+
+    try:
+        upload = start_upload(
+            filename.rsplit(".", 1)[1].lower(), data.get("size"), data.get("sha256"),
+            created_by=current_identity().id,
+        )
+    except UploadError as e:
+        return _upload_error(e)
+    db.session.commit()
+    return jsonify(upload_state(upload)), 201
+
+
+@maps_bp.route("/maps/uploads/<upload_id>", methods=["GET"])
+@admin_required
+def get_map_upload(upload_id):
+    """
+    Get chunked upload progress (Admin only). After a dropped connection resume from "offset".
+    ---
+    tags:
+      - Maps
+    security:
+      - BearerAuth: []
+    parameters:
+      - {name: upload_id, in: path, type: string, required: true}
+    responses:
+      200:
+        description: Upload state (same shape as POST /maps/uploads)
+      403:
+        description: Admin access required
+      404:
+        description: Upload not found
+      410:
+        description: Upload expired and was cleaned up
+    """
+    try:
+        upload = get_upload(upload_id)
+    except UploadError as e:
+        return _upload_error(e)
+    return jsonify(upload_state(upload)), 200
+
+
+@maps_bp.route("/maps/uploads/<upload_id>", methods=["PUT"])
+@admin_required
+def put_map_upload_chunk(upload_id):
+    """
+    Append a chunk to a chunked upload (Admin only).
+    The request body is the raw chunk; it is written straight to disk.
+    ---
+    tags:
+      - Maps
+    security:
+      - BearerAuth: []
+    consumes:
+      - application/octet-stream
+    parameters:
+      - {name: upload_id, in: path, type: string, required: true}
+      - {name: offset, in: query, type: integer, required: true, description: "Byte offset of the chunk; must equal the current upload offset"}
+      - {name: X-Chunk-Sha256, in: header, type: string, description: "Optional hex sha256 of the chunk"}
+      - {name: body, in: body, required: true, schema: {type: string, format: binary}}
+    responses:
+      200:
+        description: Chunk accepted, returns the new upload state
+      400:
+        description: Invalid offset / chunk checksum mismatch / incomplete chunk
+      403:
+        description: Admin access required
+      404:
+        description: Upload not found
+      409:
+        description: Offset does not match; the body contains the current "offset"
+      410:
+        description: Upload expired and was cleaned up
+      411:
+        description: Content-Length is required
+      413:
+        description: Chunk is too large
+      416:
+        description: Chunk goes past the declared file size
+    """
+    offset = request.args.get("offset", type=int)
+    if offset is None or offset < 0:
+        return jsonify({"error": "offset query parameter is required"}), 400
+
+    try:
+        upload = get_upload(upload_id, lock=True)
+        append_chunk(
+            upload, offset, request.stream, request.content_length,
+            request.headers.get("X-Chunk-Sha256"),
+        )
+    except UploadError as e:
+        db.session.rollback()
+        return _upload_error(e)
+    db.session.commit()
+    return jsonify(upload_state(upload)), 200
+
+
+@maps_bp.route("/maps/uploads/<upload_id>", methods=["DELETE"])
+@admin_required
+def abort_map_upload(upload_id):
+    """
+    Cancel a chunked upload and remove its partial file (Admin only)
+    ---
+    tags:
+      - Maps
+    security:
+      - BearerAuth: []
+    parameters:
+      - {name: upload_id, in: path, type: string, required: true}
+    responses:
+      200:
+        description: Upload cancelled
+      403:
+        description: Admin access required
+      404:
+        description: Upload not found
+    """
+    try:
+        upload = get_upload(upload_id, lock=True)
+    except UploadError as e:
+        return _upload_error(e)
+    abort_upload(upload)
+    return jsonify({"message": "Upload cancelled"}), 200
+
+
+@maps_bp.route("/maps/uploads/<upload_id>/finalize", methods=["POST"])
+@admin_required
+def finalize_map_upload(upload_id):
+    """
+    Finish a chunked upload (Admin only).
+    Verifies the size and the sha256 (if given on start), stores the file like
+    /maps/upload does and, optionally, hands it to the map flow: with "map_id"
+    the map's image is replaced (as PATCH /maps/{id}), with only "name" a new
+    map is created (as POST /maps). Without either the file is just stored and
+    its filename can be passed to those endpoints later.
+    ---
+    tags:
+      - Maps
+    security:
+      - BearerAuth: []
+    consumes:
+      - application/json
+    parameters:
+      - {name: upload_id, in: path, type: string, required: true}
+      - in: body
+        name: body
+        schema:
+          type: object
+          properties:
+            name: {type: string, description: "Name of the new map, or a new name for map_id"}
+            map_id: {type: integer, description: "Replace the image of this map"}
+            delete_old_file: {type: boolean, default: false, description: "With map_id: delete the previous image if no other map uses it"}
+    responses:
+      201:
+        description: |
+          File stored (same fields as /maps/upload); with "name" also the created map
+          ("message", "id")
+      200:
+        description: File stored and the map from map_id updated
+      400:
+        description: Checksum mismatch / not an image / map flow rejected the data (the file stays stored, see "filename")
+      403:
+        description: Admin access required
+      404:
+        description: Upload or map not found
+      409:
+        description: Upload is incomplete; the body contains the current "offset"
+      410:
+        description: Upload expired and was cleaned up
+    """
+    data = request.get_json(silent=True) or {}
+    m = None
+    if data.get("map_id") is not None:
+        m = Map.query.get(data["map_id"])
+        if not m:
+            return jsonify({"error": "Map not found"}), 404
+
+    try:
+        upload = get_upload(upload_id, lock=True)
+        filename, created = finish_upload(upload)
+    except UploadError as e:
+        return _upload_error(e)
+    db.session.commit()
+    if created:
+        schedule_variants(filename)
+
+    payload, status = _image_payload(filename), 201
+    if m is not None:
+        body, status = _update_map(m, {**data, "image_filename": filename})
+        payload.update(body)
+    elif data.get("name"):
+        body, status = _create_map(data["name"], filename)
+        payload.update(body)
+    return jsonify(payload), status
 
 
 @maps_bp.route("/maps", methods=["POST"])
-@jwt_required()
+@admin_required
 def create_map():
     """
     Create a map (Admin only)
@@ -133,31 +432,33 @@ def create_map():
       403:
         description: Admin access required
     """
-    user = User.query.get(get_jwt_identity())
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     data = request.get_json() or {}
-    name = data.get("name")
-    image_filename = data.get("image_filename")
+    body, status = _create_map(data.get("name"), data.get("image_filename"))
+    return jsonify(body), status
 
+
+def _create_map(name, image_filename):
+    # общий путь для POST /maps и finalize загрузки по кускам
     if not name or not image_filename:
-        return jsonify({"error": "name and image_filename are required"}), 400
+        return {"error": "name and image_filename are required"}, 400
 
     if not (UPLOAD_DIR / image_filename).exists():
-        return jsonify({"error": "Uploaded file not found on server"}), 400
+        return {"error": "Uploaded file not found on server"}, 400
 
     if Map.query.filter_by(name=name).first():
-        return jsonify({"error": "Map with this name already exists"}), 400
+        return {"error": "Map with this name already exists"}, 400
 
-    m = Map(name=name, image_filename=image_filename)
+    width, height = image_size(image_filename) or (None, None)
+    m = Map(name=name, image_filename=image_filename, image_width=width, image_height=height)
     db.session.add(m)
+    acquire_image(image_filename)
+    invalidate_on_commit("maps")
     db.session.commit()
-    return jsonify({"message": "Map created", "id": m.id}), 201
+    return {"message": "Map created", "id": m.id}, 201
 
 
 @maps_bp.route("/maps/<int:map_id>", methods=["PATCH"])
-@jwt_required()
+@admin_required
 def update_map(map_id):
     """
     Update map (rename and/or change image). Admin only.
@@ -181,7 +482,7 @@ def update_map(map_id):
           properties:
             name: {type: string}
             image_filename: {type: string, description: "New filename from /maps/upload"}
-            delete_old_file: {type: boolean, description: "Delete previous image if unused", default: false}
+            delete_old_file: {type: boolean, description: "Delete previous image if no other map uses it", default: false}
     responses:
       200:
         description: Map updated
@@ -192,15 +493,16 @@ def update_map(map_id):
       404:
         description: Map not found
     """
-    user = User.query.get(get_jwt_identity())
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     m = Map.query.get(map_id)
     if not m:
         return jsonify({"error": "Map not found"}), 404
 
-    data = request.get_json() or {}
+    body, status = _update_map(m, request.get_json() or {})
+    return jsonify(body), status
+
+
+def _update_map(m, data):
+    # общий путь для PATCH /maps/<id> и finalize загрузки по кускам
     new_name = data.get("name")
     new_filename = data.get("image_filename")
     delete_old = bool(data.get("delete_old_file"))
@@ -210,27 +512,32 @@ def update_map(map_id):
     if new_name is not None:
         m.name = new_name
 
-    if new_filename:
+    old_unused = False
+    if new_filename and new_filename != old_filename:
         if not (UPLOAD_DIR / new_filename).exists():
-            return jsonify({"error": "Uploaded file not found on server"}), 400
+            return {"error": "Uploaded file not found on server"}, 400
         m.image_filename = new_filename
+        m.image_width, m.image_height = image_size(new_filename) or (None, None)
+        acquire_image(new_filename)
+        old_unused = release_image(old_filename)
 
+    invalidate_on_commit(f"map:{m.id}", "maps")
     db.session.commit()
+    invalidate_map_templates(m.id)
 
     # при желании удалим старый файл, если он больше не используется никакой картой
-    if new_filename and delete_old:
-        still_used = Map.query.filter_by(image_filename=old_filename).first()
-        if not still_used:
-            try:
-                (UPLOAD_DIR / old_filename).unlink(missing_ok=True)
-            except Exception:
-                pass
+    if old_unused and delete_old:
+        try:
+            delete_image(old_filename)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
 
-    return jsonify({"message": "Map updated"}), 200
+    return {"message": "Map updated"}, 200
 
 
 @maps_bp.route("/maps/<int:map_id>", methods=["DELETE"])
-@jwt_required()
+@admin_required
 def delete_map(map_id):
     """
     Delete a map (Admin only)
@@ -252,29 +559,29 @@ def delete_map(map_id):
       404:
         description: Map not found
     """
-    user = User.query.get(get_jwt_identity())
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     m = Map.query.get_or_404(map_id)
     filename = m.image_filename
 
     db.session.delete(m)
+    unused = release_image(filename)
+    invalidate_on_commit(f"map:{map_id}", "maps")
     db.session.commit()
+    invalidate_map_templates(map_id)
 
     # удаляем физический файл, если он больше не используется
-    still = Map.query.filter_by(image_filename=filename).first()
-    if not still:
+    if unused:
         try:
-            (UPLOAD_DIR / filename).unlink(missing_ok=True)
+            delete_image(filename)
+            db.session.commit()
         except Exception:
-            pass
+            db.session.rollback()
 
     return jsonify({"message": "Map deleted"}), 200
 
 # ========== DROPZONE TEMPLATE ROUTES ==========
 
 @maps_bp.route("/maps/<int:map_id>/dropzones", methods=["GET"])
+@cached(lambda map_id: [f"map:{map_id}"])
 def get_dropzones(map_id):
     """
     Get dropzone templates for a map
@@ -301,19 +608,112 @@ def get_dropzones(map_id):
               radius: {type: number}
               capacity: {type: integer}
     """
-    zones = DropzoneTemplate.query.filter_by(map_id=map_id).all()
+    return jsonify(list(map_templates(map_id))), 200
+
+
+@maps_bp.route("/maps/<int:map_id>/dropzones/overlaps", methods=["GET"])
+def get_dropzone_overlaps(map_id):
+    """
+    Report overlapping and near-duplicate dropzone templates of a map
+    ---
+    tags:
+      - Drop Zones (Templates)
+    parameters:
+      - name: map_id
+        in: path
+        type: integer
+        required: true
+      - name: margin
+        in: query
+        type: number
+        description: Extra clearance between circles (also report zones closer than this)
+    responses:
+      200:
+        description: Overlapping pairs
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              a: {type: object}
+              b: {type: object}
+              distance: {type: number}
+              overlap: {type: number}
+              near_duplicate: {type: boolean}
+      400:
+        description: Invalid margin
+      404:
+        description: Map not found
+    """
+    margin = request.args.get("margin", 0, type=float)
+    if margin < 0:
+        return jsonify({"error": "margin must be non-negative"}), 400
+
+    index = map_index(map_id)
+    if index is None:
+        return jsonify({"error": "Map not found"}), 404
+
+    result = []
+    for a, b, distance in index.overlaps(margin):
+        pair = serialize_overlap(b, distance, a.radius)
+        result.append({
+            "a": {"id": a.id, "name": a.name},
+            "b": {"id": b.id, "name": b.name},
+            "distance": pair["distance"],
+            "overlap": pair["overlap"],
+            "near_duplicate": pair["near_duplicate"]
+        })
+    return jsonify(result), 200
+
+
+@maps_bp.route("/maps/<int:map_id>/dropzones/at", methods=["GET"])
+def get_dropzones_at_point(map_id):
+    """
+    Hit-test: dropzone templates containing a point (closest centre first)
+    ---
+    tags:
+      - Drop Zones (Templates)
+    parameters:
+      - name: map_id
+        in: path
+        type: integer
+        required: true
+      - {name: x, in: query, type: number, required: true, description: "x_percent"}
+      - {name: y, in: query, type: number, required: true, description: "y_percent"}
+    responses:
+      200:
+        description: Zones containing the point
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              id: {type: integer}
+              name: {type: string}
+              distance: {type: number}
+      400:
+        description: x and y are required
+      404:
+        description: Map not found
+    """
+    x = request.args.get("x", type=float)
+    y = request.args.get("y", type=float)
+    if x is None or y is None:
+        return jsonify({"error": "x and y are required"}), 400
+
+    index = map_index(map_id)
+    if index is None:
+        return jsonify({"error": "Map not found"}), 404
+
     return jsonify([{
         "id": z.id,
         "name": z.name,
-        "x_percent": z.x_percent,
-        "y_percent": z.y_percent,
-        "radius": z.radius,
-        "capacity": z.capacity
-    } for z in zones]), 200
+        "distance": round(d, 3)
+    } for z, d in index.at(x, y)]), 200
 
 
 @maps_bp.route("/maps/<int:map_id>/dropzones", methods=["POST"])
-@jwt_required()
+@admin_required
 def create_dropzone(map_id):
     """
     Create a dropzone template for a map (Admin only)
@@ -340,16 +740,29 @@ def create_dropzone(map_id):
             capacity: {type: integer}
     responses:
       201:
-        description: Dropzone created
+        description: Dropzone created; `overlaps` lists existing zones it intersects (not an error)
+        schema:
+          type: object
+          properties:
+            message: {type: string}
+            id: {type: integer}
+            overlaps:
+              type: array
+              items:
+                type: object
+                properties:
+                  id: {type: integer}
+                  name: {type: string}
+                  distance: {type: number}
+                  overlap: {type: number}
+                  near_duplicate: {type: boolean}
       400:
         description: Invalid fields
       403:
         description: Admin access required
+      404:
+        description: Map not found
     """
-    user = User.query.get(get_jwt_identity())
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     data = request.get_json() or {}
     name = data.get("name")
     x_percent = data.get("x_percent")
@@ -363,6 +776,14 @@ def create_dropzone(map_id):
     if not (0 <= x_percent <= 100 and 0 <= y_percent <= 100):
         return jsonify({"error": "x_percent and y_percent must be between 0 and 100"}), 400
 
+    if not isinstance(radius, (int, float)) or radius <= 0:
+        return jsonify({"error": "radius must be a positive number"}), 400
+
+    index = map_index(map_id)
+    if index is None:
+        return jsonify({"error": "Map not found"}), 404
+    overlaps = [serialize_overlap(z, d, radius) for z, d in index.near(x_percent, y_percent, radius)]
+
     dropzone = DropzoneTemplate(
         map_id=map_id,
         name=name,
@@ -372,12 +793,14 @@ def create_dropzone(map_id):
         capacity=capacity
     )
     db.session.add(dropzone)
+    bump_map_dropzones(map_id)
     db.session.commit()
-    return jsonify({"message": "Dropzone created", "id": dropzone.id}), 201
+    invalidate_map_templates(map_id)
+    return jsonify({"message": "Dropzone created", "id": dropzone.id, "overlaps": overlaps}), 201
 
 
 @maps_bp.route("/dropzones/<int:dropzone_id>", methods=["DELETE"])
-@jwt_required()
+@admin_required
 def delete_dropzone(dropzone_id):
     """
     Delete a dropzone template (Admin only)
@@ -399,11 +822,9 @@ def delete_dropzone(dropzone_id):
       404:
         description: Dropzone not found
     """
-    user = User.query.get(get_jwt_identity())
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     z = DropzoneTemplate.query.get_or_404(dropzone_id)
     db.session.delete(z)
+    bump_map_dropzones(z.map_id)
     db.session.commit()
+    invalidate_map_templates(z.map_id)
     return jsonify({"message": "Dropzone deleted"}), 200
@@ -0,0 +1,79 @@
+# routes/static_maps.py
+# Раздача картинок карт из static/maps: имена уникальны (sha256 содержимого), поэтому
+# ответы кэшируются навсегда (immutable). ETag, If-None-Match и Range делает send_file,
+# при USE_X_SENDFILE тело отдаёт фронтовой сервер.
+import mimetypes
+
+from flask import Blueprint, request, send_from_directory
+
+from config import UPLOAD_DIR, MAP_IMAGE_MAX_AGE
+from services.images import variant_filename
+
+static_maps_bp = Blueprint("static_maps", __name__)
+
+# заранее сжатые копии рядом с файлом: <имя>.br / <имя>.gz
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+WEBP_NEGOTIABLE = {"png", "jpg", "jpeg"}
+
+
+def _accepts_webp():
+    # только явный image/webp, а не */*
+    return "image/webp" in request.accept_mimetypes.values()
+
+
+@static_maps_bp.route("/static/maps/<path:filename>", methods=["GET", "HEAD"])
+def map_image(filename):
+    """
+    Map image file (long-lived immutable cache)
+    PNG/JPG originals are swapped for their WebP `full` variant when the client
+    accepts image/webp; `.br` / `.gz` siblings are served when accepted.
+    ---
+    tags:
+      - Maps
+    parameters:
+      - name: filename
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Image bytes
+      206:
+        description: Partial content (Range)
+      304:
+        description: Not modified
+      404:
+        description: File not found
+    """
+    directory = UPLOAD_DIR.resolve()
+    name = filename
+    vary = []
+
+    ext = filename.rsplit(".", 1)[-1].lower()
+    if "/" not in filename and ext in WEBP_NEGOTIABLE:
+        vary.append("Accept")
+        webp = variant_filename(filename, "full")
+        if _accepts_webp() and (directory / webp).is_file():
+            name = webp
+
+    encoding, served = None, name
+    vary.append("Accept-Encoding")
+    for candidate, suffix in PRECOMPRESSED:
+        if candidate in request.accept_encodings and (directory / (name + suffix)).is_file():
+            encoding, served = candidate, name + suffix
+            break
+
+    resp = send_from_directory(
+        directory,
+        served,
+        mimetype=mimetypes.guess_type(name)[0],
+        max_age=MAP_IMAGE_MAX_AGE,
+        conditional=True,
+        etag=True,
+    )
+    if encoding:
+        resp.headers["Content-Encoding"] = encoding
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    resp.vary.update(vary)
+    return resp
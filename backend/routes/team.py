@@ -1,7 +1,13 @@
+import csv
+import io
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
 from app import db
-from models import Lobby, Team, Player, User
+from models import Lobby, Team, Player
+from services.identity import admin_required
+from services.versioning import bump_lobby_results, bump_lobby_boards
+from services.teams import invalidate_lobby_teams, register_teams, MAX_IMPORT_TEAMS, TEAM_SIZE
 
 team_bp = Blueprint('team', __name__)
 
@@ -61,51 +67,148 @@ def register_team(lobby_id):
     if not name or any(p is None for p in players):
         return jsonify({"error": "Team name and 3 player nicknames required"}), 400
 
-    existing_team = Team.query.filter_by(name=name, lobby_id=lobby.id).first()
-    if existing_team:
+    # все ники, занятые игроки и название проверяются разом; команда и игроки — один commit
+    teams, errors = register_teams(lobby.id, [(name, players)])
+    if errors:
+        return jsonify({"error": errors[0].message}), errors[0].status
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
         return jsonify({"error": "Team with this name already registered in this lobby"}), 409
+    invalidate_lobby_teams(lobby.id)
 
-    for username in players:
-        user = User.query.filter_by(username=username).first()
-        if not user:
-            return jsonify({"error": f"User '{username}' is not registered"}), 400
-
-    # Проверяем, не участвует ли игрок уже в команде в этом же лобби
-    for username in players:
-        # Находим все команды в этом лобби
-        teams_in_lobby = Team.query.filter_by(lobby_id=lobby.id).all()
-        team_ids_in_lobby = [team.id for team in teams_in_lobby]
-        
-        # Проверяем, есть ли игрок в какой-либо команде этого лобби
-        if team_ids_in_lobby:
-            existing_player_in_lobby = Player.query.filter(
-                Player.username == username,
-                Player.team_id.in_(team_ids_in_lobby)
-            ).first()
-            if existing_player_in_lobby:
-                return jsonify({"error": f"Player '{username}' is already registered in a team in this lobby"}), 409
-
-    new_team = Team(name=name, lobby_id=lobby.id)
-    db.session.add(new_team)
-    db.session.commit()
+    return jsonify({
+        "message": "Team registered successfully",
+        "team": teams[0]
+    }), 201
 
-    for username in players:
-        new_player = Player(username=username, team_id=new_team.id)
-        db.session.add(new_player)
 
-    db.session.commit()
+# ✅ Bulk roster import (admin)
+@team_bp.route('/lobbies/<int:lobby_id>/teams/import', methods=['POST'])
+@admin_required
+def import_teams(lobby_id):
+    """
+    Register many teams at once from JSON or CSV (Admin only)
+    All teams are validated together and registered in one transaction:
+    if any entry is invalid nothing is registered and every problem is reported.
+    ---
+    tags:
+      - Teams
+    security:
+      - BearerAuth: []
+    consumes:
+      - application/json
+      - text/csv
+      - multipart/form-data
+    parameters:
+      - name: lobby_id
+        in: path
+        type: integer
+        required: true
+      - in: body
+        name: body
+        description: |
+          JSON: {"teams": [{"name": "MyTeam", "players": ["a", "b", "c"]}, ...]}
+          (player1..player3 keys are accepted too). CSV (text/csv body or a "file"
+          upload): one team per line — name,player1,player2,player3; an optional
+          header line starting with "team" or "name" is skipped.
+        schema:
+          type: object
+          properties:
+            teams:
+              type: array
+              items:
+                type: object
+                properties:
+                  name: {type: string}
+                  players: {type: array, items: {type: string}}
+    responses:
+      201:
+        description: Teams registered
+        schema:
+          type: object
+          properties:
+            message: {type: string}
+            teams:
+              type: array
+              items:
+                type: object
+                properties:
+                  id: {type: integer}
+                  name: {type: string}
+                  lobby_id: {type: integer}
+                  players: {type: array, items: {type: string}}
+      400:
+        description: Malformed body or invalid entries (see "errors"); nothing registered
+      403:
+        description: Admin access required
+      404:
+        description: Lobby not found
+      409:
+        description: Team names or players already taken (see "errors"); nothing registered
+    """
+    lobby = Lobby.query.get(lobby_id)
+    if not lobby:
+        return jsonify({"error": "Lobby not found"}), 404
+
+    rosters = _parse_rosters()
+    if rosters is None:
+        return jsonify({"error": "Expected JSON {\"teams\": [...]} or CSV name,player1,player2,player3"}), 400
+    if not rosters:
+        return jsonify({"error": "No teams to import"}), 400
+    if len(rosters) > MAX_IMPORT_TEAMS:
+        return jsonify({"error": f"Too many teams (max {MAX_IMPORT_TEAMS} per import)"}), 400
+
+    teams, errors = register_teams(lobby.id, rosters)
+    if errors:
+        return jsonify({
+            "error": "Import rejected, no teams were registered",
+            "errors": [{"index": e.index, "team": e.team, "error": e.message} for e in errors]
+        }), 409 if all(e.status == 409 for e in errors) else 400
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "A team with one of these names was registered concurrently, retry"}), 409
+    invalidate_lobby_teams(lobby.id)
 
     return jsonify({
-        "message": "Team registered successfully",
-        "team": {
-            "id": new_team.id,
-            "name": new_team.name,
-            "lobby_id": new_team.lobby_id,
-            "players": players
-        }
+        "message": f"{len(teams)} teams registered",
+        "teams": teams
     }), 201
 
 
+def _parse_rosters():
+    # [(name, [username, ...]), ...] из JSON / CSV-тела / загруженного CSV-файла; None — не разобрали
+    upload = request.files.get('file')
+    if upload:
+        return _csv_rosters(upload.stream.read().decode('utf-8-sig', errors='replace'))
+    if request.mimetype in ('text/csv', 'text/plain'):
+        return _csv_rosters(request.get_data(as_text=True))
+
+    data = request.get_json(silent=True)
+    entries = data.get('teams') if isinstance(data, dict) else data
+    if not isinstance(entries, list) or not all(isinstance(e, dict) for e in entries):
+        return None
+    return [(
+        e.get('name'),
+        e['players'] if 'players' in e else [e.get(f'player{k}') for k in range(1, TEAM_SIZE + 1)]
+    ) for e in entries]
+
+
+def _csv_rosters(text):
+    rosters = []
+    for row in csv.reader(io.StringIO(text.lstrip('\ufeff'))):
+        cells = [c.strip() for c in row]
+        if not any(cells):
+            continue
+        if not rosters and cells[0].lower() in ('team', 'name', 'team_name'):
+            continue  # заголовок
+        rosters.append((cells[0], [c for c in cells[1:] if c]))
+    return rosters
+
+
 # ✅ List all teams in lobby
 @team_bp.route('/lobbies/<int:lobby_id>/teams', methods=['GET'])
 def get_teams_for_lobby(lobby_id):
@@ -145,7 +248,7 @@ def get_teams_for_lobby(lobby_id):
 
 # ✅ Delete team (admin)
 @team_bp.route('/lobbies/<int:lobby_id>/teams/<int:team_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_team(lobby_id, team_id):
     """
     Delete a team from a lobby (Admin only)
@@ -171,12 +274,6 @@ def delete_team(lobby_id, team_id):
       404:
         description: Lobby or Team not found
     """
-    user_id = int(get_jwt_identity())
-    user = User.query.get(user_id)
-
-    if not user or not user.is_admin:
-        return jsonify({"error": "Admin access required"}), 403
-
     lobby = Lobby.query.get(lobby_id)
     if not lobby:
         return jsonify({"error": "Lobby not found"}), 404
@@ -187,6 +284,10 @@ def delete_team(lobby_id, team_id):
 
     Player.query.filter_by(team_id=team.id).delete()
     db.session.delete(team)
+    # вместе с командой уходят её результаты и назначения дропзон
+    bump_lobby_results(lobby.id)
+    bump_lobby_boards(lobby.id)
     db.session.commit()
+    invalidate_lobby_teams(lobby.id)
 
     return jsonify({"message": "Team deleted successfully"}), 200
@@ -0,0 +1,110 @@
+# scripts/check_query_plans.py
+# Проверка, что горячие запросы из routes/ и services/ идут по индексам: схема
+# поднимается миграциями во временной SQLite, для каждого запроса снимается
+# EXPLAIN QUERY PLAN, и любой полный проход по таблице (SCAN <table>) — ошибка.
+#
+#   cd backend && python scripts/check_query_plans.py [-v]
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+os.chdir(BACKEND_DIR)
+
+_db_dir = tempfile.mkdtemp(prefix="query-plans-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_db_dir, "plans.sqlite3")
+
+from flask_migrate import upgrade  # noqa: E402
+from sqlalchemy import func, select  # noqa: E402
+
+from app import app, db  # noqa: E402
+from models import (  # noqa: E402
+    User, Lobby, Map, MapImage, Game, Team, Player, Result, LobbyStanding,
+    DropzoneTemplate, DropzoneAssignment, DropzonePreference,
+)
+
+# «SCAN player», «SCAN TABLE player» (старые SQLite), «SCAN player USING COVERING INDEX …»
+_SCAN_RE = re.compile(r"^SCAN (?:TABLE )?(\w+)")
+
+
+def hot_queries():
+    """(описание, запрос) — формы запросов, которые выполняются на каждом обращении к API."""
+    return [
+        ("login: user by username", select(User).where(User.username == "u")),
+        ("lobby by code", select(Lobby).where(Lobby.code == "ABCDEFGH")),
+        ("teams of lobby", select(Team).where(Team.lobby_id == 1)),
+        ("team by name in lobby", select(Team).where(Team.lobby_id == 1, Team.name == "t")),
+        ("games of lobby", select(Game).where(Game.lobby_id == 1).order_by(Game.number)),
+        ("games on map", select(Game.id).where(Game.map_id == 1)),
+        ("players of team", select(Player).where(Player.team_id == 1)),
+        ("teams of user in lobby", select(Player.team_id)
+            .join(Team, Team.id == Player.team_id)
+            .where(Player.user_id == 1, Team.lobby_id == 1)),
+        ("player in team", select(Player).where(Player.user_id == 1, Player.team_id == 1)),
+        ("results of game", select(Result).where(Result.game_id == 1)),
+        ("results of team", select(Result).where(Result.team_id == 1)),
+        ("standings of lobby", select(LobbyStanding).where(LobbyStanding.lobby_id == 1)),
+        ("standings of team", select(LobbyStanding).where(LobbyStanding.team_id == 1)),
+        ("dropzones of map", select(DropzoneTemplate).where(DropzoneTemplate.map_id == 1)),
+        ("assignments of game", select(DropzoneAssignment).where(DropzoneAssignment.game_id == 1)),
+        ("assignment of team in game", select(DropzoneAssignment).where(
+            DropzoneAssignment.game_id == 1, DropzoneAssignment.team_id == 1)),
+        ("teams in dropzone (capacity)", select(func.count()).where(
+            DropzoneAssignment.game_id == 1, DropzoneAssignment.dropzone_id == 1)),
+        ("assignments of dropzone", select(DropzoneAssignment.id).where(DropzoneAssignment.dropzone_id == 1)),
+        ("assignments of team", select(DropzoneAssignment.id).where(DropzoneAssignment.team_id == 1)),
+        ("preferences of game", select(DropzonePreference).where(DropzonePreference.game_id == 1)),
+        ("preferences of team", select(DropzonePreference).where(DropzonePreference.team_id == 1)),
+        ("preferences for dropzone", select(DropzonePreference.rank).where(DropzonePreference.dropzone_id == 1)),
+        ("maps using image", select(Map.id).where(Map.image_filename == "f.png")),
+        ("image refcount", select(MapImage.ref_count).where(MapImage.filename == "f.png")),
+        ("game board", select(DropzoneAssignment.id, Team.name)
+            .outerjoin(Team, Team.id == DropzoneAssignment.team_id)
+            .where(DropzoneAssignment.game_id == 1)),
+        ("game assignments with map version", select(DropzoneAssignment.id, Map.dropzones_version)
+            .join(Game, Game.id == DropzoneAssignment.game_id)
+            .join(Map, Map.id == Game.map_id)
+            .where(DropzoneAssignment.game_id == 1)),
+        ("user stats", select(Team.id, Lobby.name, LobbyStanding.points_total)
+            .select_from(Player)
+            .join(Team, Team.id == Player.team_id)
+            .join(Lobby, Lobby.id == Team.lobby_id)
+            .outerjoin(LobbyStanding, (LobbyStanding.lobby_id == Team.lobby_id) & (LobbyStanding.team_id == Team.id))
+            .where(Player.user_id == 1)),
+    ]
+
+
+def explain(stmt):
+    sql = str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+    rows = db.session.execute(db.text("EXPLAIN QUERY PLAN " + sql)).all()
+    return [row[-1] for row in rows]  # (id, parent, notused, detail)
+
+
+def main(verbose=False):
+    tables = set(db.metadata.tables)
+    failures = 0
+    with app.app_context():
+        upgrade()
+        for label, stmt in hot_queries():
+            plan = explain(stmt)
+            scans = [d for d in plan if (m := _SCAN_RE.match(d)) and m.group(1) in tables]
+            if scans:
+                failures += 1
+            if scans or verbose:
+                print(f"{'FAIL' if scans else 'ok  '} {label}")
+                for detail in plan:
+                    print(f"       {detail}")
+        total = len(hot_queries())
+    print(f"{total - failures}/{total} queries use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    try:
+        code = main(verbose="-v" in sys.argv[1:])
+    finally:
+        shutil.rmtree(_db_dir, ignore_errors=True)
+    sys.exit(code)
@@ -62,7 +62,8 @@ def get_or_create_team(lobby_id, name, players_usernames):
         existing_players = {p.username for p in Player.query.filter_by(team_id=t.id).all()}
         for uname in players_usernames:
             if uname not in existing_players:
-                db.session.add(Player(username=uname, team_id=t.id))
+                u = User.query.filter_by(username=uname).first()
+                db.session.add(Player(username=uname, user_id=u.id if u else None, team_id=t.id))
         db.session.commit()
         return t
 
@@ -71,15 +72,17 @@ def get_or_create_team(lobby_id, name, players_usernames):
     db.session.commit()
 
     # Валидация как в API: игрок должен быть зарегистрирован как User
+    users = {}
     for uname in players_usernames:
         u = User.query.filter_by(username=uname).first()
         if not u:
             raise RuntimeError(f"User '{uname}' не найден – сначала создайте пользователя.")
+        users[uname] = u.id
 
     for uname in players_usernames:
         # уникальность по username уже enforced, поэтому проверим
-        if not Player.query.filter_by(username=uname).first():
-            db.session.add(Player(username=uname, team_id=t.id))
+        if not Player.query.filter_by(user_id=users[uname]).first():
+            db.session.add(Player(username=uname, user_id=users[uname], team_id=t.id))
     db.session.commit()
     return t
 
@@ -166,4 +169,9 @@ with app.app_context():
     set_result(g3.id, team_bravo.id, place=3, kills=5, points=12)
     set_result(g3.id, team_charl.id, place=1, kills=13, points=26)
 
+    # 8) Итоговая таблица лобби по внесённым результатам
+    from services.standings import rebuild_standings
+    rebuild_standings(lobby.id)
+    db.session.commit()
+
     print("===> Done.")
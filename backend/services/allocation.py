@@ -0,0 +1,161 @@
+# services/allocation.py
+# Автоматическая раздача дропзон на игру по пожеланиям команд (DropzonePreference).
+#   optimal  — минимальная сумма рангов (венгерский алгоритм по слотам вместимости);
+#   rotation — команды выбирают по очереди, первыми — худшие по месту в прошлой игре.
+from app import db
+from models import DropzoneTemplate, DropzoneAssignment, DropzonePreference, Team, Game, Result
+
+STRATEGIES = ("optimal", "rotation")
+
+
+def _min_cost_assignment(cost):
+    """Венгерский алгоритм (n строк <= m столбцов): столбец для каждой строки, O(n^2 * m)."""
+    n, m = len(cost), len(cost[0])
+    inf = float("inf")
+    u, v = [0] * (n + 1), [0] * (m + 1)
+    p, way = [0] * (m + 1), [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0, delta, j1 = p[j0], inf, 0
+            row = cost[i0 - 1]
+            for j in range(1, m + 1):
+                if not used[j]:
+                    cur = row[j - 1] - u[i0] - v[j]
+                    if cur < minv[j]:
+                        minv[j], way[j] = cur, j0
+                    if minv[j] < delta:
+                        delta, j1 = minv[j], j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    result = [None] * n
+    for j in range(1, m + 1):
+        if p[j]:
+            result[p[j] - 1] = j - 1
+    return result
+
+
+def _allocate_optimal(team_ids, slots, prefs):
+    # ранг 1 стоит 0; зона вне списка дороже любой из списка; остаться без зоны дороже всего,
+    # поэтому сначала раздаются все свободные слоты, а уже потом минимизируется сумма рангов
+    unranked = max((len(p) for p in prefs.values()), default=0)
+    unassigned = (unranked + 1) * (len(team_ids) + 1)
+    columns = slots + [None] * len(team_ids)
+    cost = [
+        [
+            unassigned if zone is None else prefs.get(team_id, {}).get(zone, unranked + 1) - 1
+            for zone in columns
+        ]
+        for team_id in team_ids
+    ]
+    picks = _min_cost_assignment(cost) if team_ids else []
+    return {team_id: columns[j] for team_id, j in zip(team_ids, picks)}
+
+
+def _rotation_order(game, team_ids):
+    """Худшее место в предыдущей игре лобби выбирает первым; без результата — в конце."""
+    previous = (
+        db.select(Game.id)
+        .where(Game.lobby_id == game.lobby_id, Game.number < game.number)
+        .order_by(Game.number.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+    places = dict(db.session.execute(
+        db.select(Result.team_id, Result.place)
+        .where(Result.game_id == previous, Result.place.isnot(None))
+    ).all())
+    return sorted(team_ids, key=lambda t: (t not in places, -places.get(t, 0), t))
+
+
+def _allocate_rotation(order, slots, prefs):
+    free = {}
+    for zone in slots:
+        free[zone] = free.get(zone, 0) + 1
+    picks = {}
+    for team_id in order:
+        ranked = sorted(prefs.get(team_id, {}), key=prefs[team_id].get) if team_id in prefs else []
+        zone = next((z for z in ranked if free.get(z)), None)
+        if zone is None:
+            zone = next((z for z in free if free[z]), None)
+        picks[team_id] = zone
+        if zone is not None:
+            free[zone] -= 1
+    return picks
+
+
+def allocate_dropzones(game, strategy="optimal", replace=False, created_by=None):
+    """
+    Раздать зоны всем командам лобби без назначения (replace=True — сначала снять все
+    назначения команд). Свободные слоты = capacity минус уже занятые строки зоны.
+    Все назначения пишутся одним executemany; коммитит вызывающий код.
+    Возвращает (assigned, unassigned): [{team_id, dropzone_id, rank}], [team_id].
+    """
+    if replace:
+        db.session.execute(
+            db.delete(DropzoneAssignment)
+            .where(DropzoneAssignment.game_id == game.id, DropzoneAssignment.team_id.isnot(None))
+        )
+
+    # блокируем шаблоны карты, как и при одиночном занятии зоны
+    capacities = db.session.execute(
+        db.select(DropzoneTemplate.id, DropzoneTemplate.capacity)
+        .where(DropzoneTemplate.map_id == game.map_id)
+        .order_by(DropzoneTemplate.id)
+        .with_for_update()
+    ).all()
+    taken = dict(db.session.execute(
+        db.select(DropzoneAssignment.dropzone_id, db.func.count(DropzoneAssignment.id))
+        .where(DropzoneAssignment.game_id == game.id)
+        .group_by(DropzoneAssignment.dropzone_id)
+    ).all())
+    slots = [zone for zone, capacity in capacities for _ in range(max(capacity - taken.get(zone, 0), 0))]
+
+    assigned_teams = db.select(DropzoneAssignment.team_id).where(
+        DropzoneAssignment.game_id == game.id, DropzoneAssignment.team_id.isnot(None)
+    )
+    team_ids = db.session.execute(
+        db.select(Team.id)
+        .where(Team.lobby_id == game.lobby_id, Team.id.not_in(assigned_teams))
+        .order_by(Team.id)
+    ).scalars().all()
+
+    prefs = {}
+    for team_id, zone, rank in db.session.execute(
+        db.select(DropzonePreference.team_id, DropzonePreference.dropzone_id, DropzonePreference.rank)
+        .where(DropzonePreference.game_id == game.id)
+    ):
+        prefs.setdefault(team_id, {})[zone] = rank
+
+    if strategy == "rotation":
+        picks = _allocate_rotation(_rotation_order(game, team_ids), slots, prefs)
+    else:
+        picks = _allocate_optimal(team_ids, slots, prefs)
+
+    assigned = [
+        {"team_id": team_id, "dropzone_id": zone, "rank": prefs.get(team_id, {}).get(zone)}
+        for team_id, zone in picks.items() if zone is not None
+    ]
+    unassigned = [team_id for team_id, zone in picks.items() if zone is None]
+    if assigned:
+        db.session.execute(db.insert(DropzoneAssignment), [
+            {"game_id": game.id, "dropzone_id": a["dropzone_id"], "team_id": a["team_id"],
+             "created_by": created_by}
+            for a in assigned
+        ])
+    return assigned, unassigned
@@ -0,0 +1,86 @@
+# services/board.py
+# Сборка доски дропзон: шаблоны карты из кэша (services.templates) + живые назначения
+# одним запросом, так что работа на запрос зависит только от числа назначений.
+from app import db
+from models import DropzoneAssignment, Team, Game, Map
+from services.templates import map_templates
+
+
+def build_game_board(game):
+    """
+    Все зоны карты игры с назначенными командами. game — Game или строка board_state()
+    (тогда версия шаблонов уже известна и лишней выборки нет).
+    """
+    templates = map_templates(game.map_id, getattr(game, "dropzones_version", None))
+    rows = (
+        db.session.query(
+            DropzoneAssignment.id,
+            DropzoneAssignment.dropzone_id,
+            DropzoneAssignment.team_id,
+            Team.name.label("team_name"),
+        )
+        .outerjoin(Team, Team.id == DropzoneAssignment.team_id)
+        .filter(DropzoneAssignment.game_id == game.id)
+        .order_by(DropzoneAssignment.id)
+        .all()
+    )
+
+    by_zone = {}
+    for r in rows:
+        by_zone.setdefault(r.dropzone_id, []).append({
+            "assignment_id": r.id,
+            "team_id": r.team_id,
+            "team_name": r.team_name,
+        })
+
+    out = []
+    for template in templates:
+        teams = by_zone.get(template["id"], [])  # список всех команд в этой зоне
+        out.append({
+            **template,
+            "teams": teams,
+            "current_teams": len(teams),
+            # для обратной совместимости
+            "assignment_id": teams[0]["assignment_id"] if teams else None,
+            "team_id": teams[0]["team_id"] if teams else None,
+            "team_name": teams[0]["team_name"] if teams else None,
+        })
+    return out
+
+
+def list_game_assignments(game_id):
+    """Плоский список назначений игры; данные шаблона подставляются из кэша карты."""
+    rows = (
+        db.session.query(
+            DropzoneAssignment.id,
+            DropzoneAssignment.team_id,
+            DropzoneAssignment.dropzone_id,
+            Game.map_id,
+            Map.dropzones_version,
+        )
+        .join(Game, Game.id == DropzoneAssignment.game_id)
+        .join(Map, Map.id == Game.map_id)
+        .filter(DropzoneAssignment.game_id == game_id)
+        .order_by(DropzoneAssignment.id)
+        .all()
+    )
+    if not rows:
+        return []
+
+    templates = {t["id"]: t for t in map_templates(rows[0].map_id, rows[0].dropzones_version)}
+    out = []
+    for r in rows:
+        template = templates.get(r.dropzone_id)
+        if template is None:  # шаблон другой карты (карту игры сменили)
+            continue
+        out.append({
+            "assignment_id": r.id,
+            "dropzone_id": r.dropzone_id,
+            "name": template["name"],
+            "x_percent": template["x_percent"],
+            "y_percent": template["y_percent"],
+            "radius": template["radius"],
+            "capacity": template["capacity"],
+            "team_id": r.team_id
+        })
+    return out
@@ -0,0 +1,86 @@
+# services/board_events.py
+# Простая in-process шина событий для доски дропзон: одна очередь на подписчика,
+# подписчики сгруппированы по game_id.
+import json
+import queue
+import threading
+
+HEARTBEAT_SECONDS = 15
+QUEUE_SIZE = 256
+
+_lock = threading.Lock()
+_subscribers = {}   # game_id -> set[Subscription]
+_sequence = {}      # game_id -> последний id события; живёт, пока у игры есть подписчики
+
+
+class Subscription:
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.queue = queue.Queue(maxsize=QUEUE_SIZE)
+        # выставляется, если клиент не успевает читать: поток закрывается,
+        # EventSource переподключается и получает свежий снапшот
+        self.dropped = False
+
+    def next(self, timeout=HEARTBEAT_SECONDS):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+def subscribe(game_id):
+    sub = Subscription(game_id)
+    with _lock:
+        _subscribers.setdefault(game_id, set()).add(sub)
+    return sub
+
+
+def unsubscribe(sub):
+    with _lock:
+        subs = _subscribers.get(sub.game_id)
+        if subs is not None:
+            subs.discard(sub)
+            if not subs:
+                del _subscribers[sub.game_id]
+                _sequence.pop(sub.game_id, None)
+
+
+def publish(game_id, event, payload):
+    """Отправить событие всем подписчикам игры (вызывать после commit)."""
+    with _lock:
+        subs = list(_subscribers.get(game_id, ()))
+        if not subs:
+            return
+        # новый поток всё равно начинается со снапшота, так что нумерация может начинаться заново
+        seq = _sequence.get(game_id, 0) + 1
+        _sequence[game_id] = seq
+    for sub in subs:
+        try:
+            sub.queue.put_nowait((seq, event, payload))
+        except queue.Full:
+            sub.dropped = True
+            unsubscribe(sub)
+
+
+def format_event(event, payload, event_id=None):
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(payload, ensure_ascii=False))
+    return "\n".join(lines) + "\n\n"
+
+
+def stream(sub, snapshot):
+    """Генератор SSE: сначала снапшот, затем дельты и keep-alive комментарии."""
+    try:
+        yield format_event("snapshot", snapshot)
+        while not sub.dropped:
+            item = sub.next()
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            seq, event, payload = item
+            yield format_event(event, payload, seq)
+    finally:
+        unsubscribe(sub)
@@ -0,0 +1,278 @@
+# services/cache.py
+# Кэш ответов публичных GET: ключ — хост + endpoint + аргументы пути + query-строка, у записи
+# есть теги (lobby:<id>, game:<id>, map:<id>, maps, announcements). Инвалидация — через
+# версии тегов: запись хранит версии своих тегов на момент сборки и при чтении сверяет
+# их с текущими, так что invalidate() — это INCR счётчика, без поиска записей.
+# Бэкенды: memory:// — LRU с TTL в процессе (по умолчанию; у каждого воркера свой кэш,
+# чужие инвалидации он видит только по истечении TTL), redis://… — общий для всех
+# воркеров gunicorn, local:// — тот же redis-бэкенд поверх LocalRedis в процессе (тесты).
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import g, request, current_app, make_response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import db
+from config import RESPONSE_CACHE_TTL, RESPONSE_CACHE_MAX_ENTRIES
+
+# заголовки, которые не переносятся из закэшированного ответа
+_SKIP_HEADERS = {"content-length", "set-cookie", "date"}
+
+
+class MemoryBackend:
+    """LRU на OrderedDict с TTL записей; версии тегов не вытесняются (иначе сбросятся в 0)."""
+
+    def __init__(self, max_entries=RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is None:
+                return None
+            if hit[1] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return hit[0]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def versions(self, tags):
+        with self._lock:
+            return [self._tags.get(t, 0) for t in tags]
+
+    def bump(self, tags):
+        with self._lock:
+            for t in tags:
+                self._tags[t] = self._tags.get(t, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+
+class RedisBackend:
+    """
+    Общий кэш на redis: записи — JSON со сроком EX, версии тегов — счётчики без срока.
+    Потерянный (вытесненный) счётчик заводится заново от time_ns, а не от 0, чтобы
+    старые записи с ним не совпали.
+    """
+
+    def __init__(self, client, prefix="apex:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+
+    def versions(self, tags):
+        keys = [f"{self.prefix}tag:{t}" for t in tags]
+        values = self.client.mget(keys)
+        if any(v is None for v in values):
+            for k, v in zip(keys, values):
+                if v is None:
+                    self.client.set(k, time.time_ns(), nx=True)
+            values = self.client.mget(keys)
+        return [int(v) for v in values]
+
+    def bump(self, tags):
+        for t in tags:
+            self.client.incr(f"{self.prefix}tag:{t}")
+
+    def clear(self):
+        for key in self.client.scan_iter(self.prefix + "*"):
+            self.client.delete(key)
+
+
+class LocalRedis:
+    """Подмена redis-клиента в процессе — только то, что использует RedisBackend."""
+
+    def __init__(self):
+        self._data = {}  # key -> (bytes, expires_at | None)
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        hit = self._data.get(key)
+        if hit and hit[1] is not None and hit[1] <= time.monotonic():
+            del self._data[key]
+            return None
+        return hit
+
+    def get(self, key):
+        with self._lock:
+            hit = self._live(key)
+            return hit[0] if hit else None
+
+    def mget(self, keys):
+        return [self.get(k) for k in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            raw = value if isinstance(value, bytes) else str(value).encode()
+            self._data[key] = (raw, time.monotonic() + ex if ex else None)
+            return True
+
+    def incr(self, key):
+        with self._lock:
+            hit = self._live(key)
+            value = int(hit[0]) + 1 if hit else 1
+            self._data[key] = (str(value).encode(), hit[1] if hit else None)
+            return value
+
+    def scan_iter(self, pattern):
+        prefix = pattern.rstrip("*")
+        with self._lock:
+            return [k for k in list(self._data) if k.startswith(prefix)]
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+_backend = None
+
+
+def init_cache(url):
+    """Выбрать бэкенд по CACHE_URL: memory:// (по умолчанию), redis://…, local://."""
+    global _backend
+    if not url or url.startswith("memory://"):
+        _backend = MemoryBackend()
+    elif url.startswith("local://"):
+        _backend = RedisBackend(LocalRedis())
+    elif url.startswith(("redis://", "rediss://", "unix://")):
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_URL points to redis, but the redis package is not installed") from e
+        _backend = RedisBackend(redis.Redis.from_url(url))
+    else:
+        raise ValueError(f"Unsupported CACHE_URL: {url}")
+    return _backend
+
+
+def backend():
+    global _backend
+    if _backend is None:
+        _backend = MemoryBackend()
+    return _backend
+
+
+def invalidate(*tags):
+    """Сразу сбросить ответы с этими тегами (вне транзакции, например из фоновой задачи)."""
+    if tags:
+        backend().bump(tags)
+
+
+def invalidate_on_commit(*tags):
+    """
+    Сбросить теги после commit текущей транзакции (при rollback — не сбрасывать).
+    Раньше commit нельзя: параллельный GET успел бы закэшировать ещё старые данные.
+    """
+    db.session().info.setdefault("cache_tags", set()).update(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _flush_tags(session):
+    tags = session.info.pop("cache_tags", None)
+    if tags:
+        invalidate(*tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_tags(session):
+    session.info.pop("cache_tags", None)
+
+
+def tag_response(*tags):
+    """Добавить теги к кэшируемому ответу изнутри view (когда они известны только после выборки)."""
+    if "cache_tags" in g:
+        g.cache_tags.update(tags)
+        g.cache_versions.update(zip(tags, backend().versions(tags)))
+
+
+def _cache_key():
+    # host_url (схема + хост) — в ответах абсолютные ссылки url_for(..., _external=True)
+    args = sorted(request.args.items(multi=True))
+    raw = json.dumps([request.host_url, request.endpoint, sorted(request.view_args.items()), args])
+    return "resp:" + hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _not_modified(entry):
+    return entry["etag"] and request.if_none_match.contains_weak(entry["etag"])
+
+
+def _from_entry(entry):
+    if _not_modified(entry):
+        resp = current_app.response_class(status=304)
+        for name, value in entry["headers"]:
+            if name.lower() in ("etag", "cache-control", "vary"):
+                resp.headers.add(name, value)
+    else:
+        resp = current_app.response_class(entry["body"], status=entry["status"])
+        resp.headers.clear()
+        for name, value in entry["headers"]:
+            resp.headers.add(name, value)
+    resp.headers["X-Cache"] = "HIT"
+    return resp
+
+
+def cached(tags=None, ttl=None):
+    """
+    Кэшировать 200-ответ GET. tags(**view_args) -> список тегов, известных до выполнения view;
+    остальные view добавляет через tag_response(). Ответы без ETag получают слабый ETag по
+    содержимому, так что повторный запрос с If-None-Match отвечается 304 прямо из кэша.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = backend()
+            key = _cache_key()
+            entry = cache.get(key)
+            if entry is not None:
+                stored = entry["tags"]
+                if list(stored.values()) == cache.versions(list(stored)):
+                    return _from_entry(entry)
+
+            # версии снимаются до выборки: запись, собранная во время чужого commit, устареет сразу
+            static_tags = list(tags(**kwargs)) if tags else []
+            g.cache_tags = set(static_tags)
+            g.cache_versions = dict(zip(static_tags, cache.versions(static_tags)))
+
+            resp = make_response(fn(*args, **kwargs))
+            if resp.status_code != 200 or resp.direct_passthrough:
+                return resp
+            if not resp.get_etag()[0]:
+                resp.set_etag(hashlib.sha1(resp.get_data()).hexdigest()[:16], weak=True)
+            etag, _ = resp.get_etag()
+            cache.set(key, {
+                "status": resp.status_code,
+                "body": resp.get_data(as_text=True),
+                "headers": [(k, v) for k, v in resp.headers.items() if k.lower() not in _SKIP_HEADERS],
+                "etag": etag,
+                "tags": g.cache_versions,
+            }, ttl or RESPONSE_CACHE_TTL)
+            resp.headers["X-Cache"] = "MISS"
+            return resp.make_conditional(request)
+        return wrapper
+    return decorator
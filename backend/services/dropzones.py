@@ -0,0 +1,125 @@
+# services/dropzones.py
+# Запись назначений дропзон с проверкой вместимости внутри БД (без гонки count() -> insert).
+from app import db
+from models import DropzoneTemplate, DropzoneAssignment, Team
+
+
+def claim_dropzone(game_id, template_id, team_id, created_by=None):
+    """
+    Атомарно занять зону: строка шаблона блокируется (SELECT ... FOR UPDATE), а вставка
+    идёт одним INSERT ... SELECT с условием count < capacity. Параллельные заявки на одну
+    зону выстраиваются в очередь на блокировке (SQLite и так сериализует запись).
+
+    Возвращает созданное назначение или None, если зона заполнена. Повторное назначение
+    команды в игре отсекают уникальные ограничения — IntegrityError ловит вызывающий код.
+    Коммитит вызывающий код.
+    """
+    capacity = db.session.execute(
+        db.select(DropzoneTemplate.capacity)
+        .where(DropzoneTemplate.id == template_id)
+        .with_for_update()
+    ).scalar_one()
+
+    taken = (
+        db.select(db.func.count(DropzoneAssignment.id))
+        .where(DropzoneAssignment.game_id == game_id,
+               DropzoneAssignment.dropzone_id == template_id)
+        .scalar_subquery()
+    )
+    inserted = db.session.execute(
+        db.insert(DropzoneAssignment).from_select(
+            ["game_id", "dropzone_id", "team_id", "created_by"],
+            db.select(
+                db.literal(game_id),
+                db.literal(template_id),
+                db.literal(team_id),
+                db.literal(created_by, db.Integer),
+            ).where(taken < capacity),
+        )
+    )
+    if inserted.rowcount == 0:
+        return None
+
+    return DropzoneAssignment.query.filter_by(game_id=game_id, team_id=team_id).one()
+
+
+def carry_over_assignments(game, source_game, created_by=None):
+    """
+    Скопировать назначения команд из source_game в game одним INSERT ... SELECT.
+    Пропускаются команды не из лобби игры, уже назначенные в game и не влезающие
+    в зону (вместимость минус уже занятые строки, по порядку назначения в источнике).
+    Возвращает (copied, skipped), где skipped — [{team_id, dropzone_id, reason}].
+    Коммитит вызывающий код.
+    """
+    db.session.execute(
+        db.select(DropzoneTemplate.id)
+        .where(DropzoneTemplate.map_id == game.map_id)
+        .with_for_update()
+    )
+
+    target = db.aliased(DropzoneAssignment)
+    in_lobby = db.exists().where(Team.id == DropzoneAssignment.team_id, Team.lobby_id == game.lobby_id)
+    already = db.exists().where(target.game_id == game.id, target.team_id == DropzoneAssignment.team_id)
+    candidates = (
+        db.select(
+            DropzoneAssignment.id,
+            DropzoneAssignment.team_id,
+            DropzoneAssignment.dropzone_id,
+            db.case(
+                (~in_lobby, "team_not_in_lobby"),
+                (already, "already_assigned"),
+                else_=None,
+            ).label("reason"),
+        )
+        .where(DropzoneAssignment.game_id == source_game.id, DropzoneAssignment.team_id.isnot(None))
+        .cte("candidates")
+    )
+
+    taken = (
+        db.select(db.func.count(target.id))
+        .where(target.game_id == game.id, target.dropzone_id == candidates.c.dropzone_id)
+        .scalar_subquery()
+    )
+    # номер слота, который займёт команда: уже занятые + порядковый номер среди переносимых
+    eligible = (
+        db.select(
+            candidates.c.team_id,
+            candidates.c.dropzone_id,
+            (db.func.row_number().over(partition_by=candidates.c.dropzone_id, order_by=candidates.c.id)
+             + taken).label("slot"),
+        )
+        .where(candidates.c.reason.is_(None))
+        .cte("eligible")
+    )
+    fits = db.and_(DropzoneTemplate.id == eligible.c.dropzone_id,
+                   eligible.c.slot <= DropzoneTemplate.capacity)
+
+    outcome = db.session.execute(
+        db.select(candidates.c.team_id, candidates.c.dropzone_id, candidates.c.reason)
+        .where(candidates.c.reason.isnot(None))
+        .union_all(
+            db.select(
+                eligible.c.team_id,
+                eligible.c.dropzone_id,
+                db.case((db.exists().where(fits), None), else_="zone_full"),
+            )
+        )
+    ).all()
+
+    db.session.execute(
+        db.insert(DropzoneAssignment).from_select(
+            ["game_id", "dropzone_id", "team_id", "created_by"],
+            db.select(
+                db.literal(game.id),
+                eligible.c.dropzone_id,
+                eligible.c.team_id,
+                db.literal(created_by, db.Integer),
+            ).join(DropzoneTemplate, fits),
+        )
+    )
+
+    copied = sum(1 for _, _, reason in outcome if reason is None)
+    return copied, [
+        {"team_id": team_id, "dropzone_id": zone, "reason": reason}
+        for team_id, zone, reason in outcome if reason is not None
+    ]
@@ -0,0 +1,81 @@
+# services/identity.py
+# Личность текущего пользователя без запроса к User на каждый вызов:
+# роль и имя кладутся в JWT при логине, а отзыв прав (toggle-admin, удаление
+# аккаунта) ловится коротким in-process кэшем с явной инвалидацией.
+import threading
+import time
+from functools import wraps
+from typing import NamedTuple
+
+from flask import g, jsonify
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, jwt_required
+
+from app import db
+from models import User
+
+IDENTITY_TTL_SECONDS = 30
+
+
+class Identity(NamedTuple):
+    id: int
+    username: str
+    is_admin: bool
+
+
+_lock = threading.Lock()
+_cache = {}  # user_id -> (Identity | None, expires_at)
+
+
+def create_token(user):
+    """Access token с ролью и именем пользователя в claims."""
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={"username": user.username, "is_admin": bool(user.is_admin)},
+    )
+
+
+def invalidate_identity(user_id):
+    """Сбросить кэш после изменения прав или удаления пользователя."""
+    with _lock:
+        _cache.pop(user_id, None)
+
+
+def load_identity(user_id):
+    """Identity из кэша (TTL IDENTITY_TTL_SECONDS) или одним лёгким SELECT; None — пользователя нет."""
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(user_id)
+    if hit and hit[1] > now:
+        return hit[0]
+
+    row = (
+        db.session.query(User.id, User.username, User.is_admin)
+        .filter(User.id == user_id)
+        .first()
+    )
+    ident = Identity(row.id, row.username, bool(row.is_admin)) if row else None
+    with _lock:
+        _cache[user_id] = (ident, now + IDENTITY_TTL_SECONDS)
+    return ident
+
+
+def current_identity():
+    """Identity текущего запроса (после jwt_required) или None, если аккаунт удалён."""
+    if "identity" not in g:
+        g.identity = load_identity(int(get_jwt_identity()))
+    return g.identity
+
+
+def admin_required(fn):
+    """jwt_required() + проверка прав администратора; в g.identity — текущий админ."""
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        # токен обычного пользователя отклоняем по claims, без обращения к кэшу и БД
+        if get_jwt().get("is_admin") is False:
+            return jsonify({"error": "Admin access required"}), 403
+        ident = current_identity()
+        if not ident or not ident.is_admin:
+            return jsonify({"error": "Admin access required"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
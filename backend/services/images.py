@@ -0,0 +1,81 @@
+# services/images.py
+# Обработка картинок карт: размеры оригинала и WebP-варианты (thumb / medium / full).
+# Перекодирование идёт в фоновом пуле, чтобы не держать поток запроса; пока варианта
+# нет на диске, вместо его ссылки отдаётся оригинал.
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from flask import url_for
+from PIL import Image, UnidentifiedImageError
+
+from config import UPLOAD_DIR
+from services.cache import invalidate
+
+log = logging.getLogger(__name__)
+
+# наибольшая сторона варианта в пикселях; меньшие картинки не растягиваются
+VARIANTS = {"thumb": 320, "medium": 1280, "full": 4096}
+WEBP_QUALITY = 82
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="map-images")
+
+
+def variant_filename(filename, variant):
+    return f"{Path(filename).stem}.{variant}.webp"
+
+
+def image_size(filename):
+    """(width, height) оригинала — читается только заголовок файла; None, если это не картинка."""
+    try:
+        with Image.open(UPLOAD_DIR / filename) as img:
+            return img.size
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        return None
+
+
+def build_variants(filename):
+    """Сгенерировать все варианты синхронно (фоновая задача и CLI-бэкфилл)."""
+    with Image.open(UPLOAD_DIR / filename) as img:
+        img.load()
+        source = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+    for variant, side in VARIANTS.items():
+        target = UPLOAD_DIR / variant_filename(filename, variant)
+        tmp = target.with_name(target.name + ".tmp")
+        resized = source.copy()
+        resized.thumbnail((side, side), Image.LANCZOS)
+        resized.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+        os.replace(tmp, target)  # файл появляется целиком или не появляется
+
+
+def _build_in_background(filename):
+    try:
+        build_variants(filename)
+    except Exception:
+        log.exception("Failed to build variants for %s", filename)
+        return
+    invalidate("maps")  # в закэшированных ответах вместо вариантов ещё ссылки на оригинал
+
+
+def schedule_variants(filename):
+    return _executor.submit(_build_in_background, filename)
+
+
+def remove_variants(filename):
+    for variant in VARIANTS:
+        (UPLOAD_DIR / variant_filename(filename, variant)).unlink(missing_ok=True)
+
+
+def map_image_url(filename):
+    # абсолютная ссылка на файл из static/maps
+    return url_for("static", filename=f"maps/{filename}", _external=True)
+
+
+def variant_urls(filename):
+    """Ссылки на варианты; ещё не готовый вариант заменяется оригиналом."""
+    urls = {}
+    for variant in VARIANTS:
+        name = variant_filename(filename, variant)
+        urls[variant] = map_image_url(name if (UPLOAD_DIR / name).exists() else filename)
+    return urls
@@ -0,0 +1,80 @@
+# services/lobby_codes.py
+# Коды лобби без поиска свободного: код — это id лобби, пропущенный через ключевую
+# перестановку (сеть Фейстеля + cycle-walking) пространства 36^8 кодов. Разные id дают
+# разные коды, поэтому проверять занятость не нужно и параллельные воркеры не конфликтуют;
+# ключ не даёт угадать соседние коды по своему. Ключ менять нельзя: старые коды останутся,
+# а новые могут с ними совпасть (такое ловит уникальный индекс — см. add_lobby).
+import hashlib
+import hmac
+import string
+import uuid
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models import Lobby
+
+ALPHABET = string.ascii_uppercase + string.digits
+CODE_LENGTH = 8
+SPACE = len(ALPHABET) ** CODE_LENGTH  # ~2.8e12 кодов
+
+_HALF_BITS = 21  # 2^42 — ближайшая сверху к SPACE чётная степень двойки
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 6
+
+# id < 2^40, поэтому на каждую попытку — своя непересекающаяся часть пространства
+_ATTEMPT_STRIDE = 1 << 40
+MAX_ATTEMPTS = SPACE // _ATTEMPT_STRIDE  # 2
+
+
+def _round(key, i, half):
+    digest = hmac.new(key, f"{i}:{half}".encode(), hashlib.sha256).digest()
+    return int.from_bytes(digest[:4], "big") & _HALF_MASK
+
+
+def _feistel(key, x):
+    left, right = x >> _HALF_BITS, x & _HALF_MASK
+    for i in range(_ROUNDS):
+        left, right = right, left ^ _round(key, i, right)
+    return (left << _HALF_BITS) | right
+
+
+def permute(n, key):
+    """Биекция [0, SPACE) -> [0, SPACE); выходящие за SPACE значения прогоняются ещё раз."""
+    x = _feistel(key, n)
+    while x >= SPACE:
+        x = _feistel(key, x)
+    return x
+
+
+def encode(n):
+    chars = []
+    for _ in range(CODE_LENGTH):
+        n, r = divmod(n, len(ALPHABET))
+        chars.append(ALPHABET[r])
+    return "".join(reversed(chars))
+
+
+def lobby_code(lobby_id, attempt=0):
+    key = current_app.config["LOBBY_CODE_KEY"].encode()
+    return encode(permute(attempt * _ATTEMPT_STRIDE + lobby_id, key))
+
+
+def add_lobby(name):
+    """
+    Создать лобби с кодом: INSERT с временным кодом и UPDATE кода по полученному id.
+    Временный код начинается с «~», которой нет в ALPHABET, — с выданными кодами он
+    не совпадёт. Поиска свободного кода нет; commit — на вызывающем.
+    """
+    lobby = Lobby(name=name, code="~" + uuid.uuid4().hex[:CODE_LENGTH - 1])
+    db.session.add(lobby)
+    db.session.flush()
+    for attempt in range(MAX_ATTEMPTS):
+        try:
+            with db.session.begin_nested():
+                lobby.code = lobby_code(lobby.id, attempt)
+            return lobby
+        except IntegrityError:
+            continue  # совпал с кодом, выданным до перехода на перестановку
+    raise RuntimeError(f"No free lobby code for lobby {lobby.id}")
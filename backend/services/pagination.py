@@ -0,0 +1,112 @@
+# services/pagination.py
+# Keyset-пагинация (?limit=&cursor= или ?since=) и выборка полей (?fields=) для списочных ручек.
+# Тело ответа остаётся массивом; ссылка на следующую страницу — в X-Next-Cursor и Link.
+# Клиент, который не читает заголовки, листает по since=<id последней строки>, пока
+# страница не окажется короче limit (см. frontend app/lib/pages.ts).
+import base64
+import binascii
+
+from flask import request, jsonify, url_for
+from app import db
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+
+class PageError(ValueError):
+    pass
+
+
+def column_fields(model, *names):
+    """Спецификация полей «как есть»: имя -> ((колонка,), render)."""
+    return {
+        name: ((getattr(model, name),), lambda row, name=name: getattr(row, name))
+        for name in names
+    }
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, value = raw.split(":", 1)
+        if prefix != "id":
+            raise ValueError
+        return int(value)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise PageError("Invalid cursor")
+
+
+def _parse_since(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise PageError("since must be an integer")
+
+
+def _parse_limit(value):
+    if value is None:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise PageError("limit must be an integer")
+    if not 1 <= limit <= MAX_LIMIT:
+        raise PageError(f"limit must be between 1 and {MAX_LIMIT}")
+    return limit
+
+
+def _parse_fields(value, fields):
+    if not value:
+        return list(fields)
+    selected = [f.strip() for f in value.split(",") if f.strip()]
+    unknown = [f for f in selected if f not in fields]
+    if unknown:
+        raise PageError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(fields)}")
+    # id отдаётся всегда — он же ключ курсора
+    return ["id"] + [f for f in dict.fromkeys(selected) if f != "id"]
+
+
+def keyset_page(model, fields, *criteria):
+    """
+    Страница `model` по возрастанию id: WHERE id > cursor|since ORDER BY id LIMIT limit + 1.
+    Выбираются только колонки запрошенных полей. `fields` — dict имя -> (колонки, render),
+    обязательно с "id". Возвращает готовый ответ Flask (или 400 на кривые параметры).
+    """
+    try:
+        limit = _parse_limit(request.args.get("limit"))
+        cursor = request.args.get("cursor")
+        since = request.args.get("since")
+        if cursor and since:
+            raise PageError("Use either cursor or since, not both")
+        after = decode_cursor(cursor) if cursor else _parse_since(since) if since else None
+        selected = _parse_fields(request.args.get("fields"), fields)
+    except PageError as e:
+        return jsonify({"error": str(e)}), 400
+
+    columns = {model.id.key: model.id}
+    for name in selected:
+        for col in fields[name][0]:
+            columns.setdefault(col.key, col)
+
+    stmt = db.select(*columns.values()).where(*criteria).order_by(model.id).limit(limit + 1)
+    if after is not None:
+        stmt = stmt.where(model.id > after)
+    rows = db.session.execute(stmt).all()
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+        args = request.args.to_dict()
+        args.update(cursor=next_cursor, limit=limit)
+        next_url = url_for(request.endpoint, **(request.view_args or {}), **args, _external=True)
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{next_url}>; rel="next"'
+
+    return jsonify([
+        {name: fields[name][1](row) for name in selected} for row in rows
+    ]), 200, headers
@@ -0,0 +1,132 @@
+# services/results.py
+# Общая логика записи результатов игры: валидация пачкой (один запрос на команды,
+# один на существующие результаты) и upsert в рамках одной транзакции.
+# Используется и одиночными ручками (game.py, admin.py), и пакетной загрузкой.
+from flask import jsonify
+
+from app import db
+from models import Result, Team
+from services.scoring import get_scorer
+from services.standings import apply_result_change, result_values
+from services.versioning import bump_lobby_results
+
+RESULT_FIELDS = ("place", "kills", "points")
+
+ERROR_STATUS = {
+    "invalid": 400,
+    "team_not_found": 404,
+    "result_not_found": 404,
+    "conflict": 409,
+}
+
+
+def serialize_result(r):
+    return {
+        "id": r.id,
+        "game_id": r.game_id,
+        "team_id": r.team_id,
+        "place": r.place,
+        "kills": r.kills,
+        "points": r.points
+    }
+
+
+def _error(index, team_id, code, message):
+    return {"index": index, "team_id": team_id, "code": code, "error": message}
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def save_results(game, rows, insert=True, update=True, required=()):
+    """
+    Upsert результатов игры. rows — список dict с team_id и любыми из place/kills/points
+    (отсутствующие поля у существующего результата не трогаются).
+
+    Если у лобби заданы правила подсчёта, points вычисляются по place/kills
+    и переданное значение игнорируется.
+
+    Возвращает (results, errors). Если есть хоть одна ошибка — ничего не пишется.
+    Коммит делает вызывающий код.
+    """
+    errors = []
+    seen = set()
+    for i, row in enumerate(rows):
+        team_id = row.get("team_id") if isinstance(row, dict) else None
+        if not team_id:
+            errors.append(_error(i, None, "invalid", "team_id is required"))
+            continue
+        if not _is_int(team_id):
+            errors.append(_error(i, team_id, "invalid", "team_id must be an integer"))
+            continue
+        if team_id in seen:
+            errors.append(_error(i, team_id, "invalid", "Duplicate team_id in payload"))
+            continue
+        seen.add(team_id)
+        missing = [f for f in required if row.get(f) is None]
+        if missing:
+            errors.append(_error(i, team_id, "invalid", f"{', '.join(missing)} required"))
+            continue
+        bad = [f for f in RESULT_FIELDS if row.get(f) is not None and not _is_int(row[f])]
+        if bad:
+            errors.append(_error(i, team_id, "invalid", f"Not an integer: {', '.join(bad)}"))
+    invalid = {e["index"] for e in errors}
+
+    team_ids = [row["team_id"] for i, row in enumerate(rows) if i not in invalid]
+    lobby_team_ids = {
+        tid for (tid,) in db.session.query(Team.id)
+        .filter(Team.id.in_(team_ids), Team.lobby_id == game.lobby_id)
+    }
+    existing = {
+        r.team_id: r for r in Result.query
+        .filter(Result.game_id == game.id, Result.team_id.in_(team_ids))
+    }
+
+    for i, row in enumerate(rows):
+        if i in invalid:
+            continue
+        team_id = row["team_id"]
+        if team_id not in lobby_team_ids:
+            errors.append(_error(i, team_id, "team_not_found", "Team not found in this lobby"))
+        elif team_id in existing and not update:
+            errors.append(_error(i, team_id, "conflict", "Result for this team already exists"))
+        elif team_id not in existing and not insert:
+            errors.append(_error(i, team_id, "result_not_found", "Result not found"))
+    if errors:
+        errors.sort(key=lambda e: e["index"])
+        return [], errors
+
+    # правила читаем до изменений, чтобы autoflush не записал строки без очков
+    scorer = get_scorer(game.lobby_id)
+    saved = []
+    olds = []
+    for row in rows:
+        result = existing.get(row["team_id"])
+        olds.append(result_values(result))
+        if result is None:
+            result = Result(game_id=game.id, team_id=row["team_id"])
+            db.session.add(result)
+        for field in RESULT_FIELDS:
+            if field in row:
+                setattr(result, field, row[field])
+        saved.append(result)
+
+    if scorer is not None:
+        points = scorer.score([(r.place, r.kills) for r in saved])
+        for result, p in zip(saved, points):
+            result.points = p
+
+    # дельта трогает только строки таблицы этих команд; полная пересборка лобби (rebuild_standings)
+    # остаётся для CLI и смены правил подсчёта
+    for result, old in zip(saved, olds):
+        apply_result_change(game.lobby_id, result.team_id, old, result_values(result))
+    bump_lobby_results(game.lobby_id)
+    db.session.flush()
+    return saved, errors
+
+
+def result_error_response(error, **overrides):
+    """JSON-ответ для первой ошибки одиночной ручки; overrides: code=(status, message)."""
+    status, message = overrides.get(error["code"], (ERROR_STATUS[error["code"]], error["error"]))
+    return jsonify({"error": message}), status
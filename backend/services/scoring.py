@@ -0,0 +1,110 @@
+# services/scoring.py
+# Серверный подсчёт очков по месту и убийствам. Правила хранятся в ScoringRules
+# (по одному набору на лобби); тип правил выбирает реализацию из SCORERS.
+from app import db
+from models import ScoringRules, Result, Game
+from services.standings import rebuild_standings
+from services.versioning import bump_lobby_results
+
+
+class PlacementKillsScorer:
+    """Очки за место из таблицы + kill_points за каждое убийство (не больше kill_cap убийств)."""
+
+    def __init__(self, placement_points, kill_points=1, kill_cap=None):
+        self.placement_points = list(placement_points)
+        self.kill_points = kill_points
+        self.kill_cap = kill_cap
+
+    def score(self, rows):
+        """Очки для списка (place, kills) за один проход."""
+        table = self.placement_points
+        size = len(table)
+        cap = self.kill_cap
+        per_kill = self.kill_points
+        out = []
+        for place, kills in rows:
+            placement = table[place - 1] if place and 0 < place <= size else 0
+            kills = kills or 0
+            if cap is not None and kills > cap:
+                kills = cap
+            out.append(placement + kills * per_kill)
+        return out
+
+
+SCORERS = {
+    "placement_kills": PlacementKillsScorer,
+}
+
+
+def make_scorer(rules):
+    if rules is None:
+        return None
+    return SCORERS[rules.kind](
+        placement_points=rules.placement_points,
+        kill_points=rules.kill_points,
+        kill_cap=rules.kill_cap,
+    )
+
+
+def get_scorer(lobby_id):
+    """Калькулятор очков лобби или None, если очки вводятся вручную."""
+    return make_scorer(ScoringRules.query.filter_by(lobby_id=lobby_id).first())
+
+
+def serialize_rules(rules):
+    return {
+        "lobby_id": rules.lobby_id,
+        "kind": rules.kind,
+        "placement_points": rules.placement_points,
+        "kill_points": rules.kill_points,
+        "kill_cap": rules.kill_cap
+    }
+
+
+def validate_rules(data):
+    """Проверка тела запроса с правилами; возвращает (values, error)."""
+    kind = data.get("kind", "placement_kills")
+    if kind not in SCORERS:
+        return None, f"Unknown scoring kind '{kind}'"
+
+    placement = data.get("placement_points")
+    if (not isinstance(placement, list) or not placement
+            or any(not isinstance(p, int) or isinstance(p, bool) or p < 0 for p in placement)):
+        return None, "placement_points must be a non-empty list of non-negative integers"
+
+    kill_points = data.get("kill_points", 1)
+    if not isinstance(kill_points, int) or isinstance(kill_points, bool) or kill_points < 0:
+        return None, "kill_points must be a non-negative integer"
+
+    kill_cap = data.get("kill_cap")
+    if kill_cap is not None and (not isinstance(kill_cap, int) or isinstance(kill_cap, bool) or kill_cap < 0):
+        return None, "kill_cap must be a non-negative integer or null"
+
+    return {
+        "kind": kind,
+        "placement_points": placement,
+        "kill_points": kill_points,
+        "kill_cap": kill_cap,
+    }, None
+
+
+def rescore_lobby(lobby_id, scorer):
+    """
+    Пересчитать очки всех результатов лобби: один SELECT, один пакетный UPDATE
+    по первичному ключу и пересборка итоговой таблицы. Коммит — у вызывающего.
+    """
+    rows = (
+        db.session.query(Result.id, Result.place, Result.kills)
+        .join(Game, Game.id == Result.game_id)
+        .filter(Game.lobby_id == lobby_id)
+        .all()
+    )
+    if rows:
+        points = scorer.score([(r.place, r.kills) for r in rows])
+        db.session.execute(
+            db.update(Result),
+            [{"id": r.id, "points": p} for r, p in zip(rows, points)],
+        )
+    rebuild_standings(lobby_id)
+    bump_lobby_results(lobby_id)
+    return len(rows)
@@ -0,0 +1,124 @@
+# services/spatial.py
+# Пространственный индекс шаблонов дропзон карты: равномерная сетка по центрам кругов.
+# Индекс живёт в памяти процесса и лениво пересобирается, когда меняется Map.dropzones_version.
+import math
+import statistics
+import threading
+
+from app import db
+from models import Map, DropzoneTemplate
+
+MIN_CELL = 1.0  # координаты в процентах 0..100
+OVERSIZED_FACTOR = 4  # зона с радиусом больше стольких медианных в сетку не кладётся
+DUPLICATE_TOLERANCE = 1.0  # центры ближе этого — почти дубликат
+
+_lock = threading.Lock()
+_indexes = {}  # map_id -> MapIndex
+
+
+class MapIndex:
+    """
+    Сетка с ячейкой в медианный диаметр: запрос смотрит несколько ячеек вокруг точки.
+    Редкие огромные зоны (больше OVERSIZED_FACTOR медианных радиусов) лежат отдельным
+    списком и проверяются всегда — иначе одна такая зона раздувала бы охват каждого запроса.
+    """
+
+    def __init__(self, version, zones):
+        self.version = version
+        self.zones = {z.id: z for z in zones}
+        typical = statistics.median(z.radius for z in zones) if zones else 0
+        self.cell = max(2 * typical, MIN_CELL)
+        limit = max(OVERSIZED_FACTOR * typical, MIN_CELL)
+        self.oversized = [z for z in zones if z.radius > limit]
+        gridded = [z for z in zones if z.radius <= limit]
+        self.max_radius = max((z.radius for z in gridded), default=0)
+        self.grid = {}
+        for z in gridded:
+            self.grid.setdefault(self._key(z.x_percent, z.y_percent), []).append(z)
+
+    def _key(self, x, y):
+        return (math.floor(x / self.cell), math.floor(y / self.cell))
+
+    def _around(self, x, y, reach):
+        """Кандидаты в радиусе reach от точки (reach может превышать ячейку) и все огромные зоны."""
+        yield from self.oversized
+        span = math.ceil(reach / self.cell)
+        if (2 * span + 1) ** 2 >= len(self.grid):
+            # охват больше занятых ячеек (запрос от огромной зоны) — быстрее пройти их все
+            for cell in self.grid.values():
+                yield from cell
+            return
+        cx, cy = self._key(x, y)
+        for i in range(cx - span, cx + span + 1):
+            for j in range(cy - span, cy + span + 1):
+                yield from self.grid.get((i, j), ())
+
+    def at(self, x, y):
+        """Зоны, в круг которых попадает точка, — ближайшая первой."""
+        hits = []
+        for z in self._around(x, y, self.max_radius):
+            distance = math.hypot(z.x_percent - x, z.y_percent - y)
+            if distance <= z.radius:
+                hits.append((distance, z))
+        return [(z, distance) for distance, z in sorted(hits, key=lambda h: (h[0], h[1].id))]
+
+    def near(self, x, y, radius, margin=0.0, exclude=None):
+        """Зоны, пересекающиеся с кругом (x, y, radius) с учётом зазора margin."""
+        found = []
+        for z in self._around(x, y, self.max_radius + radius + margin):
+            if z.id == exclude:
+                continue
+            distance = math.hypot(z.x_percent - x, z.y_percent - y)
+            if distance < z.radius + radius + margin:
+                found.append((z, distance))
+        return sorted(found, key=lambda f: (f[1], f[0].id))
+
+    def overlaps(self, margin=0.0):
+        """Все пары пересекающихся зон (каждая пара один раз)."""
+        pairs = []
+        for z in self.zones.values():
+            for other, distance in self.near(z.x_percent, z.y_percent, z.radius, margin, exclude=z.id):
+                if z.id < other.id:
+                    pairs.append((z, other, distance))
+        return sorted(pairs, key=lambda p: (p[0].id, p[1].id))
+
+
+def map_index(map_id):
+    """Индекс карты (None, если карты нет). Стоимость на запрос — одна выборка версии."""
+    version = db.session.execute(
+        db.select(Map.dropzones_version).where(Map.id == map_id)
+    ).scalar_one_or_none()
+    if version is None:
+        forget_map(map_id)
+        return None
+
+    with _lock:
+        index = _indexes.get(map_id)
+    if index is not None and index.version == version:
+        return index
+
+    # строки, а не ORM-объекты: индекс переживает сессию запроса
+    zones = db.session.execute(
+        db.select(DropzoneTemplate.id, DropzoneTemplate.name, DropzoneTemplate.x_percent,
+                  DropzoneTemplate.y_percent, DropzoneTemplate.radius)
+        .where(DropzoneTemplate.map_id == map_id)
+    ).all()
+    index = MapIndex(version, zones)
+    with _lock:
+        _indexes[map_id] = index
+    return index
+
+
+def forget_map(map_id):
+    with _lock:
+        _indexes.pop(map_id, None)
+
+
+def serialize_overlap(zone, distance, radius):
+    return {
+        "id": zone.id,
+        "name": zone.name,
+        "distance": round(distance, 3),
+        "overlap": round(zone.radius + radius - distance, 3),
+        "near_duplicate": distance <= DUPLICATE_TOLERANCE,
+    }
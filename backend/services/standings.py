@@ -0,0 +1,193 @@
+# services/standings.py
+# Итоговая таблица лобби: суммы по команде поддерживаются при каждой записи результата,
+# чтобы /results/summary и статистика игрока читали одну индексированную таблицу.
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models import LobbyStanding, Result, Game, Team, Lobby, Player
+
+
+def result_values(result):
+    """Снимок (place, kills, points) результата — до изменения и после."""
+    if result is None:
+        return None
+    return (result.place, result.kills or 0, result.points or 0)
+
+
+def apply_result_change(lobby_id, team_id, old=None, new=None):
+    """
+    Учесть изменение одного результата команды: old/new — result_values() до/после
+    (None для вставки/удаления). Суммы меняются атомарным UPDATE на дельту,
+    лучшее место пересчитывается по результатам команды в лобби.
+    """
+    old_place, old_kills, old_points = old or (None, 0, 0)
+    new_place, new_kills, new_points = new or (None, 0, 0)
+
+    best_place = (
+        db.select(db.func.min(Result.place))
+        .join(Game, Game.id == Result.game_id)
+        .where(Game.lobby_id == lobby_id, Result.team_id == team_id)
+        .scalar_subquery()
+    )
+    update = (
+        db.update(LobbyStanding)
+        .where(LobbyStanding.lobby_id == lobby_id, LobbyStanding.team_id == team_id)
+        .values(
+            kills_total=LobbyStanding.kills_total + (new_kills - old_kills),
+            points_total=LobbyStanding.points_total + (new_points - old_points),
+            games_played=LobbyStanding.games_played + ((new is not None) - (old is not None)),
+            best_place=best_place,
+            place_total=LobbyStanding.place_total + ((new_place or 0) - (old_place or 0)),
+            placed_count=LobbyStanding.placed_count + ((new_place is not None) - (old_place is not None)),
+        )
+    )
+    if db.session.execute(update).rowcount or new is None:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.add(LobbyStanding(
+                lobby_id=lobby_id,
+                team_id=team_id,
+                kills_total=new_kills,
+                points_total=new_points,
+                games_played=1,
+                best_place=new_place,
+                place_total=new_place or 0,
+                placed_count=int(new_place is not None),
+            ))
+    except IntegrityError:
+        # первый результат команды записали параллельно — строка уже есть, добавляем дельту
+        db.session.execute(update)
+
+
+def rebuild_standings(lobby_id=None):
+    """Пересобрать таблицу целиком (или для одного лобби) одним INSERT ... SELECT."""
+    delete = db.delete(LobbyStanding)
+    if lobby_id is not None:
+        delete = delete.where(LobbyStanding.lobby_id == lobby_id)
+    db.session.execute(delete)
+
+    totals = (
+        db.select(
+            Game.lobby_id,
+            Result.team_id,
+            db.func.coalesce(db.func.sum(Result.kills), 0),
+            db.func.coalesce(db.func.sum(Result.points), 0),
+            db.func.count(Result.id),
+            db.func.min(Result.place),
+            db.func.coalesce(db.func.sum(Result.place), 0),
+            db.func.count(Result.place),
+        )
+        .join(Game, Game.id == Result.game_id)
+        .group_by(Game.lobby_id, Result.team_id)
+    )
+    if lobby_id is not None:
+        totals = totals.where(Game.lobby_id == lobby_id)
+    db.session.execute(
+        db.insert(LobbyStanding).from_select(
+            ["lobby_id", "team_id", "kills_total", "points_total", "games_played", "best_place",
+             "place_total", "placed_count"],
+            totals,
+        )
+    )
+
+
+def lobby_standings(lobby_id):
+    """Итоговая таблица лобби — одна выборка по первичному ключу (lobby_id, team_id)."""
+    rows = (
+        db.session.query(
+            LobbyStanding.team_id,
+            Team.name,
+            LobbyStanding.kills_total,
+            LobbyStanding.points_total,
+            LobbyStanding.games_played,
+            LobbyStanding.best_place,
+        )
+        .join(Team, Team.id == LobbyStanding.team_id)
+        .filter(LobbyStanding.lobby_id == lobby_id, LobbyStanding.games_played > 0)
+        .order_by(LobbyStanding.points_total.desc(), LobbyStanding.kills_total.desc())
+        .all()
+    )
+    return [{
+        "team_id": r.team_id,
+        "team_name": r.name,
+        "kills_total": r.kills_total,
+        "points_total": r.points_total,
+        "games_played": r.games_played,
+        "best_place": r.best_place
+    } for r in rows]
+
+
+def _average(total, count):
+    return round(total / count, 2) if count else None
+
+
+def user_stats(user_id):
+    """
+    Карьерная статистика игрока: одна выборка Player -> Team -> Lobby -> LobbyStanding
+    по индексу player(user_id, team_id).
+    Суммы по лобби уже сгруппированы в lobby_standing, здесь только складываем строки команд.
+    """
+    rows = (
+        db.session.query(
+            Team.id,
+            Team.name,
+            Lobby.id.label("lobby_id"),
+            Lobby.name.label("lobby_name"),
+            LobbyStanding.games_played,
+            LobbyStanding.kills_total,
+            LobbyStanding.points_total,
+            LobbyStanding.best_place,
+            LobbyStanding.place_total,
+            LobbyStanding.placed_count,
+        )
+        .select_from(Player)
+        .join(Team, Team.id == Player.team_id)
+        .join(Lobby, Lobby.id == Team.lobby_id)
+        .outerjoin(LobbyStanding, db.and_(LobbyStanding.lobby_id == Team.lobby_id,
+                                          LobbyStanding.team_id == Team.id))
+        .filter(Player.user_id == user_id)
+        .order_by(Team.id)
+        .all()
+    )
+
+    teams, lobbies = [], []
+    total_games = total_kills = total_points = place_total = placed_count = 0
+    best_places = []
+    for r in rows:
+        teams.append({
+            "id": r.id,
+            "name": r.name,
+            "lobby_id": r.lobby_id,
+            "lobby_name": r.lobby_name
+        })
+        if not r.games_played:
+            continue
+        total_games += r.games_played
+        total_kills += r.kills_total
+        total_points += r.points_total
+        place_total += r.place_total
+        placed_count += r.placed_count
+        if r.best_place is not None:
+            best_places.append(r.best_place)
+        lobbies.append({
+            "lobby_id": r.lobby_id,
+            "lobby_name": r.lobby_name,
+            "team_id": r.id,
+            "team_name": r.name,
+            "games": r.games_played,
+            "kills": r.kills_total,
+            "points": r.points_total,
+            "best_placement": r.best_place,
+            "average_placement": _average(r.place_total, r.placed_count)
+        })
+
+    return {
+        "teams": teams,
+        "total_games": total_games,
+        "total_kills": total_kills,
+        "total_points": total_points,
+        "best_placement": min(best_places) if best_places else None,
+        "average_placement": _average(place_total, placed_count),
+        "lobbies": lobbies
+    }
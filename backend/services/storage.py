@@ -0,0 +1,209 @@
+# services/storage.py
+# Контентно-адресуемое хранилище картинок карт: файл называется sha256 содержимого,
+# одинаковые загрузки ложатся в один файл, а использование считается в map_image.ref_count.
+# sweep_orphans() подчищает файлы, которые не принадлежат ни одной карте.
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from config import UPLOAD_DIR
+from models import Map, MapImage, MapUpload
+from services.images import image_size, remove_variants, VARIANTS
+
+log = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+TMP_PREFIX = ".upload-"
+PARTIAL_SUFFIX = ".partial"  # недокачанные файлы services.uploads: .upload-<id>.partial
+
+
+def store_upload(stream, ext):
+    """
+    Записать поток на диск, считая sha256 по ходу (без буферизации в памяти).
+    Возвращает (filename, created) или None, если это не картинка; created=False —
+    такие же байты уже лежали на диске. Строку map_image добавляет вызывающий код.
+    """
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(prefix=TMP_PREFIX, suffix=".tmp", dir=UPLOAD_DIR)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := stream.read(CHUNK_SIZE):
+                digest.update(chunk)
+                out.write(chunk)
+        return commit_file(tmp_path, digest.hexdigest(), ext)
+    finally:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def commit_file(tmp_path, sha256, ext):
+    """
+    Переименовать готовый файл из UPLOAD_DIR в <sha256>.<ext>. Возвращает (filename, created)
+    или None, если это не картинка; если такой файл уже есть, tmp_path остаётся вызывающему.
+    """
+    if not image_size(os.path.basename(tmp_path)):
+        return None
+    filename = f"{sha256}.{ext}"
+    target = UPLOAD_DIR / filename
+    if target.exists():
+        # sweep_orphans судит по mtime: повторно залитый старый файл-сирота иначе можно
+        # удалить между загрузкой и созданием карты
+        os.utime(target)
+        return filename, False
+    os.replace(tmp_path, target)
+    return filename, True
+
+
+def register_image(filename):
+    """Строка map_image для файла (ref_count = 0, пока его не возьмёт карта)."""
+    if db.session.get(MapImage, filename) is not None:
+        return
+    sha256 = filename.split(".", 1)[0]
+    try:
+        with db.session.begin_nested():
+            db.session.add(MapImage(
+                filename=filename,
+                sha256=sha256,
+                size_bytes=(UPLOAD_DIR / filename).stat().st_size,
+            ))
+    except IntegrityError:
+        pass  # параллельная загрузка тех же байт уже записала строку
+
+
+def acquire_image(filename):
+    """+1 ссылка на файл; файлы без строки (залиты до content-addressing) получают её здесь."""
+    updated = db.session.execute(
+        db.update(MapImage).where(MapImage.filename == filename)
+        .values(ref_count=MapImage.ref_count + 1)
+    )
+    if updated.rowcount == 0:
+        db.session.add(MapImage(
+            filename=filename,
+            size_bytes=(UPLOAD_DIR / filename).stat().st_size,
+            ref_count=1,
+        ))
+
+
+def release_image(filename):
+    """-1 ссылка; True, если файл больше не используется ни одной картой."""
+    db.session.execute(
+        db.update(MapImage).where(MapImage.filename == filename, MapImage.ref_count > 0)
+        .values(ref_count=MapImage.ref_count - 1)
+    )
+    ref_count = db.session.execute(
+        db.select(MapImage.ref_count).where(MapImage.filename == filename)
+    ).scalar_one_or_none()
+    return not ref_count
+
+
+def delete_image(filename):
+    """Удалить файл, его варианты и строку map_image; занятый картой файл не трогается."""
+    db.session.execute(
+        db.delete(MapImage).where(MapImage.filename == filename, MapImage.ref_count == 0)
+    )
+    in_use = db.session.execute(
+        db.select(MapImage.filename).where(MapImage.filename == filename)
+    ).first()
+    if in_use:
+        return False
+    (UPLOAD_DIR / filename).unlink(missing_ok=True)
+    remove_variants(filename)
+    return True
+
+
+def _owner(name):
+    """Имя оригинала, к которому относится файл (сам файл, вариант или .br/.gz-копия)."""
+    for suffix in (".br", ".gz"):
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+    # stem старых загрузок (<uuid>_<имя>) сам может содержать точки — режем справа
+    parts = name.rsplit(".", 2)
+    if len(parts) == 3 and parts[1] in VARIANTS and parts[2] == "webp":
+        return parts[0], True  # <stem>.<variant>.webp — сопоставляется по stem оригинала
+    return name, False
+
+
+def sweep_orphans(grace_seconds, dry_run=False, report_limit=1000):
+    """
+    Удалить из UPLOAD_DIR файлы, не принадлежащие ни одной карте: один проход scandir
+    против множества Map.image_filename. Моложе grace_seconds не трогаем (свежие загрузки,
+    недописанные .tmp и докачки, в которые писали недавно). Возвращает отчёт: сколько
+    просмотрено/найдено/удалено байт.
+    """
+    started = time.monotonic()
+    used = set(db.session.execute(db.select(Map.image_filename).distinct()).scalars())
+    used_stems = {Path(f).stem for f in used}
+    now = time.time()
+
+    scanned = 0
+    orphans = []  # (name, size, owner)
+    if UPLOAD_DIR.is_dir():
+        with os.scandir(UPLOAD_DIR) as entries:
+            for entry in entries:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                scanned += 1
+                owner, is_variant = _owner(entry.name)
+                if (owner in used_stems) if is_variant else (owner in used):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+                if now - st.st_mtime < grace_seconds:
+                    continue
+                orphans.append((entry.name, st.st_size, owner))
+
+    # файл могли привязать к карте, пока шёл проход, — перечитываем множество и фильтруем
+    if orphans:
+        used = set(db.session.execute(db.select(Map.image_filename).distinct()).scalars())
+        used_stems = {Path(f).stem for f in used}
+        orphans = [o for o in orphans if o[2] not in used and o[2] not in used_stems]
+
+    removed = reclaimed = 0
+    if not dry_run:
+        for name, size, _ in orphans:
+            try:
+                (UPLOAD_DIR / name).unlink()
+            except FileNotFoundError:
+                continue
+            except OSError:
+                log.warning("Could not remove orphaned map image %s", name, exc_info=True)
+                continue
+            removed += 1
+            reclaimed += size
+        names = [name for name, _, _ in orphans]
+        # брошенные докачки: вместе с .partial-файлом уходит и строка map_upload
+        upload_ids = [
+            name[len(TMP_PREFIX):-len(PARTIAL_SUFFIX)] for name in names
+            if name.startswith(TMP_PREFIX) and name.endswith(PARTIAL_SUFFIX)
+        ]
+        for i in range(0, len(names), 500):
+            db.session.execute(db.delete(MapImage).where(MapImage.filename.in_(names[i:i + 500])))
+        for i in range(0, len(upload_ids), 500):
+            db.session.execute(db.delete(MapUpload).where(MapUpload.id.in_(upload_ids[i:i + 500])))
+
+    report = {
+        "dry_run": dry_run,
+        "scanned": scanned,
+        "orphans": len(orphans),
+        "orphan_bytes": sum(size for _, size, _ in orphans),
+        "removed": removed,
+        "bytes_reclaimed": reclaimed,
+        "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        "files": [name for name, _, _ in orphans[:report_limit]],
+    }
+    log.info("Map image GC: %s", {k: v for k, v in report.items() if k != "files"})
+    return report
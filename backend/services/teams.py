@@ -0,0 +1,146 @@
+# services/teams.py
+# Команды лобби: регистрация составов и «в каких командах лобби состоит пользователь».
+# Регистрация проверяет сразу весь набор составов несколькими запросами (ники, занятые
+# игроки, занятые названия) и вставляет команды с игроками одной транзакцией — одинаково
+# для одной команды и для импорта десятков. Членство ищется по Player.user_id и держится
+# в коротком in-process кэше; при изменении составов кэш лобби сбрасывается явно.
+import threading
+import time
+from typing import NamedTuple
+
+from app import db
+from models import Player, Team, User
+
+MEMBERSHIP_TTL_SECONDS = 30
+
+_lock = threading.Lock()
+_cache = {}  # lobby_id -> {user_id: (frozenset(team_id), expires_at)}
+
+
+def teams_of_user_in_lobby(user_id, lobby_id):
+    """frozenset id команд лобби, в которых состоит пользователь (обычно одна или ни одной)."""
+    now = time.monotonic()
+    with _lock:
+        hit = _cache.get(lobby_id, {}).get(user_id)
+    if hit and hit[1] > now:
+        return hit[0]
+
+    team_ids = frozenset(
+        db.session.execute(
+            db.select(Player.team_id)
+            .join(Team, Team.id == Player.team_id)
+            .where(Player.user_id == user_id, Team.lobby_id == lobby_id)
+        ).scalars()
+    )
+    with _lock:
+        _cache.setdefault(lobby_id, {})[user_id] = (team_ids, now + MEMBERSHIP_TTL_SECONDS)
+    return team_ids
+
+
+def is_team_member(user_id, team):
+    return team.id in teams_of_user_in_lobby(user_id, team.lobby_id)
+
+
+def invalidate_lobby_teams(lobby_id):
+    """Сбросить кэш после регистрации/удаления команд лобби или удаления самого лобби."""
+    with _lock:
+        _cache.pop(lobby_id, None)
+
+
+TEAM_SIZE = 3
+MAX_IMPORT_TEAMS = 500
+
+
+class RosterError(NamedTuple):
+    index: int  # номер состава в переданном списке
+    team: str
+    message: str
+    status: int
+
+
+def _roster_shape_error(name, players):
+    if (not name or not isinstance(name, str)
+            or not isinstance(players, (list, tuple)) or len(players) != TEAM_SIZE
+            or any(not isinstance(p, str) or not p.strip() for p in players)):
+        return f"Team name and {TEAM_SIZE} player nicknames required"
+    if len(set(players)) != len(players):
+        return "The same player is listed twice"
+    return None
+
+
+def _validate_rosters(lobby_id, rosters):
+    """
+    Проверить составы [(name, [username, ...]), ...] для лобби. Возвращает (errors, user_ids):
+    RosterError — по одной, первой, на состав в порядке форма → название занято → ник не
+    зарегистрирован → игрок уже в лобби; user_ids — username -> User.id найденных ников.
+    """
+    errors = {}
+    for i, (name, players) in enumerate(rosters):
+        message = _roster_shape_error(name, players)
+        if message:
+            errors[i] = RosterError(i, name, message, 400)
+
+    valid = [i for i in range(len(rosters)) if i not in errors]
+    names = {rosters[i][0] for i in valid}
+    usernames = {u for i in valid for u in rosters[i][1]}
+
+    taken_names = set(db.session.execute(
+        db.select(Team.name).where(Team.lobby_id == lobby_id, Team.name.in_(names))
+    ).scalars()) if names else set()
+    user_ids = dict(db.session.execute(
+        db.select(User.username, User.id).where(User.username.in_(usernames))
+    ).all()) if usernames else {}
+    in_lobby = set(db.session.execute(
+        db.select(User.username)
+        .join(Player, Player.user_id == User.id)
+        .join(Team, Team.id == Player.team_id)
+        .where(Team.lobby_id == lobby_id, User.id.in_(user_ids.values()))
+    ).scalars()) if user_ids else set()
+
+    seen_names, seen_players = {}, {}
+    for i in valid:
+        name, players = rosters[i]
+        if name in taken_names:
+            errors[i] = RosterError(i, name, "Team with this name already registered in this lobby", 409)
+        elif name in seen_names:
+            errors[i] = RosterError(i, name, f"Duplicate team name (also in entry {seen_names[name]})", 409)
+        elif missing := next((u for u in players if u not in user_ids), None):
+            errors[i] = RosterError(i, name, f"User '{missing}' is not registered", 400)
+        elif busy := next((u for u in players if u in in_lobby), None):
+            errors[i] = RosterError(i, name, f"Player '{busy}' is already registered in a team in this lobby", 409)
+        elif twice := next((u for u in players if u in seen_players), None):
+            errors[i] = RosterError(
+                i, name, f"Player '{twice}' is also listed in entry {seen_players[twice]}", 409)
+        seen_names.setdefault(name, i)
+        for u in players:
+            seen_players.setdefault(u, i)
+
+    return [errors[i] for i in sorted(errors)], user_ids
+
+
+def register_teams(lobby_id, rosters):
+    """
+    Зарегистрировать составы целиком или никак: ([{id, name, lobby_id, players}], []) либо
+    (None, errors). Команды и игроки вставляются двумя пакетными INSERT в текущей транзакции —
+    commit и invalidate_lobby_teams на вызывающем; параллельная регистрация того же
+    названия всплывёт IntegrityError при commit.
+    """
+    errors, user_ids = _validate_rosters(lobby_id, rosters)
+    if errors:
+        return None, errors
+
+    # названия в пакете уникальны (проверено выше) — id сопоставляем по имени, а не по порядку
+    # строк RETURNING, чтобы вставка шла одним пакетом и на SQLite
+    team_ids = dict(db.session.execute(
+        db.insert(Team).returning(Team.name, Team.id),
+        [{"lobby_id": lobby_id, "name": name} for name, _ in rosters],
+    ).all())
+    db.session.execute(db.insert(Player), [
+        {"team_id": team_ids[name], "user_id": user_ids[u], "username": u}
+        for name, players in rosters
+        for u in players
+    ])
+    return [
+        {"id": team_ids[name], "name": name, "lobby_id": lobby_id, "players": list(players)}
+        for name, players in rosters
+    ], []
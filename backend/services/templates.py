@@ -0,0 +1,60 @@
+# services/templates.py
+# Кэш сериализованных шаблонов дропзон по карте (на процесс).
+# Шаблоны меняет только админ: ручки карт/дропзон сбрасывают запись явно, а сверка
+# с Map.dropzones_version ловит изменения, сделанные другими процессами.
+import threading
+
+from app import db
+from models import Map, DropzoneTemplate
+from services import spatial
+
+_lock = threading.Lock()
+_cache = {}  # map_id -> (dropzones_version, tuple[dict])
+
+
+def _load(map_id):
+    rows = db.session.execute(
+        db.select(DropzoneTemplate.id, DropzoneTemplate.name, DropzoneTemplate.x_percent,
+                  DropzoneTemplate.y_percent, DropzoneTemplate.radius, DropzoneTemplate.capacity)
+        .where(DropzoneTemplate.map_id == map_id)
+        .order_by(DropzoneTemplate.id)
+    ).all()
+    return tuple({
+        "id": r.id,
+        "name": r.name,
+        "x_percent": r.x_percent,
+        "y_percent": r.y_percent,
+        "radius": r.radius,
+        "capacity": r.capacity
+    } for r in rows)
+
+
+def map_templates(map_id, version=None):
+    """
+    Шаблоны карты по id — общий для всех запросов кортеж, словари в нём не менять.
+    version — Map.dropzones_version, если вызывающий его уже выбрал (иначе одна выборка).
+    """
+    if version is None:
+        version = db.session.execute(
+            db.select(Map.dropzones_version).where(Map.id == map_id)
+        ).scalar_one_or_none()
+        if version is None:
+            invalidate_map_templates(map_id)
+            return ()
+
+    with _lock:
+        cached = _cache.get(map_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    templates = _load(map_id)
+    with _lock:
+        _cache[map_id] = (version, templates)
+    return templates
+
+
+def invalidate_map_templates(map_id):
+    """Сбросить кэш шаблонов карты и её пространственный индекс."""
+    with _lock:
+        _cache.pop(map_id, None)
+    spatial.forget_map(map_id)
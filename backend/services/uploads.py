@@ -0,0 +1,151 @@
+# services/uploads.py
+# Докачиваемая загрузка больших картинок карт: init → PUT кусков по смещению → finalize.
+# Куски дописываются прямо в .partial-файл в UPLOAD_DIR (в памяти не больше CHUNK_SIZE),
+# после обрыва клиент спрашивает принятое смещение и продолжает с него. Брошенные
+# .partial-файлы и их строки map_upload убирает sweep_orphans() после grace-периода.
+import hashlib
+import os
+import re
+import uuid
+
+from app import db
+from config import UPLOAD_DIR, MAP_UPLOAD_MAX_BYTES, MAP_UPLOAD_CHUNK_BYTES
+from models import MapUpload
+from services.storage import CHUNK_SIZE, TMP_PREFIX, PARTIAL_SUFFIX, commit_file, file_sha256, register_image
+
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.extra = extra
+
+
+def partial_path(upload_id):
+    return UPLOAD_DIR / f"{TMP_PREFIX}{upload_id}{PARTIAL_SUFFIX}"
+
+
+def _checksum(value, what):
+    if value is None:
+        return None
+    value = str(value).strip().lower()
+    if not _SHA256_RE.match(value):
+        raise UploadError(f"{what} must be a hex sha256")
+    return value
+
+
+def upload_state(upload):
+    return {
+        "upload_id": upload.id,
+        "size": upload.size_bytes,
+        "offset": upload.received_bytes,
+        "complete": upload.received_bytes == upload.size_bytes,
+        "chunk_size": MAP_UPLOAD_CHUNK_BYTES,
+    }
+
+
+def start_upload(ext, size, sha256=None, created_by=None):
+    """Завести загрузку и пустой .partial-файл; size — полный размер файла в байтах."""
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise UploadError("size must be a positive integer")
+    if size > MAP_UPLOAD_MAX_BYTES:
+        raise UploadError(f"File is too large (max {MAP_UPLOAD_MAX_BYTES} bytes)", 413)
+
+    upload = MapUpload(
+        id=uuid.uuid4().hex, ext=ext, size_bytes=size, received_bytes=0,
+        sha256=_checksum(sha256, "sha256"), created_by=created_by,
+    )
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    partial_path(upload.id).touch(exist_ok=False)
+    db.session.add(upload)
+    return upload
+
+
+def get_upload(upload_id, lock=False):
+    """Загрузка по id (с FOR UPDATE для записи); 404 — нет такой, 410 — файл уже убран GC."""
+    upload = db.session.get(MapUpload, upload_id, with_for_update=lock)
+    if upload is None:
+        raise UploadError("Upload not found", 404)
+    if not partial_path(upload.id).exists():
+        db.session.delete(upload)
+        db.session.commit()
+        raise UploadError("Upload expired, start a new one", 410)
+    return upload
+
+
+def append_chunk(upload, offset, stream, length, chunk_sha256=None):
+    """
+    Дописать кусок длиной length с позиции offset. offset должен совпадать с уже принятым
+    (иначе 409 с текущим смещением — клиент продолжает с него); кусок, не прошедший проверку
+    X-Chunk-Sha256 или оборванный, отрезается, и смещение не двигается.
+    """
+    if offset != upload.received_bytes:
+        raise UploadError("Offset mismatch", 409, offset=upload.received_bytes)
+    if length is None:
+        raise UploadError("Content-Length is required", 411)
+    if length <= 0:
+        raise UploadError("Empty chunk")
+    if length > MAP_UPLOAD_CHUNK_BYTES:
+        raise UploadError(f"Chunk is too large (max {MAP_UPLOAD_CHUNK_BYTES} bytes)", 413)
+    if offset + length > upload.size_bytes:
+        raise UploadError("Chunk exceeds declared file size", 416, offset=upload.received_bytes)
+    expected = _checksum(chunk_sha256, "X-Chunk-Sha256")
+
+    digest = hashlib.sha256()
+    written = 0
+    with open(partial_path(upload.id), "r+b") as out:
+        out.seek(offset)
+        while written < length:
+            chunk = stream.read(min(CHUNK_SIZE, length - written))
+            if not chunk:
+                break
+            digest.update(chunk)
+            out.write(chunk)
+            written += len(chunk)
+
+        if written != length or (expected and digest.hexdigest() != expected):
+            out.truncate(offset)
+            if written != length:
+                raise UploadError("Incomplete chunk", 400, offset=offset)
+            raise UploadError("Chunk checksum mismatch", 400, offset=offset)
+        out.truncate(offset + length)
+        out.flush()
+        os.fsync(out.fileno())
+
+    upload.received_bytes = offset + length
+    return upload.received_bytes
+
+
+def finish_upload(upload):
+    """
+    Сверить размер и sha256 всего файла и переложить его в контентно-адресуемое хранилище.
+    Возвращает (filename, created); строка загрузки удаляется, map_image — регистрируется.
+    """
+    if upload.received_bytes != upload.size_bytes:
+        raise UploadError("Upload is incomplete", 409, offset=upload.received_bytes)
+
+    path = partial_path(upload.id)
+    if path.stat().st_size != upload.size_bytes:
+        raise UploadError("Stored size does not match, restart the upload", 409)
+    sha256 = file_sha256(path)
+    if upload.sha256 and sha256 != upload.sha256:
+        abort_upload(upload)
+        raise UploadError("File checksum mismatch")
+
+    stored = commit_file(path, sha256, upload.ext)
+    path.unlink(missing_ok=True)
+    db.session.delete(upload)
+    if not stored:
+        db.session.commit()
+        raise UploadError("File is not a valid image")
+    register_image(stored[0])
+    return stored
+
+
+def abort_upload(upload):
+    partial_path(upload.id).unlink(missing_ok=True)
+    db.session.delete(upload)
+    db.session.commit()
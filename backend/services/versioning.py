@@ -0,0 +1,77 @@
+# services/versioning.py
+# Счётчики версий для условных GET (ETag / If-None-Match).
+# bump_* выполняют атомарный UPDATE в текущей транзакции — коммитит вызывающий код;
+# после commit сбрасываются и закэшированные ответы с тегом лобби/карты (services/cache.py).
+from flask import request, jsonify, current_app
+from app import db
+from models import Game, Lobby, Map
+from services.cache import invalidate_on_commit
+
+
+def bump_game_board(game_id):
+    db.session.execute(
+        db.update(Game).where(Game.id == game_id)
+        .values(board_version=Game.board_version + 1)
+    )
+
+
+def bump_lobby_boards(lobby_id):
+    """Все доски лобби (например, после удаления команды с её назначениями)."""
+    db.session.execute(
+        db.update(Game).where(Game.lobby_id == lobby_id)
+        .values(board_version=Game.board_version + 1)
+    )
+
+
+def bump_lobby_results(lobby_id):
+    db.session.execute(
+        db.update(Lobby).where(Lobby.id == lobby_id)
+        .values(results_version=Lobby.results_version + 1)
+    )
+    invalidate_on_commit(f"lobby:{lobby_id}")
+
+
+def bump_map_dropzones(map_id):
+    db.session.execute(
+        db.update(Map).where(Map.id == map_id)
+        .values(dropzones_version=Map.dropzones_version + 1)
+    )
+    invalidate_on_commit(f"map:{map_id}")
+
+
+def board_state(game_id):
+    """Одна лёгкая выборка: id/map игры и версии, из которых строится ETag доски."""
+    return (
+        db.session.query(Game.id, Game.map_id, Game.board_version, Map.dropzones_version)
+        .outerjoin(Map, Map.id == Game.map_id)
+        .filter(Game.id == game_id)
+        .first()
+    )
+
+
+def board_etag(state):
+    return f"game-{state.id}-{state.board_version}-{state.dropzones_version or 0}"
+
+
+def results_state(lobby_id):
+    return (
+        db.session.query(Lobby.id, Lobby.results_version)
+        .filter(Lobby.id == lobby_id)
+        .first()
+    )
+
+
+def results_etag(state):
+    return f"lobby-{state.id}-{state.results_version}"
+
+
+def conditional_json(etag, build):
+    """304, если клиент уже видел эту версию; иначе jsonify(build()) с ETag."""
+    if request.if_none_match.contains_weak(etag):
+        resp = current_app.response_class(status=304)
+    else:
+        resp = jsonify(build())
+    resp.set_etag(etag, weak=True)
+    # клиент хранит ответ, но каждый раз перепроверяет его по ETag
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
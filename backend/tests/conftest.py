@@ -0,0 +1,116 @@
+# tests/conftest.py
+# Общие фикстуры: приложение на SQLite в памяти (схема создаётся заново на каждый тест),
+# сброс in-process кэшей между тестами и фабрика «лобби + карта + игра + команды».
+# Запуск: cd backend && python -m pytest
+import os
+import sys
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+from werkzeug.security import generate_password_hash
+
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app import app as flask_app, db  # noqa: E402
+from models import User, Lobby, Map, Game, Team, DropzoneTemplate  # noqa: E402
+from services import cache, identity, spatial, teams, templates  # noqa: E402
+
+
+def _reset_caches():
+    cache.backend().clear()
+    identity._cache.clear()
+    spatial._indexes.clear()
+    teams._cache.clear()
+    templates._cache.clear()
+
+
+@pytest.fixture
+def app():
+    flask_app.config["TESTING"] = True
+    with flask_app.app_context():
+        db.create_all()
+    _reset_caches()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+        db.drop_all()
+    _reset_caches()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def file_db(app, tmp_path, monkeypatch):
+    """
+    Та же схема в файле SQLite — для тестов с несколькими потоками: база в памяти живёт
+    в одном общем соединении, а файловую каждый поток открывает своим.
+    """
+    engine = sa.create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with app.app_context():
+        db.session.remove()
+        monkeypatch.setitem(db.engines, None, engine)
+        db.create_all()
+    yield engine
+    with app.app_context():
+        db.session.remove()
+    engine.dispose()
+
+
+@pytest.fixture
+def admin_headers(app, client):
+    with app.app_context():
+        db.session.add(User(username="admin", email="admin@example.com",
+                            password_hash=generate_password_hash("pw"), is_admin=True))
+        db.session.commit()
+    r = client.post("/api/auth/login", json={"username": "admin", "password": "pw"})
+    return {"Authorization": f"Bearer {r.get_json()['access_token']}"}
+
+
+@pytest.fixture
+def make_game(app):
+    """make_game(teams, zones, capacity=1) -> (game_id, [template_id], [team_id]) в новом лобби и на новой карте."""
+    made = []
+
+    def make(n_teams, n_zones, capacity=1):
+        n = len(made)
+        with app.app_context():
+            m = Map(name=f"Map {n}", image_filename=f"map{n}.png")
+            lobby = Lobby(name=f"Lobby {n}", code=f"TEST{n:04d}")
+            db.session.add_all([m, lobby])
+            db.session.flush()
+            zones = [DropzoneTemplate(map_id=m.id, name=f"Z{i}", x_percent=i % 100, y_percent=i // 100,
+                                      radius=1, capacity=capacity) for i in range(n_zones)]
+            roster = [Team(lobby_id=lobby.id, name=f"Team {i}") for i in range(n_teams)]
+            game = Game(lobby_id=lobby.id, number=1, map_id=m.id)
+            db.session.add_all([*zones, *roster, game])
+            db.session.commit()
+            made.append(game.id)
+            return game.id, [z.id for z in zones], [t.id for t in roster]
+
+    return make
+
+
+@pytest.fixture
+def count_queries(app):
+    """count_queries(fn) -> число SQL-операторов, выполненных за вызов fn()."""
+    def count(fn):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with app.app_context():
+            engine = db.engine
+        sa.event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            fn()
+        finally:
+            sa.event.remove(engine, "before_cursor_execute", before_cursor_execute)
+        return len(statements)
+
+    return count
@@ -0,0 +1,52 @@
+# tests/test_admin_lobbies.py
+# /admin/lobbies: число запросов не растёт с числом лобби, команд и игр; страницы покрывают весь список.
+from app import db
+from models import Lobby, Map, Game, Team, Player
+
+
+def _seed(app, n_lobbies, start=0):
+    with app.app_context():
+        m = Map(name=f"Map {start}", image_filename=f"map{start}.png")
+        db.session.add(m)
+        for i in range(start, start + n_lobbies):
+            lobby = Lobby(name=f"Lobby {i}", code=f"L{i:05d}")
+            db.session.add(lobby)
+            db.session.flush()
+            for t in range(3):
+                team = Team(lobby_id=lobby.id, name=f"Team {t}")
+                db.session.add(team)
+                db.session.flush()
+                db.session.add_all([Player(team_id=team.id, username=f"p{i}-{t}-{k}") for k in range(3)])
+            db.session.add_all([Game(lobby_id=lobby.id, number=g, map_id=m.id) for g in (1, 2)])
+        db.session.commit()
+
+
+def test_query_count_does_not_grow_with_lobbies(app, client, admin_headers, count_queries):
+    def fetch():
+        r = client.get("/api/admin/lobbies?per_page=200", headers=admin_headers)
+        assert r.status_code == 200
+        return r.get_json()
+
+    _seed(app, 2)
+    fetch()  # прогрев кэша identity
+    few = count_queries(fetch)
+
+    _seed(app, 40, start=2)
+    many = count_queries(fetch)
+    assert many == few
+
+    lobbies = fetch()
+    assert len(lobbies) == 42
+    assert all(len(l["teams"]) == 3 and len(l["teams"][0]["players"]) == 3 for l in lobbies)
+    assert all([g["number"] for g in l["games"]] == [1, 2] and l["games"][0]["map_name"] for l in lobbies)
+
+
+def test_pages_cover_all_lobbies(app, client, admin_headers):
+    _seed(app, 5)
+    seen = []
+    for page in (1, 2, 3):
+        r = client.get(f"/api/admin/lobbies?page={page}&per_page=2", headers=admin_headers)
+        assert r.headers["X-Total-Count"] == "5"
+        seen += [l["name"] for l in r.get_json()]
+    assert seen == [f"Lobby {i}" for i in range(5)]
+    assert client.get("/api/admin/lobbies?per_page=500", headers=admin_headers).status_code == 400
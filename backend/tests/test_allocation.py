@@ -0,0 +1,86 @@
+# tests/test_allocation.py
+# Авто-раздача дропзон: optimal минимизирует сумму рангов, rotation отдаёт первый выбор
+# худшим по прошлой игре, replace=True раздаёт заново, гонка с другой записью — 409.
+import pytest
+
+from app import db
+from models import DropzoneAssignment, DropzonePreference, Game, Result
+import routes.dropzone
+
+
+def _prefer(app, game_id, prefs):
+    with app.app_context():
+        db.session.execute(db.delete(DropzonePreference).where(DropzonePreference.game_id == game_id))
+        db.session.add_all([
+            DropzonePreference(game_id=game_id, team_id=team_id, dropzone_id=zone_id, rank=rank)
+            for team_id, zones in prefs.items() for rank, zone_id in enumerate(zones, 1)
+        ])
+        db.session.commit()
+
+
+def _allocate(client, headers, game_id, **body):
+    r = client.post(f"/api/games/{game_id}/dropzones/allocate", json=body, headers=headers)
+    assert r.status_code == 200, r.get_json()
+    data = r.get_json()
+    return {a["team_id"]: a["dropzone_id"] for a in data["assigned"]}, data["unassigned"]
+
+
+def _stored(app, game_id):
+    with app.app_context():
+        return dict(db.session.execute(
+            db.select(DropzoneAssignment.team_id, DropzoneAssignment.dropzone_id)
+            .where(DropzoneAssignment.game_id == game_id)
+        ).all())
+
+
+def test_optimal_minimises_total_rank(app, client, admin_headers, make_game):
+    game_id, (z0, z1), (a, b, c) = make_game(3, n_zones=2)
+    # жадно по id: a -> z0, b без своей зоны; оптимум — b -> z0, a -> z1, c без зоны
+    _prefer(app, game_id, {a: [z0, z1], b: [z0]})
+
+    picks, unassigned = _allocate(client, admin_headers, game_id, strategy="optimal")
+    assert picks == {a: z1, b: z0} and unassigned == [c]
+    assert _stored(app, game_id) == picks
+
+
+def test_rotation_lets_worst_place_pick_first(app, client, admin_headers, make_game):
+    first_id, (z0, z1), (a, b, c) = make_game(3, n_zones=2)
+    with app.app_context():
+        first = db.session.get(Game, first_id)
+        second = Game(lobby_id=first.lobby_id, number=2, map_id=first.map_id)
+        db.session.add(second)
+        db.session.add_all([Result(game_id=first_id, team_id=t, place=p) for t, p in ((a, 1), (b, 3), (c, 2))])
+        db.session.commit()
+        game_id = second.id
+    _prefer(app, game_id, {t: [z0, z1] for t in (a, b, c)})
+
+    picks, unassigned = _allocate(client, admin_headers, game_id, strategy="rotation")
+    assert picks == {b: z0, c: z1} and unassigned == [a]
+
+
+@pytest.mark.parametrize("strategy", ["optimal", "rotation"])
+def test_replace_reallocates_by_new_preferences(app, client, admin_headers, make_game, strategy):
+    game_id, (z0, z1), (a, b) = make_game(2, n_zones=2)
+    _prefer(app, game_id, {a: [z0], b: [z1]})
+    assert _allocate(client, admin_headers, game_id, strategy=strategy) == ({a: z0, b: z1}, [])
+
+    _prefer(app, game_id, {a: [z1], b: [z0]})
+    assert _allocate(client, admin_headers, game_id, strategy=strategy) == ({}, [])
+    assert _allocate(client, admin_headers, game_id, strategy=strategy, replace=True) == ({a: z1, b: z0}, [])
+    assert _stored(app, game_id) == {a: z1, b: z0}
+
+
+def test_concurrent_assignment_returns_409(app, client, admin_headers, make_game, monkeypatch):
+    game_id, (z0, z1), (a,) = make_game(1, n_zones=2)
+    real = routes.dropzone.allocate_dropzones
+
+    def racing(game, **kwargs):
+        # вторая строка той же команды — как заявка, проскочившая между выборкой и вставкой
+        result = real(game, **kwargs)
+        db.session.add(DropzoneAssignment(game_id=game.id, dropzone_id=z1, team_id=a))
+        return result
+
+    monkeypatch.setattr(routes.dropzone, "allocate_dropzones", racing)
+    r = client.post(f"/api/games/{game_id}/dropzones/allocate", json={}, headers=admin_headers)
+    assert r.status_code == 409
+    assert _stored(app, game_id) == {}
@@ -0,0 +1,35 @@
+# tests/test_board.py
+# Доска дропзон собирается фиксированным числом запросов, сколько бы команд ни было в лобби.
+from app import db
+from models import DropzoneAssignment
+
+
+def _assign_all(app, game_id, zone_ids, team_ids):
+    with app.app_context():
+        db.session.add_all([
+            DropzoneAssignment(game_id=game_id, dropzone_id=zone, team_id=team)
+            for zone, team in zip(zone_ids, team_ids)
+        ])
+        db.session.commit()
+
+
+def _board_queries(app, client, make_game, count_queries, n_teams):
+    game_id, zone_ids, team_ids = make_game(n_teams, n_zones=n_teams)
+    _assign_all(app, game_id, zone_ids, team_ids)
+
+    responses = []
+    counts = [
+        count_queries(lambda: responses.append(client.get(f"/api/dropzones/for-game/{game_id}"))),
+        count_queries(lambda: responses.append(client.get(f"/api/games/{game_id}/dropzones"))),
+    ]
+    board, assignments = responses
+    assert board.status_code == 200 and assignments.status_code == 200
+    assert sum(z["current_teams"] for z in board.get_json()) == n_teams
+    assert len(assignments.get_json()) == n_teams
+    return counts
+
+
+def test_board_query_count_does_not_grow_with_teams(app, client, make_game, count_queries):
+    small = _board_queries(app, client, make_game, count_queries, 3)
+    large = _board_queries(app, client, make_game, count_queries, 20)
+    assert small == large
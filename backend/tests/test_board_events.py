@@ -0,0 +1,31 @@
+# tests/test_board_events.py
+# Создание слотов игры рассылает снапшот доски; счётчик событий игры не переживает её последнего подписчика.
+from services import board_events
+
+
+def test_creating_game_dropzones_publishes_snapshot(client, admin_headers, make_game):
+    game_id, zone_ids, _ = make_game(2, n_zones=3)
+    sub = board_events.subscribe(game_id)
+    try:
+        r = client.post(f"/api/games/{game_id}/dropzones", headers=admin_headers)
+        assert r.status_code == 201 and r.get_json()["created"] == 3
+        seq, event, board = sub.next(timeout=0)
+        assert event == "snapshot" and sorted(z["id"] for z in board) == zone_ids
+
+        # повторный вызов ничего не создаёт — и ничего не рассылает
+        assert client.post(f"/api/games/{game_id}/dropzones", headers=admin_headers).get_json()["created"] == 0
+        assert sub.next(timeout=0) is None
+    finally:
+        board_events.unsubscribe(sub)
+
+
+def test_sequence_is_dropped_with_last_subscriber():
+    first, second = board_events.subscribe(-1), board_events.subscribe(-1)
+    board_events.publish(-1, "assign", {})
+    board_events.unsubscribe(first)
+    assert board_events._sequence[-1] == 1
+    board_events.unsubscribe(second)
+    assert -1 not in board_events._sequence
+
+    board_events.publish(-1, "assign", {})  # без подписчиков счётчик не заводится
+    assert -1 not in board_events._sequence
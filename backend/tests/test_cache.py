@@ -0,0 +1,24 @@
+# tests/test_cache.py
+# Кэш публичных GET: повторный запрос — из кэша, запись сбрасывает его по тегу,
+# абсолютные ссылки не переносятся между хостами.
+
+
+def test_write_invalidates_cached_list(client, admin_headers):
+    assert client.get("/api/announcements").headers["X-Cache"] == "MISS"
+    assert client.get("/api/announcements").headers["X-Cache"] == "HIT"
+
+    r = client.post("/api/announcements", json={"title": "Scrims", "time": "20:00", "prize": "-"},
+                    headers=admin_headers)
+    assert r.status_code == 201
+
+    fresh = client.get("/api/announcements")
+    assert fresh.headers["X-Cache"] == "MISS" and len(fresh.get_json()) == 1
+
+
+def test_absolute_urls_are_cached_per_host(client, make_game):
+    make_game(0, n_zones=0)
+    for base in ("http://a.example", "https://b.example"):
+        first = client.get("/api/maps", base_url=base)
+        again = client.get("/api/maps", base_url=base)
+        assert first.headers["X-Cache"] == "MISS" and again.headers["X-Cache"] == "HIT"
+        assert again.get_json()[0]["image_url"].startswith(f"{base}/")
@@ -0,0 +1,47 @@
+# tests/test_dropzone_claims.py
+# Одновременные заявки на одну зону: ровно capacity проходят, остальные получают 409,
+# и ни в какой момент в зоне не бывает больше capacity назначений.
+import threading
+
+from app import db
+from models import DropzoneAssignment
+
+THREADS = 16
+CAPACITY = 3
+
+
+def test_concurrent_claims_never_exceed_capacity(app, file_db, admin_headers, make_game):
+    game_id, (zone_id,), team_ids = make_game(THREADS, n_zones=1, capacity=CAPACITY)
+    occupied = db.select(db.func.count(DropzoneAssignment.id)).where(
+        DropzoneAssignment.game_id == game_id, DropzoneAssignment.dropzone_id == zone_id)
+
+    start = threading.Barrier(THREADS)
+    done = threading.Event()
+    statuses, peaks = [], []
+
+    def claim(team_id):
+        client = app.test_client()
+        start.wait()
+        r = client.post(f"/api/games/{game_id}/dropzones/assign-by-template/{zone_id}",
+                        json={"team_id": team_id}, headers=admin_headers)
+        statuses.append(r.status_code)
+
+    def watch():
+        with file_db.connect() as conn:
+            while not done.is_set():
+                peaks.append(conn.execute(occupied).scalar_one())
+
+    watcher = threading.Thread(target=watch)
+    workers = [threading.Thread(target=claim, args=(t,)) for t in team_ids]
+    watcher.start()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    done.set()
+    watcher.join()
+
+    assert sorted(statuses) == [201] * CAPACITY + [409] * (THREADS - CAPACITY)
+    assert max(peaks) <= CAPACITY
+    with file_db.connect() as conn:
+        assert conn.execute(occupied).scalar_one() == CAPACITY
@@ -0,0 +1,16 @@
+# tests/test_lobby_codes.py
+# Коды лобби выдаются из ALPHABET и находятся через /by-code, временный код туда не попадает.
+from services.lobby_codes import ALPHABET, CODE_LENGTH
+
+
+def test_created_lobbies_get_distinct_codes(client, admin_headers):
+    codes = []
+    for i in range(20):
+        r = client.post("/api/lobbies/create", json={"name": f"Lobby {i}"}, headers=admin_headers)
+        assert r.status_code == 201, r.get_json()
+        codes.append(r.get_json()["lobby"]["code"])
+
+    assert len(set(codes)) == len(codes)
+    assert all(len(code) == CODE_LENGTH and set(code) <= set(ALPHABET) for code in codes)
+    found = client.get(f"/api/lobbies/by-code/{codes[0].lower()}")
+    assert found.status_code == 200 and found.get_json()["name"] == "Lobby 0"
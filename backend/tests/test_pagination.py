@@ -0,0 +1,57 @@
+# tests/test_pagination.py
+# Keyset-пагинация списков: первая страница, курсор следующей, последняя страница без курсора;
+# since=<id> для клиентов, которые не читают заголовки.
+import pytest
+
+from app import db
+from models import Announcement
+
+
+@pytest.fixture
+def announcements(app):
+    with app.app_context():
+        rows = [Announcement(title=f"A{i}") for i in range(5)]
+        db.session.add_all(rows)
+        db.session.commit()
+        return [a.id for a in rows]
+
+
+def _titles(resp):
+    return [a["title"] for a in resp.get_json()]
+
+
+def test_cursor_walks_all_pages(client, announcements):
+    first = client.get("/api/announcements?limit=2")
+    assert _titles(first) == ["A0", "A1"]
+    cursor = first.headers["X-Next-Cursor"]
+    assert 'rel="next"' in first.headers["Link"]
+
+    second = client.get(f"/api/announcements?limit=2&cursor={cursor}")
+    assert _titles(second) == ["A2", "A3"]
+
+    last = client.get(f"/api/announcements?limit=2&cursor={second.headers['X-Next-Cursor']}")
+    assert _titles(last) == ["A4"]
+    assert "X-Next-Cursor" not in last.headers and "Link" not in last.headers
+
+
+def test_since_walks_all_pages(client, announcements):
+    seen, since = [], None
+    while True:
+        page = client.get("/api/announcements?limit=2" + (f"&since={since}" if since else "")).get_json()
+        seen += [a["id"] for a in page]
+        if len(page) < 2:
+            break
+        since = page[-1]["id"]
+    assert seen == announcements
+
+
+def test_since_and_cursor_are_exclusive(client, announcements):
+    cursor = client.get("/api/announcements?limit=2").headers["X-Next-Cursor"]
+    assert client.get(f"/api/announcements?cursor={cursor}&since=1").status_code == 400
+    assert client.get("/api/announcements?since=abc").status_code == 400
+
+
+def test_paging_headers_are_exposed_to_browsers(client, announcements):
+    r = client.get("/api/announcements?limit=2", headers={"Origin": "http://frontend.example"})
+    exposed = {h.strip().lower() for h in r.headers["Access-Control-Expose-Headers"].split(",")}
+    assert {"x-next-cursor", "link"} <= exposed
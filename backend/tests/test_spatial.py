@@ -0,0 +1,36 @@
+# tests/test_spatial.py
+# Сетка дропзон отвечает так же, как полный перебор, и не раздувается из-за одной огромной зоны.
+import math
+import random
+from collections import namedtuple
+
+from services.spatial import MapIndex
+
+Zone = namedtuple("Zone", "id name x_percent y_percent radius")
+
+
+def _zones(seed, n=300):
+    rnd = random.Random(seed)
+    zones = [Zone(i, f"Z{i}", rnd.uniform(0, 100), rnd.uniform(0, 100), rnd.uniform(0.5, 2))
+             for i in range(n)]
+    zones += [Zone(n, "Huge", 50, 50, 60), Zone(n + 1, "Edge", 0, 100, 25)]
+    return zones
+
+
+def _brute_overlaps(zones):
+    return sorted(
+        (a.id, b.id) for a in zones for b in zones
+        if a.id < b.id and math.hypot(a.x_percent - b.x_percent, a.y_percent - b.y_percent) < a.radius + b.radius
+    )
+
+
+def test_grid_matches_brute_force_with_oversized_zones():
+    for seed in range(3):
+        zones = _zones(seed)
+        index = MapIndex(0, zones)
+        assert index.cell < 5 and {z.name for z in index.oversized} == {"Huge", "Edge"}
+
+        assert [(a.id, b.id) for a, b, _ in index.overlaps()] == _brute_overlaps(zones)
+        for x, y in ((50, 50), (3, 97), (99, 1), (20, 70)):
+            expected = sorted(z.id for z in zones if math.hypot(z.x_percent - x, z.y_percent - y) <= z.radius)
+            assert sorted(z.id for z, _ in index.at(x, y)) == expected
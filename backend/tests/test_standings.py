@@ -0,0 +1,93 @@
+# tests/test_standings.py
+# Итоговая таблица переживает гонку двух «первых» результатов команды,
+# а дельты пакетной записи сходятся с полной пересборкой.
+import sqlalchemy as sa
+
+from app import db
+from models import Game, LobbyStanding
+from services.standings import rebuild_standings
+
+
+def test_first_result_races_with_concurrent_insert(app, client, admin_headers, make_game):
+    game_id, _, (team_id,) = make_game(1, n_zones=0)
+    with app.app_context():
+        lobby_id = db.session.get(Game, game_id).lobby_id
+        engine = db.engine
+
+    # другой запрос вставляет строку команды сразу после нашего UPDATE, который её не нашёл
+    fired = []
+
+    def competing_insert(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE lobby_standing") and not fired:
+            fired.append(statement)
+            conn.execute(sa.insert(LobbyStanding).values(
+                lobby_id=lobby_id, team_id=team_id, kills_total=1, points_total=10,
+                games_played=1, best_place=2, place_total=2, placed_count=1))
+
+    sa.event.listen(engine, "after_cursor_execute", competing_insert)
+    try:
+        r = client.post(f"/api/games/{game_id}/results",
+                        json={"team_id": team_id, "place": 1, "kills": 3, "points": 5}, headers=admin_headers)
+    finally:
+        sa.event.remove(engine, "after_cursor_execute", competing_insert)
+    assert r.status_code == 201, r.get_json()
+
+    with app.app_context():
+        standing = db.session.get(LobbyStanding, (lobby_id, team_id))
+        assert (standing.games_played, standing.kills_total, standing.points_total) == (2, 4, 15)
+
+
+def _table(lobby_id):
+    return db.session.execute(
+        sa.select(LobbyStanding.team_id, LobbyStanding.kills_total, LobbyStanding.points_total,
+                  LobbyStanding.games_played, LobbyStanding.best_place,
+                  LobbyStanding.place_total, LobbyStanding.placed_count)
+        .where(LobbyStanding.lobby_id == lobby_id, LobbyStanding.games_played > 0)
+        .order_by(LobbyStanding.team_id)
+    ).all()
+
+
+def _matches_rebuild(app, lobby_id):
+    with app.app_context():
+        incremental = _table(lobby_id)
+        rebuild_standings(lobby_id)
+        rebuilt = _table(lobby_id)
+        db.session.rollback()
+    assert incremental == rebuilt
+    return incremental
+
+
+def test_bulk_deltas_match_full_rebuild(app, client, admin_headers, make_game):
+    first, _, (a, b, c) = make_game(3, n_zones=0)
+    with app.app_context():
+        game = db.session.get(Game, first)
+        lobby_id = game.lobby_id
+        second = Game(lobby_id=lobby_id, number=2, map_id=game.map_id)
+        db.session.add(second)
+        db.session.commit()
+        second = second.id
+
+    def bulk(game_id, rows):
+        r = client.post(f"/api/games/{game_id}/results/bulk", json={"results": rows}, headers=admin_headers)
+        assert r.status_code == 200, r.get_json()
+        return {x["team_id"]: x["id"] for x in r.get_json()["results"]}
+
+    # вставка пачкой в две игры
+    bulk(first, [{"team_id": a, "place": 1, "kills": 5, "points": 20},
+                 {"team_id": b, "place": 2, "kills": 2, "points": 12},
+                 {"team_id": c, "place": 3, "kills": 0, "points": 6}])
+    ids = bulk(second, [{"team_id": a, "place": 3, "kills": 1, "points": 7},
+                        {"team_id": b, "place": 1, "kills": 4, "points": 18}])
+    assert len(_matches_rebuild(app, lobby_id)) == 3
+
+    # обновление пачкой (с новой строкой), в том числе снятие места
+    bulk(second, [{"team_id": a, "place": None, "kills": 2},
+                  {"team_id": b, "place": 2, "points": 11},
+                  {"team_id": c, "place": 1, "kills": 6, "points": 25}])
+    _matches_rebuild(app, lobby_id)
+
+    # удаление результата b во второй игре
+    r = client.delete(f"/api/games/{second}/results/{ids[b]}", headers=admin_headers)
+    assert r.status_code == 200
+    table = _matches_rebuild(app, lobby_id)
+    assert [row.games_played for row in table] == [2, 1, 2]
@@ -0,0 +1,59 @@
+# tests/test_storage.py
+# Сборщик сирот в static/maps не трогает свежие и используемые файлы.
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from app import db
+from models import Map
+from services import images, storage
+
+DAY = 24 * 60 * 60
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", tmp_path)
+    monkeypatch.setattr(images, "UPLOAD_DIR", tmp_path)
+    return tmp_path
+
+
+def _png():
+    buf = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(buf, "PNG")
+    buf.seek(0)
+    return buf
+
+
+def _age(path, seconds):
+    old = path.stat().st_mtime - seconds
+    os.utime(path, (old, old))
+
+
+def test_reupload_of_old_orphan_survives_sweep(app, upload_dir):
+    filename, created = storage.store_upload(_png(), "png")
+    assert created
+    _age(upload_dir / filename, 2 * DAY)
+
+    assert storage.store_upload(_png(), "png") == (filename, False)
+    with app.app_context():
+        assert storage.sweep_orphans(DAY, dry_run=True)["orphans"] == 0
+
+
+def test_variants_of_dotted_legacy_names_are_kept(app, upload_dir):
+    legacy = "0f3c_my.map.png"  # старая схема имён: <uuid>_<secure_filename>
+    for name in (legacy, images.variant_filename(legacy, "thumb")):
+        (upload_dir / name).write_bytes(b"x")
+        _age(upload_dir / name, 2 * DAY)
+    with app.app_context():
+        db.session.add(Map(name="Legacy", image_filename=legacy))
+        db.session.commit()
+        assert storage.sweep_orphans(DAY, dry_run=True)["files"] == []
+
+
+def test_decompression_bomb_is_not_an_image(upload_dir, monkeypatch):
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 4)  # 4x4 больше 2 * MAX_IMAGE_PIXELS
+    assert storage.store_upload(_png(), "png") is None
+    assert list(upload_dir.iterdir()) == []
@@ -0,0 +1,37 @@
+// app/lib/pages.ts
+// Списочные ручки бэкенда (/admin/users, /announcements, /lobbies, /maps, /auth/users) отдают
+// страницы по возрастанию id, не больше PAGE_SIZE строк. Следующая страница — since=<id последней
+// строки>; страница короче PAGE_SIZE — последняя.
+import { api } from "./api";
+
+const PAGE_SIZE = 500;
+
+export async function apiAll<T extends { id: number }>(
+  path: string,
+  opts?: Parameters<typeof api>[1],
+): Promise<T[]> {
+  const rows: T[] = [];
+  const sep = path.includes("?") ? "&" : "?";
+  for (;;) {
+    const since = rows.length ? `&since=${rows[rows.length - 1].id}` : "";
+    const page = await api<T[]>(`${path}${sep}limit=${PAGE_SIZE}${since}`, opts);
+    rows.push(...page);
+    if (page.length < PAGE_SIZE) return rows;
+  }
+}
+
+// /admin/lobbies листается номерами страниц (page=1.., per_page до 200).
+const NUMBERED_PAGE_SIZE = 200;
+
+export async function apiAllByPage<T>(
+  path: string,
+  opts?: Parameters<typeof api>[1],
+): Promise<T[]> {
+  const rows: T[] = [];
+  const sep = path.includes("?") ? "&" : "?";
+  for (let page = 1; ; page++) {
+    const chunk = await api<T[]>(`${path}${sep}page=${page}&per_page=${NUMBERED_PAGE_SIZE}`, opts);
+    rows.push(...chunk);
+    if (chunk.length < NUMBERED_PAGE_SIZE) return rows;
+  }
+}
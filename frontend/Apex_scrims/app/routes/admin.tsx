@@ -2,6 +2,7 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router";
 import { api, getToken } from "../lib/api";
+import { apiAll, apiAllByPage } from "../lib/pages";
 import "../app.css";
 
 type User = {
@@ -117,16 +118,16 @@ export default function AdminPage() {
     
     try {
       if (activeTab === "users") {
-        const usersData = await api<User[]>("/admin/users", { auth: true });
+        const usersData = await apiAll<User>("/admin/users", { auth: true });
         setUsers(usersData);
       } else if (activeTab === "lobbies") {
-        const lobbiesData = await api<Lobby[]>("/admin/lobbies", { auth: true });
+        const lobbiesData = await apiAllByPage<Lobby>("/admin/lobbies", { auth: true });
         setLobbies(lobbiesData);
       } else if (activeTab === "maps") {
         const mapsData = await api<Map[]>("/admin/maps", { auth: true });
         setMaps(mapsData);
       } else if (activeTab === "announcements") {
-        const announcementsData = await api<Announcement[]>("/announcements");
+        const announcementsData = await apiAll<Announcement>("/announcements");
         setAnnouncements(announcementsData);
       }
     } catch (e: any) {
@@ -2,6 +2,7 @@
 import type { Route } from "./+types/home";
 import { useEffect, useState } from "react";
 import { api, getToken } from "../lib/api";
+import { apiAll } from "../lib/pages";
 import { Link } from "react-router";
 import { ApexLogo } from "../components/ApexLogo";
 import "../app.css";
@@ -43,7 +44,7 @@ export default function Home() {
 
     setLoading(true);
     setErr(null);
-    api<Announcement[]>("/announcements")
+    apiAll<Announcement>("/announcements")
       .then(setAnnouncements)
       .catch((e: any) => setErr(e.message || "Не удалось загрузить анонсы"))
       .finally(() => setLoading(false));